@@ -0,0 +1,271 @@
+# benchmarks/bench_etl.py
+#
+# Benchmark przepustowości ETL na danych syntetycznych (benchmarks/synthetic.py)
+# przeciwko lokalnemu Postgresowi (zmienne PG*, jak reszta projektu).
+#
+#   python -m benchmarks.bench_etl --symbols 1000 --years 2 --intraday-minutes 390 \
+#       --output bench.json [--baseline bench_prev.json] [--trace-memory] [--eod-mode steps]
+#
+# Dla każdego etapu: wiersze, czas (wall) i wiersze/s. Wynik jako JSON – do porównań
+# między commitami (--baseline wypisuje różnice na stderr).
+# --trace-memory dodaje szczyt pamięci Pythona per etap (tracemalloc, obejmuje
+# bufory NumPy/pandas), ale tracemalloc spowalnia etapy z dużą liczbą alokacji –
+# czasów z takiego runu nie porównywać z runami bez niego.
+# EOD domyślnie jak w run_eod_etl (merge_eod_batch, merge_mode=True);
+# --eod-mode steps mierzy stare osobne kroki (wymiary, fact_price, fact_dividend).
+#
+# Syntetyczne symbole (^ZZ[0-9]+$) i ich wiersze są usuwane przed i po runie
+# (--keep zostawia je w bazie). Nie uruchamiać na produkcyjnej hurtowni.
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from benchmarks.synthetic import (
+    generate_daily_prices,
+    generate_dividends,
+    generate_intraday_bars,
+    make_symbols,
+)
+from etl.dims.load_dim_date import ensure_dim_date
+from etl.dims.load_dim_symbol import load_dim_symbol
+from etl.facts.load_fact_dividend import load_fact_dividend
+from etl.facts.load_fact_intraday import load_intraday_claims
+from etl.facts.load_fact_price import load_fact_price
+from etl.facts.merge_eod import merge_eod_batch
+from etl.marts.load_intraday_ohlcv_5m import upsert_intraday_ohlcv_5m
+from etl.marts.load_returns_daily import load_returns_daily
+from etl.staging.intraday.load_staging import load_intraday_staging
+from etl.staging.intraday.symbol_cache import SymbolIdCache
+from etl.staging.load_stg_dividend import load_stg_dividend
+from etl.staging.load_stg_price import load_stg_price
+from etl.utils.db import DbConfig, get_db
+
+SYNTHETIC_SYMBOL_RE = "^ZZ[0-9]+$"
+
+# kolejność: najpierw tabele zależne od dim_symbol
+CLEANUP_TABLES = [
+    "mart.returns_daily",
+    "mart.intraday_ohlcv_5m",
+    "mart.indicators",
+    "mart.indicator_state",
+    "fact_price",
+    "fact_dividend",
+    "fact_price_intraday_raw",
+    "stg_price_intraday",
+]
+
+
+class StageRecorder:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Mierzy blok; wewnątrz ustaw `result["rows"]`.
+        """
+        result = {"stage": name, "rows": 0}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        yield result
+        seconds = time.perf_counter() - t0
+
+        result.update({
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(result["rows"] / seconds, 1) if seconds > 0 else None,
+        })
+        mem = ""
+        if self.trace_memory:
+            result["peak_mem_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            mem = f"{result['peak_mem_mb']:>10.1f} MB"
+        self.stages.append(result)
+        print(
+            f"{name:<28}{result['rows']:>12,}{seconds:>10.3f}s"
+            f"{result['rows_per_sec'] or 0:>14,.0f} rows/s{mem}",
+            file=sys.stderr,
+        )
+
+
+def cleanup_synthetic(engine) -> None:
+    with engine.begin() as conn:
+        ids = "SELECT symbol_id FROM dim_symbol WHERE symbol ~ :re"
+        for table in CLEANUP_TABLES:
+            conn.execute(text(f"DELETE FROM {table} WHERE symbol_id IN ({ids});"), {"re": SYNTHETIC_SYMBOL_RE})
+        conn.execute(text("DELETE FROM dim_symbol WHERE symbol ~ :re;"), {"re": SYNTHETIC_SYMBOL_RE})
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    db = get_db(DbConfig(application_name="stock_dw_bench"))
+    engine = db.engine
+    rec = StageRecorder(trace_memory=args.trace_memory)
+
+    end = dt.date.today()
+    start = end - dt.timedelta(days=int(365 * args.years))
+
+    cleanup_synthetic(engine)
+    ensure_dim_date(engine, end)
+
+    # ---------- generator ----------
+    with rec.stage("generate_daily") as r:
+        daily = generate_daily_prices(args.symbols, start, end, seed=args.seed)
+        r["rows"] = len(daily)
+    with rec.stage("generate_dividends") as r:
+        dividends = generate_dividends(daily, seed=args.seed)
+        r["rows"] = len(dividends)
+    with rec.stage("generate_intraday") as r:
+        intraday = generate_intraday_bars(
+            args.symbols, args.intraday_minutes, seed=args.seed, duplicate_ratio=args.duplicates
+        )
+        r["rows"] = len(intraday)
+
+    # ---------- EOD ----------
+    with rec.stage("load_stg_price") as r:
+        price_batch_id = load_stg_price(daily, engine)
+        r["rows"] = len(daily)
+    with rec.stage("load_stg_dividend") as r:
+        div_batch_id = load_stg_dividend(dividends, engine)
+        r["rows"] = len(dividends)
+
+    if args.eod_mode == "merge":
+        # ścieżka produkcyjna run_eod_etl: wymiary + fakty w jednej transakcji
+        with rec.stage("merge_eod_batch") as r:
+            merge_stats = merge_eod_batch(engine, price_batch_id, div_batch_id)
+            r["rows"] = len(daily) + len(dividends)
+            r["substages"] = [
+                {"stage": st.stage, "seconds": round(st.seconds, 4), "rows": st.rows}
+                for st in merge_stats
+            ]
+    else:
+        with rec.stage("load_dim_symbol") as r:
+            load_dim_symbol(engine)
+            r["rows"] = args.symbols
+        with rec.stage("load_fact_price") as r:
+            load_fact_price(engine, price_batch_id)
+            r["rows"] = len(daily)
+        with rec.stage("load_fact_dividend") as r:
+            load_fact_dividend(engine, div_batch_id)
+            r["rows"] = len(dividends)
+
+    with rec.stage("refresh_returns_daily") as r:
+        r["rows"] = load_returns_daily(engine, price_batch_id)
+
+    # ---------- intraday ----------
+    with db.get_connection("bench") as conn:
+        symbol_ids = SymbolIdCache(conn)
+        symbol_ids.resolve(make_symbols(args.symbols))  # ciepły cache, jak w konsumencie
+        ticks = list(intraday.itertuples(index=False, name=None))
+
+        with rec.stage("load_intraday_staging") as r:
+            for i in range(0, len(ticks), args.intraday_batch):
+                r["rows"] += load_intraday_staging(conn, ticks[i:i + args.intraday_batch], symbol_ids)
+        with rec.stage("load_fact_intraday") as r:
+            r["rows"], touched = load_intraday_claims(conn)
+        with rec.stage("refresh_intraday_ohlcv_5m") as r:
+            with conn.cursor() as cur:
+                r["rows"] = upsert_intraday_ohlcv_5m(cur, touched)
+            conn.commit()
+
+    if not args.keep:
+        cleanup_synthetic(engine)
+
+    return {
+        "commit": git_commit(),
+        "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "params": {
+            "symbols": args.symbols,
+            "years": args.years,
+            "intraday_minutes": args.intraday_minutes,
+            "intraday_batch": args.intraday_batch,
+            "duplicates": args.duplicates,
+            "seed": args.seed,
+            "eod_mode": args.eod_mode,
+            "trace_memory": args.trace_memory,
+        },
+        "env": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": rec.stages,
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    old = {s["stage"]: s for s in baseline.get("stages", [])}
+    print(f"\nvs {baseline.get('commit')}:", file=sys.stderr)
+    for s in report["stages"]:
+        b = old.get(s["stage"])
+        if not b or not b.get("rows_per_sec") or not s.get("rows_per_sec"):
+            continue
+        delta = (s["rows_per_sec"] / b["rows_per_sec"] - 1) * 100
+        print(f"{s['stage']:<28}{delta:>+9.1f}% rows/s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--years", type=float, default=2.0)
+    parser.add_argument("--intraday-minutes", type=int, default=390)
+    parser.add_argument("--intraday-batch", type=int, default=5_000,
+                        help="wiersze na wywołanie load_intraday_staging (jak batch konsumenta)")
+    parser.add_argument("--duplicates", type=float, default=0.01,
+                        help="udział zdublowanych barów intraday")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="plik JSON (domyślnie stdout)")
+    parser.add_argument("--baseline", help="poprzedni JSON do porównania")
+    parser.add_argument("--keep", action="store_true", help="nie usuwaj danych syntetycznych")
+    parser.add_argument("--eod-mode", choices=("merge", "steps"), default="merge",
+                        help="merge = merge_eod_batch (jak run_eod_etl), steps = osobne kroki")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="szczyt pamięci per etap (tracemalloc – zawyża czasy)")
+    args = parser.parse_args()
+
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        report = run(args)
+    finally:
+        if args.trace_memory:
+            tracemalloc.stop()
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
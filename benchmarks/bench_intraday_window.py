@@ -0,0 +1,264 @@
+# benchmarks/bench_intraday_window.py
+#
+# Czy odczyt "ostatnie 30 minut" (mart.vw_intraday_last_30m) zależy od rozmiaru
+# fact_price_intraday_raw? Tabela jest rozbudowywana krokami (historia dopisywana
+# wstecz od teraz, syntetyczne symbole ^ZZ[0-9]+$), a po każdym kroku mierzymy:
+#
+#   symbol – okno jednego symbolu (jak app.py::load_intraday)
+#   window – całe okno wszystkich symboli
+#
+# Dla każdego: p50/p95 z --repeats wywołań oraz jeden EXPLAIN (ANALYZE, BUFFERS):
+# liczba bloków, partycje w planie, typy skanów. Stały czas = płaskie p50 i bloki
+# przy rosnącej liczbie wierszy.
+#
+#   python -m benchmarks.bench_intraday_window --symbols 2000 --steps 1e6,1e7,1e8 \
+#       --output window.json
+#
+# Wymaga migracji 006 (etl/sql/migrations/006_intraday_recent_window_indexes.sql).
+# 100M wierszy to kilkadziesiąt GB i sprzątanie DELETE-em – tylko na bazie testowej.
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_etl import cleanup_synthetic, git_commit
+from benchmarks.synthetic import make_symbols
+from etl.facts.intraday_partitions import check_intraday_indexes
+from etl.utils.db import DbConfig, get_db
+
+WINDOW_MINUTES = 30
+
+SQL_ENSURE_SYMBOLS = """
+INSERT INTO dim_symbol (symbol)
+SELECT n.symbol
+FROM unnest(%(symbols)s::text[]) AS n(symbol)
+WHERE NOT EXISTS (SELECT 1 FROM dim_symbol d WHERE d.symbol = n.symbol);
+"""
+
+SQL_ENSURE_PARTITIONS = """
+SELECT ensure_fact_price_intraday_partition(d)
+FROM generate_series(
+    date_trunc('day', %(lo)s::timestamptz AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    %(hi)s::timestamptz,
+    interval '1 day'
+) AS d;
+"""
+
+# bary 1-min [lo, hi) dla wszystkich syntetycznych symboli, generowane po stronie serwera
+SQL_FILL = """
+INSERT INTO fact_price_intraday_raw (symbol_id, ts_utc, open, high, low, close, volume)
+SELECT
+    s.symbol_id,
+    t,
+    s.base,
+    s.base * 1.001,
+    s.base * 0.999,
+    s.base * (1 + (random() - 0.5) / 500),
+    (random() * 10000)::bigint
+FROM (
+    SELECT symbol_id, symbol, 50 + symbol_id %% 450 AS base
+    FROM dim_symbol
+) s
+CROSS JOIN generate_series(%(lo)s::timestamptz, %(hi)s::timestamptz - interval '1 minute', interval '1 minute') AS t
+WHERE s.symbol ~ '^ZZ[0-9]+$'
+ON CONFLICT (symbol_id, ts_utc) DO NOTHING;
+"""
+
+SQL_COUNT = "SELECT count(*) FROM fact_price_intraday_raw;"
+
+QUERIES = {
+    "symbol": """
+        SELECT ts_utc, open, high, low, close, volume
+        FROM mart.vw_intraday_last_30m
+        WHERE symbol = %(symbol)s
+        ORDER BY ts_utc
+    """,
+    "window": """
+        SELECT count(*), sum(volume)
+        FROM mart.vw_intraday_last_30m
+    """,
+}
+
+
+def _minute(ts: dt.datetime) -> dt.datetime:
+    return ts.replace(second=0, microsecond=0)
+
+
+class Table:
+    """
+    Syntetyczne wiersze w fact_price_intraday_raw: historia rośnie wstecz od
+    `oldest`, "głowa" jest dopisywana do bieżącej minuty przed każdym pomiarem,
+    żeby okno 30 min było zawsze pełne.
+    """
+
+    def __init__(self, conn, n_symbols: int):
+        self.conn = conn
+        self.n_symbols = n_symbols
+        now = _minute(dt.datetime.now(dt.timezone.utc))
+        self.oldest = now - dt.timedelta(minutes=WINDOW_MINUTES)
+        self.head = self.oldest
+
+    def _fill(self, lo: dt.datetime, hi: dt.datetime) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute(SQL_ENSURE_PARTITIONS, {"lo": lo, "hi": hi})
+            cur.execute(SQL_FILL, {"lo": lo, "hi": hi})
+        self.conn.commit()
+
+    def refresh_head(self) -> None:
+        now = _minute(dt.datetime.now(dt.timezone.utc)) + dt.timedelta(minutes=1)
+        if now > self.head:
+            self._fill(self.head, now)
+            self.head = now
+
+    def grow_to(self, rows: int, current: int) -> None:
+        minutes = -(-(rows - current) // self.n_symbols)
+        target = self.oldest - dt.timedelta(minutes=minutes)
+        # po jednym dniu na transakcję – krótkie transakcje, postęp na stderr
+        while self.oldest > target:
+            lo = max(target, self.oldest - dt.timedelta(days=1))
+            self._fill(lo, self.oldest)
+            self.oldest = lo
+            print(f"  filled back to {lo:%Y-%m-%d %H:%M}", file=sys.stderr)
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(cur, sql: str, params: dict) -> dict:
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+    doc = cur.fetchone()[0]
+    doc = doc[0] if isinstance(doc, list) else json.loads(doc)[0]
+    root = doc["Plan"]
+    nodes = list(_walk(root))
+    scans = [n for n in nodes if "Relation Name" in n]
+    return {
+        "execution_ms": round(doc["Execution Time"], 3),
+        "shared_hit_blocks": root.get("Shared Hit Blocks", 0),
+        "shared_read_blocks": root.get("Shared Read Blocks", 0),
+        "heap_fetches": sum(n.get("Heap Fetches", 0) for n in nodes),
+        "partitions": sorted({n["Relation Name"] for n in scans if n["Relation Name"] != "dim_symbol"}),
+        "scans": sorted({f"{n['Node Type']}:{n.get('Index Name', n['Relation Name'])}" for n in scans}),
+    }
+
+
+def measure(conn, symbols, repeats: int) -> dict:
+    results = {}
+    with conn.cursor() as cur:
+        for name, sql in QUERIES.items():
+            plan = explain(cur, sql, {"symbol": random.choice(symbols)})
+
+            ms, rows = [], 0
+            for _ in range(repeats):
+                params = {"symbol": random.choice(symbols)}
+                t0 = time.perf_counter()
+                cur.execute(sql, params)
+                rows = len(cur.fetchall())
+                ms.append((time.perf_counter() - t0) * 1000)
+
+            results[name] = {
+                "rows": rows,
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "explain": plan,
+            }
+    conn.rollback()
+    return results
+
+
+def vacuum_analyze(engine) -> None:
+    # visibility map → index-only scan; VACUUM poza transakcją
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM (ANALYZE) fact_price_intraday_raw;")
+
+
+def run(args) -> dict:
+    db = get_db(DbConfig(application_name="stock_dw_bench", statement_timeout_ms=0))
+    engine = db.engine
+    steps = sorted(int(float(s)) for s in args.steps.split(","))
+    symbols = make_symbols(args.symbols)
+    report_steps = []
+
+    cleanup_synthetic(engine)
+    with db.get_connection("bench") as conn:
+        with conn.cursor() as cur:
+            missing = check_intraday_indexes(cur)
+            cur.execute(SQL_ENSURE_SYMBOLS, {"symbols": symbols})
+        conn.commit()
+        if missing:
+            print(f"WARNING: missing/invalid indexes {missing} – run migration 006", file=sys.stderr)
+
+        table = Table(conn, args.symbols)
+        for target in steps:
+            with conn.cursor() as cur:
+                cur.execute(SQL_COUNT)
+                current = cur.fetchone()[0]
+            conn.commit()
+
+            t0 = time.perf_counter()
+            if target > current:
+                table.grow_to(target, current)
+            table.refresh_head()
+            vacuum_analyze(engine)
+            load_s = time.perf_counter() - t0
+
+            with conn.cursor() as cur:
+                cur.execute(SQL_COUNT)
+                total = cur.fetchone()[0]
+            conn.commit()
+
+            table.refresh_head()
+            step = {"table_rows": total, "load_seconds": round(load_s, 1), **measure(conn, symbols, args.repeats)}
+            report_steps.append(step)
+            print(
+                f"{total:>14,} rows  "
+                + "  ".join(
+                    f"{q}: p50 {step[q]['p50_ms']:.2f} ms, {step[q]['explain']['shared_hit_blocks'] + step[q]['explain']['shared_read_blocks']} blk"
+                    for q in QUERIES
+                ),
+                file=sys.stderr,
+            )
+
+    if not args.keep:
+        cleanup_synthetic(engine)
+
+    return {
+        "commit": git_commit(),
+        "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "params": {"symbols": args.symbols, "steps": steps, "repeats": args.repeats},
+        "missing_indexes": missing,
+        "steps": report_steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--steps", default="1e6,1e7,1e8",
+                        help="docelowe rozmiary tabeli (wiersze), po przecinku")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="plik JSON (domyślnie stdout)")
+    parser.add_argument("--keep", action="store_true", help="nie usuwaj danych syntetycznych")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    payload = json.dumps(run(args), indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
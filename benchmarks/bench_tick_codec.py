@@ -0,0 +1,83 @@
+# benchmarks/bench_tick_codec.py
+#
+# Mikro-benchmark: tick_codec vs pickle (pojedyncze ticki i batche).
+#   python -m benchmarks.bench_tick_codec [--ticks 100000] [--batch 1000]
+
+import argparse
+import datetime as dt
+import pickle
+import random
+import time
+
+from etl.staging.intraday.tick_codec import (
+    decode_batch,
+    decode_tick,
+    encode_batch,
+    encode_tick,
+)
+
+
+def make_ticks(n: int):
+    now = dt.datetime.now(dt.timezone.utc).replace(second=0, microsecond=0)
+    rng = random.Random(42)
+    rows = []
+    for i in range(n):
+        o = 100 + rng.uniform(-5, 5)
+        c = o + rng.uniform(-0.5, 0.5)
+        rows.append((
+            f"SYM{i % 500}",
+            now - dt.timedelta(minutes=i // 500),
+            o,
+            max(o, c) + rng.uniform(0, 0.3),
+            min(o, c) - rng.uniform(0, 0.3),
+            c,
+            rng.randint(100, 10_000),
+        ))
+    return rows
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1_000)
+    args = parser.parse_args()
+
+    rows = make_ticks(args.ticks)
+    batches = [rows[i:i + args.batch] for i in range(0, len(rows), args.batch)]
+
+    cases = {
+        "pickle/tick": (
+            lambda: [pickle.dumps(r) for r in rows],
+            lambda enc: [pickle.loads(b) for b in enc],
+        ),
+        "codec/tick": (
+            lambda: [encode_tick(r) for r in rows],
+            lambda enc: [decode_tick(b) for b in enc],
+        ),
+        "pickle/batch": (
+            lambda: [pickle.dumps(b) for b in batches],
+            lambda enc: [pickle.loads(b) for b in enc],
+        ),
+        "codec/batch": (
+            lambda: [encode_batch(b) for b in batches],
+            lambda enc: [decode_batch(b) for b in enc],
+        ),
+    }
+
+    print(f"{args.ticks} ticks, batch={args.batch}")
+    print(f"{'case':<14}{'bytes/tick':>12}{'enc ticks/s':>16}{'dec ticks/s':>16}")
+    for name, (enc_fn, dec_fn) in cases.items():
+        encoded, t_enc = timed(enc_fn)
+        _, t_dec = timed(dec_fn, encoded)
+        size = sum(len(b) for b in encoded) / args.ticks
+        print(f"{name:<14}{size:>12.1f}{args.ticks / t_enc:>16,.0f}{args.ticks / t_dec:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
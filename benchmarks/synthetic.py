@@ -0,0 +1,135 @@
+# benchmarks/synthetic.py
+#
+# Wektorowy (NumPy), deterministyczny generator danych rynkowych do benchmarków:
+# dzienne OHLCV, 1-min bary intraday, dywidendy. Kształty ramek jak z ekstraktorów
+# (extract_prices / fetch_intraday_since / extract_dividends), więc trafiają
+# prosto do loaderów. Bez pętli per symbol – 10k symboli x lata to kwestia sekund.
+
+from __future__ import annotations
+
+import datetime as dt
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# prefiks syntetycznych tickerów – nie koliduje z prawdziwymi, łatwo posprzątać
+SYMBOL_PREFIX = "ZZ"
+
+
+def make_symbols(n: int, prefix: str = SYMBOL_PREFIX) -> List[str]:
+    width = max(5, len(str(n - 1)))
+    return [f"{prefix}{i:0{width}d}" for i in range(n)]
+
+
+def _gbm_paths(rng, n_paths: int, n_steps: int, sigma: float, start_low=20.0, start_high=500.0):
+    """
+    Ścieżki cen (geometryczny ruch Browna), kształt (n_steps, n_paths).
+    """
+    start = rng.uniform(start_low, start_high, size=n_paths)
+    shocks = rng.normal(0.0, sigma, size=(n_steps, n_paths))
+    return start * np.exp(np.cumsum(shocks, axis=0))
+
+
+def _ohlc_from_close(rng, close: np.ndarray, spread: float):
+    """
+    open = poprzednie zamknięcie (+ szum), high/low obejmują open i close.
+    """
+    prev = np.vstack([close[:1], close[:-1]])
+    open_ = prev * (1 + rng.normal(0.0, spread / 4, size=close.shape))
+    wick = np.abs(rng.normal(0.0, spread, size=(2,) + close.shape))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    return open_, high, low
+
+
+def generate_daily_prices(
+    n_symbols: int,
+    start: dt.date,
+    end: dt.date,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Dzienne OHLCV (dni robocze) – kolumny jak extract_prices().
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, end)
+    symbols = make_symbols(n_symbols)
+
+    close = _gbm_paths(rng, n_symbols, len(days), sigma=0.02)
+    open_, high, low = _ohlc_from_close(rng, close, spread=0.01)
+    volume = rng.lognormal(13.0, 1.0, size=close.shape).round()
+
+    # układ long: dzień-major → symbol zmienia się najszybciej
+    return pd.DataFrame({
+        "symbol": np.tile(np.array(symbols, dtype=object), len(days)),
+        "date_value": np.repeat(days.to_numpy(), n_symbols),
+        "open": open_.ravel(),
+        "high": high.ravel(),
+        "low": low.ravel(),
+        "close": close.ravel(),
+        "adj_close": close.ravel(),
+        "volume": volume.ravel(),
+    })
+
+
+def generate_intraday_bars(
+    n_symbols: int,
+    minutes: int,
+    end: dt.datetime | None = None,
+    seed: int = 42,
+    duplicate_ratio: float = 0.0,
+) -> pd.DataFrame:
+    """
+    1-min bary (symbol, ts_utc, open, high, low, close, volume) – kolumny jak
+    fetch_intraday_since(). `duplicate_ratio` dokleja poprawione wersje losowych
+    barów (jak ponownie pobrane minuty z yfinance).
+    """
+    rng = np.random.default_rng(seed)
+    end = end or dt.datetime.now(dt.timezone.utc).replace(second=0, microsecond=0)
+    stamps = pd.date_range(end=pd.Timestamp(end), periods=minutes, freq="min")
+    if stamps.tz is None:
+        stamps = stamps.tz_localize("UTC")
+    symbols = make_symbols(n_symbols)
+
+    close = _gbm_paths(rng, n_symbols, minutes, sigma=0.001)
+    open_, high, low = _ohlc_from_close(rng, close, spread=0.0005)
+    volume = rng.integers(100, 10_000, size=close.shape)
+
+    frame = pd.DataFrame({
+        "symbol": np.tile(np.array(symbols, dtype=object), minutes),
+        "ts_utc": stamps.repeat(n_symbols),  # Index.repeat zachowuje strefę
+        "open": open_.ravel(),
+        "high": high.ravel(),
+        "low": low.ravel(),
+        "close": close.ravel(),
+        "volume": volume.ravel().astype("int64"),
+    })
+
+    n_dup = int(len(frame) * duplicate_ratio)
+    if n_dup:
+        dup = frame.iloc[rng.choice(len(frame), size=n_dup, replace=False)].copy()
+        dup["close"] *= 1 + rng.normal(0.0, 0.0005, size=n_dup)
+        dup["volume"] += rng.integers(1, 500, size=n_dup)
+        frame = pd.concat([frame, dup], ignore_index=True)
+
+    return frame
+
+
+def generate_dividends(
+    daily: pd.DataFrame,
+    per_year: int = 4,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Dywidendy (symbol, ex_date, dividend) na dniach sesyjnych z `daily`:
+    średnio `per_year` na symbol rocznie, ~0.5% ceny zamknięcia.
+    """
+    rng = np.random.default_rng(seed)
+    mask = rng.random(len(daily)) < per_year / 252
+    picked = daily.loc[mask, ["symbol", "date_value", "close"]]
+    return pd.DataFrame({
+        "symbol": picked["symbol"].to_numpy(),
+        "ex_date": picked["date_value"].dt.date.to_numpy(),
+        "dividend": (picked["close"] * 0.005).round(4).to_numpy(),
+    })
@@ -5,7 +5,8 @@ import dagster as dg
 from dagster import Definitions
 from etl.resources import db_resource
 from etl.jobs.daily_price_job import daily_price_job
-from etl.jobs.intraday_job import intraday_job
+from etl.jobs.intraday_job import intraday_job, intraday_partition_job
+from etl.jobs.export_job import export_parquet_job
 # from etl.resources import db_resource
 
 # ---------- SCHEDULE: dzienny batch EOD ----------
@@ -31,10 +32,35 @@ intraday_schedule = dg.ScheduleDefinition(
     execution_timezone="Europe/Warsaw",
 )
 
+# ---------- SCHEDULE: partycje intraday przed sesją ----------
+
+intraday_partition_schedule = dg.ScheduleDefinition(
+    name="intraday_partition_schedule",
+    job=intraday_partition_job,
+    # 14:00, pon–pt – przed otwarciem sesji US
+    cron_schedule="0 14 * * 1-5",
+    execution_timezone="Europe/Warsaw",
+)
+
+# ---------- SCHEDULE: eksport Parquet po EOD ----------
+
+export_parquet_schedule = dg.ScheduleDefinition(
+    name="export_parquet_schedule",
+    job=export_parquet_job,
+    # 01:00, wt–sob – po nocnym batchu EOD
+    cron_schedule="0 1 * * 2-6",
+    execution_timezone="Europe/Warsaw",
+)
+
 # ---------- DEFINITIONS ----------
 
 defs = dg.Definitions(
-    jobs=[daily_price_job, intraday_job],
-    schedules=[daily_price_schedule, intraday_schedule],
+    jobs=[daily_price_job, intraday_job, intraday_partition_job, export_parquet_job],
+    schedules=[
+        daily_price_schedule,
+        intraday_schedule,
+        intraday_partition_schedule,
+        export_parquet_schedule,
+    ],
     # resources={"db": db_resource},
 )
@@ -1,20 +1,62 @@
+# etl/dims/load_dim_date.py
+
+import datetime as dt
+
 from sqlalchemy import text
 
-SQL = """
-INSERT INTO dim_date (date_sk, date_value, year, month, day)
-SELECT DISTINCT
-    (EXTRACT(YEAR FROM s.date_value)::int * 10000) +
-    (EXTRACT(MONTH FROM s.date_value)::int * 100) +
-    (EXTRACT(DAY FROM s.date_value)::int),
-    s.date_value,
-    EXTRACT(YEAR FROM s.date_value)::int,
-    EXTRACT(MONTH FROM s.date_value)::int,
-    EXTRACT(DAY FROM s.date_value)::int
-FROM stg.stg_price s
-LEFT JOIN dim_date d ON d.date_value = s.date_value
-WHERE d.date_value IS NULL;
+from etl.dims.trading_calendar import build_calendar
+from etl.staging.copy_loader import copy_frame
+
+# Kalendarz generowany z góry dla całego horyzontu – fakty i marty nie muszą
+# czekać, aż EOD "dopisze" datę, a zakresy date_sk są ciągłe.
+CALENDAR_START = dt.date(2000, 1, 1)
+CALENDAR_YEARS_AHEAD = 5
+
+COLUMNS = [
+    "date_sk", "date_value", "year", "month", "day", "quarter",
+    "iso_year", "iso_week", "week_start", "day_of_week",
+    "is_weekend", "is_holiday", "holiday_name", "is_trading_day", "trading_day_seq",
+]
+
+SQL_STAGE = "CREATE TEMP TABLE _dim_date_new (LIKE dim_date) ON COMMIT DROP;"
+
+SQL_UPSERT = f"""
+INSERT INTO dim_date ({", ".join(COLUMNS)})
+SELECT {", ".join(COLUMNS)}
+FROM _dim_date_new
+ON CONFLICT (date_sk) DO UPDATE SET
+    {", ".join(f"{c} = EXCLUDED.{c}" for c in COLUMNS[1:])};
 """
 
-def load_dim_date(engine):
+SQL_HORIZON = "SELECT max(date_value) FROM dim_date WHERE is_trading_day IS NOT NULL;"
+
+
+def load_dim_date(engine, start=CALENDAR_START, years_ahead=CALENDAR_YEARS_AHEAD, today=None):
+    """
+    Generuje kalendarz [start, 31.12 roku today + years_ahead] i wgrywa go
+    jednym COPY + upsertem. Idempotentne. Zwraca liczbę dni w kalendarzu.
+    """
+    today = today or dt.date.today()
+    end = dt.date(today.year + years_ahead, 12, 31)
+    frame = build_calendar(start, end)
+
     with engine.begin() as conn:
-        conn.execute(text(SQL))
+        conn.execute(text(SQL_STAGE))
+        with conn.connection.cursor() as cur:
+            copy_frame(cur, frame, "_dim_date_new", COLUMNS, date_format="%Y-%m-%d")
+        conn.execute(text(SQL_UPSERT))
+
+    return len(frame)
+
+
+def ensure_dim_date(engine, through, start=CALENDAR_START, years_ahead=CALENDAR_YEARS_AHEAD):
+    """
+    Tani check w każdym runie: regeneruje kalendarz tylko wtedy,
+    gdy nie sięga do `through`. Zwraca liczbę wgranych dni (0 = nic do zrobienia).
+    """
+    with engine.connect() as conn:
+        horizon = conn.execute(text(SQL_HORIZON)).scalar()
+
+    if horizon is not None and horizon >= through:
+        return 0
+    return load_dim_date(engine, start=start, years_ahead=years_ahead)
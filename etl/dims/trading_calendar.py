@@ -0,0 +1,126 @@
+# etl/dims/trading_calendar.py
+
+from __future__ import annotations
+
+import datetime as dt
+from typing import Dict
+
+import pandas as pd
+
+
+# Kalendarz giełdowy NYSE (wszystkie tickery w TICKERS notowane w USA).
+# Zasady "observed": święto w sobotę → piątek wcześniej, w niedzielę → poniedziałek.
+# Wyjątek: Nowy Rok w sobotę nie jest obchodzony 31.12 (NYSE nie zamyka końca roku).
+# Jednorazowe zamknięcia (pogrzeby prezydentów, 9/11, Sandy) – SPECIAL_CLOSURES.
+
+SPECIAL_CLOSURES: Dict[dt.date, str] = {
+    dt.date(2001, 9, 11): "September 11",
+    dt.date(2001, 9, 12): "September 11",
+    dt.date(2001, 9, 13): "September 11",
+    dt.date(2001, 9, 14): "September 11",
+    dt.date(2004, 6, 11): "Reagan funeral",
+    dt.date(2007, 1, 2): "Ford funeral",
+    dt.date(2012, 10, 29): "Hurricane Sandy",
+    dt.date(2012, 10, 30): "Hurricane Sandy",
+    dt.date(2018, 12, 5): "G. H. W. Bush funeral",
+    dt.date(2025, 1, 9): "Carter funeral",
+}
+
+
+def _easter(year: int) -> dt.date:
+    # algorytm Meeusa/Jonesa/Butchera (kalendarz gregoriański)
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return dt.date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> dt.date:
+    first = dt.date(year, month, 1)
+    return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> dt.date:
+    nxt = dt.date(year + month // 12, month % 12 + 1, 1)
+    last = nxt - dt.timedelta(days=1)
+    return last - dt.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: dt.date) -> dt.date:
+    if day.weekday() == 5:
+        return day - dt.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + dt.timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> Dict[dt.date, str]:
+    """
+    Dni zamknięcia NYSE w danym roku: {data: nazwa święta}.
+    """
+    mon, thu = 0, 3
+    days = {}
+
+    new_year = dt.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days[_observed(new_year)] = "New Year's Day"
+    if year >= 1998:
+        days[_nth_weekday(year, 1, mon, 3)] = "Martin Luther King Jr. Day"
+    days[_nth_weekday(year, 2, mon, 3)] = "Washington's Birthday"
+    days[_easter(year) - dt.timedelta(days=2)] = "Good Friday"
+    days[_last_weekday(year, 5, mon)] = "Memorial Day"
+    if year >= 2022:
+        days[_observed(dt.date(year, 6, 19))] = "Juneteenth"
+    days[_observed(dt.date(year, 7, 4))] = "Independence Day"
+    days[_nth_weekday(year, 9, mon, 1)] = "Labor Day"
+    days[_nth_weekday(year, 11, thu, 4)] = "Thanksgiving Day"
+    days[_observed(dt.date(year, 12, 25))] = "Christmas Day"
+
+    days.update({d: name for d, name in SPECIAL_CLOSURES.items() if d.year == year})
+    return days
+
+
+def build_calendar(start: dt.date, end: dt.date) -> pd.DataFrame:
+    """
+    Ramka kolumn dim_date dla [start, end] – wektorowo, jeden wiersz na dzień.
+    """
+    dates = pd.date_range(start, end, freq="D")
+
+    holidays = {}
+    for year in range(start.year, end.year + 1):
+        holidays.update(nyse_holidays(year))
+    holiday_name = pd.Series(
+        dates.map(lambda d: holidays.get(d.date())), index=dates, dtype="object"
+    )
+
+    iso = dates.isocalendar()
+    is_weekend = dates.dayofweek >= 5
+    is_holiday = holiday_name.notna().to_numpy()
+    is_trading_day = ~is_weekend & ~is_holiday
+
+    frame = pd.DataFrame({
+        "date_sk": dates.strftime("%Y%m%d").astype(int),
+        "date_value": dates,
+        "year": dates.year,
+        "month": dates.month,
+        "day": dates.day,
+        "quarter": dates.quarter,
+        "iso_year": iso["year"].to_numpy(),
+        "iso_week": iso["week"].to_numpy(),
+        "week_start": dates - pd.to_timedelta(dates.dayofweek, unit="D"),
+        "day_of_week": dates.dayofweek + 1,  # 1 = poniedziałek (ISO)
+        "is_weekend": is_weekend,
+        "is_holiday": is_holiday,
+        "holiday_name": holiday_name.to_numpy(),
+        "is_trading_day": is_trading_day,
+    })
+    # gęsty numer dnia sesyjnego: N sesji wstecz = trading_day_seq - N
+    frame["trading_day_seq"] = is_trading_day.cumsum()
+    return frame.reset_index(drop=True)
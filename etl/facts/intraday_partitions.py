@@ -0,0 +1,113 @@
+# etl/facts/intraday_partitions.py
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import re
+from typing import List
+
+PARENT = "fact_price_intraday_raw"
+
+GRANULARITIES = ("day", "week", "month")
+
+# jedna granulacja dla wszystkich ścieżek tworzących partycje
+# (maintain_intraday_partitions, loader intraday, stream_intraday.py)
+DEFAULT_GRANULARITY = os.getenv("INTRADAY_PARTITION_GRANULARITY", "day")
+
+_PARTITION_RE = re.compile(rf"^{PARENT}_([dwm])(\d{{8}})$")
+
+SQL_ENSURE = "SELECT ensure_fact_price_intraday_partition(%(ts)s, %(granularity)s);"
+
+# podpięte partycje z granicami (etl/sql/facts/fn_ensure_fact_price_intraday_partition.sql)
+SQL_LIST_PARTITIONS = "SELECT relname, hi FROM fact_price_intraday_partition_bounds();"
+
+# Indeksy rodzica (etl/sql/facts/idx_fact_price_intraday_raw.sql). Nieważny =
+# migracja 006 nie dołączyła jeszcze indeksów wszystkich partycji.
+INTRADAY_INDEXES = (
+    "ix_fact_price_intraday_raw_ts_brin",
+    "ix_fact_price_intraday_raw_symbol_ts_cov",
+)
+
+SQL_INDEX_STATUS = """
+SELECT n.name, x.indisvalid
+FROM unnest(%(names)s::text[]) AS n(name)
+LEFT JOIN pg_index x ON x.indexrelid = to_regclass(n.name);
+"""
+
+# Partycje dla dni, które pojawiły się w stagingu – loader nie trafi w DEFAULT.
+SQL_ENSURE_FOR_STAGING = """
+SELECT ensure_fact_price_intraday_partition(d, %(granularity)s)
+FROM (
+    SELECT DISTINCT date_trunc('day', ts_utc AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS d
+    FROM stg_price_intraday
+) days;
+"""
+
+
+def ensure_intraday_partitions(
+    cur,
+    start_day: dt.date,
+    days_ahead: int = 3,
+    granularity: str = DEFAULT_GRANULARITY,
+) -> List[str]:
+    """
+    Zakłada partycje pokrywające [start_day, start_day + days_ahead].
+    Idempotentne – istniejące partycje (dowolnej granulacji) są pomijane.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+
+    names = []
+    for offset in range(days_ahead + 1):
+        day = start_day + dt.timedelta(days=offset)
+        ts = dt.datetime.combine(day, dt.time(), tzinfo=dt.timezone.utc)
+        cur.execute(SQL_ENSURE, {"ts": ts, "granularity": granularity})
+        names.append(cur.fetchone()[0])
+
+    # ten sam dzień/tydzień może wrócić kilka razy
+    return list(dict.fromkeys(names))
+
+
+def check_intraday_indexes(cur) -> List[str]:
+    """
+    Zwraca indeksy z INTRADAY_INDEXES, których brak albo są nieważne
+    (planer ich nie użyje – odczyty okna wracają do skanu partycji).
+    """
+    cur.execute(SQL_INDEX_STATUS, {"names": list(INTRADAY_INDEXES)})
+    return [name for name, valid in cur.fetchall() if not valid]
+
+
+def retire_intraday_partitions(
+    cur,
+    retention_days: int,
+    drop: bool = False,
+    today: dt.date | None = None,
+) -> List[str]:
+    """
+    Odłącza (DETACH) albo usuwa (DROP) partycje, których górna granica
+    jest starsza niż `retention_days` dni. Odłączone tabele zostają jako archiwum
+    pod nazwą <partycja>_detached_<czas> – nazwa partycji jest wolna, więc
+    spóźnione bary z tego zakresu dostaną nową partycję, a nie DEFAULT.
+    """
+    today = today or dt.datetime.now(dt.timezone.utc).date()
+    cutoff = today - dt.timedelta(days=retention_days)
+
+    cur.execute(SQL_LIST_PARTITIONS)
+    retired = []
+    for relname, upper in cur.fetchall():
+        if not _PARTITION_RE.match(relname):
+            continue
+        # górna granica z relpartbound – nazwa niesie tylko dolną (partycja bywa przycięta)
+        if upper.astimezone(dt.timezone.utc).date() > cutoff:
+            continue
+
+        if drop:
+            cur.execute(f'DROP TABLE "{relname}";')
+        else:
+            cur.execute(f'ALTER TABLE {PARENT} DETACH PARTITION "{relname}";')
+            stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%d%H%M%S")
+            cur.execute(f'ALTER TABLE "{relname}" RENAME TO "{relname}_detached_{stamp}";')
+        retired.append(relname)
+
+    return sorted(retired)
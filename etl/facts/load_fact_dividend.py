@@ -1,5 +1,7 @@
 from sqlalchemy import text
 
+from etl.staging.batches import STG_DIVIDEND, mark_batch_loaded
+
 SQL = """
 INSERT INTO fact_dividend (
     symbol_id,
@@ -27,4 +29,6 @@ DO UPDATE SET
 
 def load_fact_dividend(engine, batch_id: str):
     with engine.begin() as conn:
+        # batch_id = parametr → pruning do jednej partycji stagingu
         conn.execute(text(SQL), {"batch_id": batch_id})
+        mark_batch_loaded(conn, STG_DIVIDEND, batch_id)
@@ -0,0 +1,120 @@
+# etl/facts/load_fact_intraday.py
+
+from __future__ import annotations
+
+import json
+from typing import List, Tuple
+
+from etl.facts.intraday_partitions import DEFAULT_GRANULARITY, SQL_ENSURE_FOR_STAGING
+from etl.marts.load_intraday_ohlcv_5m import BUCKET_5M
+
+# kanał LISTEN/NOTIFY dla dashboardu live (streamlit/live_feed.py)
+NOTIFY_CHANNEL = "intraday_ticks"
+
+# maks. wierszy stagingu na jeden claim – krótkie transakcje, niska latencja
+CLAIM_MAX_ROWS = 50_000
+
+# Claim = DELETE ... RETURNING na wierszach zablokowanych przez FOR UPDATE SKIP LOCKED:
+# - wiersze wstawione przez konsumenta w trakcie nie giną (nie są w claimie, zostają na następny),
+# - równoległe loadery biorą rozłączne zbiory wierszy zamiast czekać na siebie,
+# - rollback (np. błąd upsertu) zwraca wiersze do stagingu.
+# Duplikaty baru: wygrywa wiersz o najwyższym ingest_seq (ostatni zapis), także
+# między batchami – upsert nie nadpisze faktu nowszą wersją z wcześniejszego batcha.
+SQL_CLAIM_AND_LOAD = f"""
+with claimed as (
+    delete from stg_price_intraday
+    where ctid = any(array(
+        select ctid
+        from stg_price_intraday
+        limit %(max_rows)s
+        for update skip locked
+    ))
+    returning symbol_id, ts_utc, open, high, low, close, volume, ingest_seq
+),
+src as (
+    select distinct on (symbol_id, ts_utc)
+        symbol_id, ts_utc, open, high, low, close, volume, ingest_seq
+    from claimed
+    order by symbol_id, ts_utc, ingest_seq desc
+),
+ins as (
+    insert into fact_price_intraday_raw (
+        symbol_id, ts_utc, open, high, low, close, volume, ingest_seq
+    )
+    select symbol_id, ts_utc, open, high, low, close, volume, ingest_seq
+    from src
+    on conflict (symbol_id, ts_utc) do update set
+        open       = excluded.open,
+        high       = excluded.high,
+        low        = excluded.low,
+        close      = excluded.close,
+        volume     = excluded.volume,
+        ingest_seq = excluded.ingest_seq,
+        load_ts    = excluded.load_ts
+    where fact_price_intraday_raw.ingest_seq is null
+       or fact_price_intraday_raw.ingest_seq < excluded.ingest_seq
+    returning symbol_id, ts_utc
+)
+-- zawsze co najmniej jeden wiersz: licznik claimu + kubełki (NULL, gdy brak)
+select b.symbol_id, b.ts_5m, c.claimed
+from (select count(*) as claimed from claimed) c
+left join (
+    select distinct
+        symbol_id,
+        {BUCKET_5M.format(ts="ts_utc")} as ts_5m
+    from ins
+) b on true;
+"""
+
+
+Bucket = Tuple[int, object]
+
+
+def claim_and_load_intraday(cur, max_rows: int = CLAIM_MAX_ROWS) -> Tuple[int, List[Bucket]]:
+    """
+    Jeden claim: przenosi do max_rows wierszy stagingu do fact_price_intraday_raw.
+    Zwraca (liczba zabranych wierszy, kubełki 5-min (symbol_id, ts_5m) dotknięte upsertem).
+    Commit po stronie wołającego.
+    """
+    cur.execute(SQL_CLAIM_AND_LOAD, {"max_rows": max_rows})
+    rows = cur.fetchall()
+    claimed = rows[0][2]
+    touched = [(symbol_id, ts_5m) for symbol_id, ts_5m, _ in rows if symbol_id is not None]
+    return claimed, touched
+
+
+def load_intraday_claims(
+    conn,
+    max_rows: int = CLAIM_MAX_ROWS,
+    granularity: str = DEFAULT_GRANULARITY,
+) -> Tuple[int, List[Bucket]]:
+    """
+    Opróżnia staging kolejnymi claimami (każdy we własnej transakcji + NOTIFY).
+    Kończy, gdy claim jest niepełny – wiersze dopisane w międzyczasie
+    weźmie następny przebieg. Zwraca (wiersze stagingu, unikalne kubełki 5-min).
+    `granularity` – jak w maintain_intraday_partitions (brakujące partycje dla stagingu).
+    """
+    total = 0
+    touched = {}
+    while True:
+        with conn.cursor() as cur:
+            # partycje dla dni ze stagingu (zwykle już są – op maintain_intraday_partitions)
+            cur.execute(SQL_ENSURE_FOR_STAGING, {"granularity": granularity})
+            claimed, buckets = claim_and_load_intraday(cur, max_rows)
+            if buckets:
+                notify_intraday(cur, buckets)
+        conn.commit()
+
+        total += claimed
+        touched.update(dict.fromkeys(buckets))
+        if claimed < max_rows:
+            return total, list(touched)
+
+
+def notify_intraday(cur, buckets: List[Bucket]) -> None:
+    # dostarczone po COMMIT – słuchacz dociąga tylko nowe bary
+    payload = {
+        "buckets": len(buckets),
+        "max_ts": max(t[1] for t in buckets).isoformat(),
+    }
+    cur.execute("SELECT pg_notify(%s, %s);", (NOTIFY_CHANNEL, json.dumps(payload)))
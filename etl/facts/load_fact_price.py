@@ -1,5 +1,7 @@
 from sqlalchemy import text
 
+from etl.staging.batches import STG_PRICE, mark_batch_loaded
+
 SQL = """
 INSERT INTO fact_price (
     symbol_id, date_sk, date, open, high, low, close, adj_close, volume, load_ts
@@ -32,4 +34,6 @@ DO UPDATE SET
 
 def load_fact_price(engine, batch_id):
     with engine.begin() as conn:
+        # batch_id = parametr → pruning do jednej partycji stagingu
         conn.execute(text(SQL), {"batch_id": batch_id})
+        mark_batch_loaded(conn, STG_PRICE, batch_id)
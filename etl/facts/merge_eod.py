@@ -0,0 +1,152 @@
+# etl/facts/merge_eod.py
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from etl.staging.batches import STG_DIVIDEND, STG_PRICE
+
+
+# ---------- ETAP 1: jeden odczyt stagingu (tylko partycje tego batcha) ----------
+
+SQL_READ_PRICE = """
+CREATE TEMP TABLE _eod_price ON COMMIT DROP AS
+SELECT symbol, date_value, open, high, low, close, adj_close, volume
+FROM stg.stg_price
+WHERE batch_id = :price_batch_id;
+"""
+
+SQL_READ_DIVIDEND = """
+CREATE TEMP TABLE _eod_dividend ON COMMIT DROP AS
+SELECT symbol, ex_date, dividend
+FROM stg.stg_dividend
+WHERE batch_id = :dividend_batch_id;
+"""
+
+# ---------- ETAP 2: wymiar symbolu ----------
+# dim_date jest generowany z góry (etl/dims/load_dim_date.py) – bez anti-joinu per load.
+
+SQL_UPSERT_DIMS = """
+with new_symbols as (
+    insert into dim_symbol (symbol)
+    select distinct p.symbol
+    from _eod_price p
+    where not exists (select 1 from dim_symbol d where d.symbol = p.symbol)
+    returning 1
+)
+select (select count(*) from new_symbols) as symbols;
+"""
+
+# ---------- ETAP 3: fakty + znacznik batcha jednym poleceniem ----------
+
+SQL_UPSERT_FACTS = """
+with price as (
+    insert into fact_price (
+        symbol_id, date_sk, date, open, high, low, close, adj_close, volume, load_ts
+    )
+    select
+        ds.symbol_id,
+        dd.date_sk,
+        p.date_value,
+        p.open,
+        p.high,
+        p.low,
+        p.close,
+        p.adj_close,
+        p.volume,
+        now()
+    from _eod_price p
+    join dim_symbol ds on ds.symbol = p.symbol
+    join dim_date dd on dd.date_value = p.date_value
+    on conflict (symbol_id, date_sk) do update set
+        open      = excluded.open,
+        high      = excluded.high,
+        low       = excluded.low,
+        close     = excluded.close,
+        adj_close = excluded.adj_close,
+        volume    = excluded.volume,
+        load_ts   = excluded.load_ts
+    returning 1
+),
+dividend as (
+    insert into fact_dividend (symbol_id, date_sk, ex_date, dividend, load_ts)
+    select
+        ds.symbol_id,
+        dd.date_sk,
+        v.ex_date,
+        v.dividend,
+        now()
+    from _eod_dividend v
+    join dim_symbol ds on ds.symbol = v.symbol
+    join dim_date dd on dd.date_value = v.ex_date
+    on conflict (symbol_id, date_sk) do update set
+        dividend = excluded.dividend,
+        load_ts  = excluded.load_ts
+    returning 1
+),
+marked as (
+    update stg.stg_batch
+    set facts_loaded_at = now()
+    where (batch_id = cast(:price_batch_id as uuid) and table_name = :stg_price)
+       or (batch_id = cast(:dividend_batch_id as uuid) and table_name = :stg_dividend)
+    returning 1
+)
+select
+    (select count(*) from price)    as fact_price,
+    (select count(*) from dividend) as fact_dividend,
+    (select count(*) from marked)   as batches;
+"""
+
+
+@dataclass(frozen=True)
+class StageStats:
+    stage: str
+    rows: Dict[str, int]
+    seconds: float
+
+
+def merge_eod_batch(
+    engine,
+    price_batch_id: str,
+    dividend_batch_id: Optional[str] = None,
+) -> List[StageStats]:
+    """
+    Wymiary + fakty dla batcha w JEDNEJ transakcji: błąd na dowolnym etapie
+    to rollback całości, a nie pół-załadowana hurtownia.
+
+    Staging czytany raz (do tabel tymczasowych), wymiary i fakty – po jednym
+    poleceniu z łańcuchem CTE. Zwraca liczniki wierszy i czasy per etap.
+    """
+    params = {
+        "price_batch_id": price_batch_id,
+        "dividend_batch_id": dividend_batch_id,
+        "stg_price": STG_PRICE,
+        "stg_dividend": STG_DIVIDEND,
+    }
+    stats = []
+
+    with engine.begin() as conn:
+        t0 = time.perf_counter()
+        price_rows = conn.execute(text(SQL_READ_PRICE), params).rowcount
+        dividend_rows = conn.execute(text(SQL_READ_DIVIDEND), params).rowcount
+        # tabele tymczasowe nie mają statystyk – bez ANALYZE planer zgaduje rozmiar
+        conn.execute(text("ANALYZE _eod_price; ANALYZE _eod_dividend;"))
+        stats.append(StageStats(
+            "read_staging",
+            {"stg_price": price_rows, "stg_dividend": dividend_rows},
+            time.perf_counter() - t0,
+        ))
+
+        t0 = time.perf_counter()
+        row = conn.execute(text(SQL_UPSERT_DIMS)).mappings().one()
+        stats.append(StageStats("upsert_dims", dict(row), time.perf_counter() - t0))
+
+        t0 = time.perf_counter()
+        row = conn.execute(text(SQL_UPSERT_FACTS), params).mappings().one()
+        stats.append(StageStats("upsert_facts", dict(row), time.perf_counter() - t0))
+
+    return stats
@@ -1,69 +1,231 @@
 # etl/jobs/daily_price_job.py
 
-from dagster import op, job
+import datetime as dt
+
+import pandas as pd
+from dagster import Field, in_process_executor, op, job
 
 from etl.staging.extract_prices import extract_prices
 from etl.staging.load_stg_price import load_stg_price
 from etl.dims.load_dim_symbol import load_dim_symbol
-from etl.dims.load_dim_date import load_dim_date
+from etl.dims.load_dim_date import ensure_dim_date
 from etl.facts.load_fact_price import load_fact_price
 from etl.staging.extract_dividends import extract_dividends
 from etl.staging.load_stg_dividend import load_stg_dividend
 from etl.facts.load_fact_dividend import load_fact_dividend
-from etl.utils.db import engine
-
-from etl.jobs.intraday_job import refresh_mv_intraday_ohlcv_5m
+from etl.facts.merge_eod import merge_eod_batch
+from etl.marts.load_returns_daily import load_returns_daily, rebuild_returns_daily
+from etl.marts.load_indicators import rebuild_indicators, update_indicators_for_eod_batch
+from etl.staging.extract_cache import default_cache
+from etl.staging.watermarks import get_price_watermarks, plan_incremental_extract
+from etl.staging.batches import retire_stg_batches
+
+from etl.jobs.intraday_job import reconcile_intraday_ohlcv_5m_session
 from etl.resources import db_resource
-
-
-
-# ---------- KROK 1: pełny EOD ETL ----------
-
-@op
+from etl.utils.op_metrics import op_metrics
+
+
+
+# ---------- KROK 1: EOD ETL (przyrostowy albo pełny) ----------
+
+TICKERS = ["AAPL", "MSFT", "TSLA", "GOOGL"]
+HISTORY_START = "2024-01-01"
+
+
+@op(
+    required_resource_keys={"db"},
+    config_schema={
+        "full_refresh": Field(
+            bool,
+            default_value=False,
+            description="Ignoruj watermarki i pobierz całą historię od history_start.",
+        ),
+        "lookback_days": Field(
+            int,
+            default_value=5,
+            description="Ile dni przed ostatnią załadowaną datą pobrać ponownie (korekty).",
+        ),
+        "history_start": Field(str, default_value=HISTORY_START),
+        "merge_mode": Field(
+            bool,
+            default_value=True,
+            description="Wymiary i fakty batcha w jednej transakcji (False = stare 4 osobne kroki).",
+        ),
+        "calendar_years_ahead": Field(
+            int,
+            default_value=5,
+            description="Horyzont kalendarza dim_date (lata w przód od bieżącego).",
+        ),
+        "dividend_workers": Field(int, default_value=8),
+        "dividend_rate_per_sec": Field(
+            float,
+            default_value=5.0,
+            description="Wspólny limit zapytań yfinance dla równoległej ekstrakcji dywidend.",
+        ),
+    },
+)
 def run_eod_etl(context):
-    tickers = ["AAPL", "MSFT", "TSLA", "GOOGL"]
-    start = "2024-01-01"
-    end = "2025-12-31"
-
-    context.log.info(f"Extracting prices for {tickers} ...")
-    df_prices = extract_prices(tickers, start, end)
-
-    context.log.info("Loading price staging ...")
-    price_batch_id = load_stg_price(df_prices, engine)
-
-    context.log.info("Extracting dividends ...")
-    df_divs = extract_dividends(tickers, start, end)
-
-    context.log.info("Loading dividend staging ...")
-    div_batch_id = load_stg_dividend(df_divs, engine)
-
-    context.log.info("Loading dimensions ...")
-    load_dim_symbol(engine)
-    load_dim_date(engine)
-
-    context.log.info("Loading fact_price ...")
-    load_fact_price(engine, price_batch_id)
-
-    context.log.info("Loading fact_dividend ...")
-    load_fact_dividend(engine, div_batch_id)
+    with op_metrics(context) as m:
+        cfg = context.op_config
+        engine = context.resources.db.engine
+        tickers = TICKERS
+        history_start = pd.to_datetime(cfg["history_start"]).date()
+        # yfinance traktuje `end` jako wyłączny → jutro, żeby złapać dzisiejszą świecę
+        end = dt.date.today() + dt.timedelta(days=1)
+        cache = default_cache()  # None, jeśli STOCK_DW_CACHE_DIR nie jest ustawione
+
+        if cfg["full_refresh"]:
+            plan = {history_start: list(tickers)}
+        else:
+            watermarks = get_price_watermarks(engine, tickers)
+            plan = plan_incremental_extract(
+                tickers, watermarks, history_start, lookback_days=cfg["lookback_days"]
+            )
 
-    context.log.info("EOD ETL completed.")
-    return 1  # dummy output tylko po to, żeby mieć zależność
+        frames = []
+        for start, group in plan.items():
+            context.log.info(f"Extracting prices for {group} from {start} ...")
+            frames.append(extract_prices(group, start, end, cache=cache))
+        df_prices = pd.concat(frames, ignore_index=True)
+        m.rows("extracted_prices", len(df_prices))
+        # dywidendy: od najwcześniejszego startu w planie
+        start = min(plan)
+
+        context.log.info("Loading price staging ...")
+        price_batch_id = load_stg_price(df_prices, engine)
+
+        context.log.info("Extracting dividends ...")
+        df_divs = extract_dividends(
+            tickers,
+            start,
+            end,
+            max_workers=cfg["dividend_workers"],
+            rate_per_sec=cfg["dividend_rate_per_sec"],
+            cache=cache,
+        )
+        m.rows("extracted_dividends", len(df_divs))
+        if cache is not None:
+            context.log.info(f"Extract cache: {cache.stats.as_dict()}")
+            for key, value in cache.stats.as_dict().items():
+                m.set(f"cache_{key}", value)
+
+        context.log.info("Loading dividend staging ...")
+        div_batch_id = load_stg_dividend(df_divs, engine)
+
+        # kalendarz z góry – regenerowany tylko, gdy horyzont nie sięga `end`
+        days = ensure_dim_date(engine, end, years_ahead=cfg["calendar_years_ahead"])
+        if days:
+            context.log.info(f"dim_date regenerated ({days} days).")
+
+        if cfg["merge_mode"]:
+            context.log.info("Merging dimensions and facts (single transaction) ...")
+            for st in merge_eod_batch(engine, price_batch_id, div_batch_id):
+                context.log.info(f"  {st.stage}: {st.rows} in {st.seconds:.3f}s")
+                m.set(f"{st.stage}_seconds", round(st.seconds, 3))
+                for name, rows in st.rows.items():
+                    m.set(f"{st.stage}_{name}_rows", rows)
+        else:
+            context.log.info("Loading dimensions ...")
+            load_dim_symbol(engine)
+
+            context.log.info("Loading fact_price ...")
+            load_fact_price(engine, price_batch_id)
+
+            context.log.info("Loading fact_dividend ...")
+            load_fact_dividend(engine, div_batch_id)
+
+        context.log.info("EOD ETL completed.")
+        return price_batch_id  # mart zwrotów przelicza tylko symbole z tego batcha
 
 
 # ---------- KROK 2: REFRESH MARTÓW ----------
 
-@op(required_resource_keys={"db"})
-def refresh_mv_returns_daily(context, _deps):
-    with context.resources.db.get_connection() as conn:
-        with conn.cursor() as cur:
-            context.log.info("Refreshing mart.mv_returns_daily ...")
-            cur.execute(
-                "REFRESH MATERIALIZED VIEW CONCURRENTLY mart.mv_returns_daily;"
-            )
-        conn.commit()
-    context.log.info("Done mart.mv_returns_daily")
-    return 1
+@op(
+    required_resource_keys={"db"},
+    config_schema={
+        "full_rebuild": Field(
+            bool,
+            default_value=False,
+            description="Przelicz mart.returns_daily od zera zamiast tylko ogona batcha.",
+        ),
+    },
+)
+def refresh_returns_daily(context, price_batch_id):
+    with op_metrics(context) as m:
+        engine = context.resources.db.engine
+        if context.op_config["full_rebuild"]:
+            context.log.info("Rebuilding mart.returns_daily (full history) ...")
+            rows = rebuild_returns_daily(engine)
+        else:
+            context.log.info(f"Updating mart.returns_daily for batch {price_batch_id} ...")
+            rows = load_returns_daily(engine, price_batch_id)
+        m.rows("mart_returns_daily", rows)
+        context.log.info(f"Done mart.returns_daily ({rows} rows)")
+        return 1
+
+
+@op(
+    required_resource_keys={"db"},
+    config_schema={
+        "full_rebuild": Field(
+            bool,
+            default_value=False,
+            description="Przelicz wskaźniki '1d' od zera zamiast tylko nowych barów.",
+        ),
+    },
+)
+def refresh_indicators_daily(context, price_batch_id, _deps):
+    """
+    mart.indicators ('1d') ze stanu w mart.indicator_state – tylko bary
+    symboli z batcha (od najwcześniejszej daty lookbacku), nie cała historia.
+    """
+    with op_metrics(context) as m:
+        with context.resources.db.get_connection(context.op.name) as conn:
+            with conn.cursor() as cur:
+                if context.op_config["full_rebuild"]:
+                    context.log.info("Rebuilding mart.indicators '1d' (full history) ...")
+                    rows = rebuild_indicators(cur, "1d")
+                else:
+                    context.log.info(f"Updating mart.indicators '1d' for batch {price_batch_id} ...")
+                    rows = update_indicators_for_eod_batch(cur, price_batch_id)
+            conn.commit()
+        m.rows("mart_indicators", rows)
+        context.log.info(f"Done mart.indicators '1d' ({rows} rows)")
+        return 1
+
+
+# ---------- KROK 3: SPRZĄTANIE STAGINGU ----------
+
+@op(
+    required_resource_keys={"db"},
+    config_schema={
+        "keep_batches": Field(
+            int,
+            default_value=3,
+            description="Ile ostatnich batchy stagingu (per tabela) zostawić do debugowania.",
+        ),
+        "stale_hours": Field(
+            int,
+            default_value=24,
+            description="Po ilu godzinach usuwać batche, których fakty nigdy się nie załadowały.",
+        ),
+    },
+)
+def cleanup_staging(context, _deps):
+    """
+    Po martach (mart.returns_daily i mart.indicators czytają jeszcze batch ze stagingu)
+    usuwa partycje stg.stg_price / stg.stg_dividend poza retencją.
+    """
+    with op_metrics(context) as m:
+        cfg = context.op_config
+        dropped = retire_stg_batches(
+            context.resources.db.engine,
+            keep_batches=cfg["keep_batches"],
+            stale_hours=cfg["stale_hours"],
+        )
+        m.set("partitions_dropped", len(dropped))
+        context.log.info(f"Dropped {len(dropped)} staging partitions: {dropped}")
+        return dropped
 
 
 # @op(required_resource_keys={"db"})
@@ -80,8 +242,10 @@ def refresh_mv_returns_daily(context, _deps):
 
 # ---------- JOB: dzienny batch ----------
 
-@job(resource_defs={"db": db_resource})
+@job(resource_defs={"db": db_resource}, executor_def=in_process_executor)
 def daily_price_job():
     etl_step = run_eod_etl()
-    r1 = refresh_mv_returns_daily(etl_step)
-    refresh_mv_intraday_ohlcv_5m(r1)
+    r1 = refresh_returns_daily(etl_step)
+    r2 = refresh_indicators_daily(etl_step, r1)
+    reconcile_intraday_ohlcv_5m_session(r1)
+    cleanup_staging(r2)
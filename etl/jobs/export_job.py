@@ -0,0 +1,53 @@
+# etl/jobs/export_job.py
+
+from dagster import Field, in_process_executor, op, job
+from etl.resources import db_resource
+from etl.utils.op_metrics import op_metrics
+from etl.lake.export_parquet import EXPORTS, compact_table, export_table
+
+
+# ---------- EKSPORT FAKTÓW DO PARQUET ----------
+
+@op(
+    required_resource_keys={"db"},
+    config_schema={
+        "root": Field(
+            str,
+            is_required=False,
+            description="Katalog eksportu (domyślnie STOCK_DW_LAKE_DIR).",
+        ),
+        "tables": Field([str], default_value=list(EXPORTS)),
+        "compact_min_files": Field(
+            int,
+            default_value=24,
+            description="Partycje z co najmniej tyloma plikami są scalane w jeden.",
+        ),
+    },
+)
+def export_facts_to_parquet(context):
+    """
+    Przyrostowy eksport faktów (od watermarku load_ts) do układu Hive
+    symbol=/year= (EOD) i symbol=/date= (intraday). Analityka na plikach:
+    python -m etl.lake.analytics.
+    """
+    with op_metrics(context) as m:
+        cfg = context.op_config
+        root = cfg.get("root")
+
+        for table in cfg["tables"]:
+            result = export_table(context.resources.db.engine, root, table)
+            compacted = compact_table(root, table, min_files=cfg["compact_min_files"])
+            m.rows(table, result.rows)
+            m.bytes(result.bytes)
+            m.set(f"compacted_{table}", compacted)
+
+            context.log.info(
+                f"{table}: {result.rows} rows, {result.files} files, "
+                f"load_ts [{result.watermark_from}, {result.watermark_to}), "
+                f"compacted {compacted} partitions"
+            )
+
+
+@job(resource_defs={"db": db_resource}, executor_def=in_process_executor)
+def export_parquet_job():
+    export_facts_to_parquet()
@@ -1,96 +1,178 @@
 # etl/jobs/intraday_job.py
 
-from dagster import op, job
+import datetime as dt
+
+from dagster import Field, in_process_executor, op, job
 from etl.resources import db_resource
+from etl.utils.op_metrics import op_metrics
+from etl.facts.intraday_partitions import (
+    DEFAULT_GRANULARITY,
+    check_intraday_indexes,
+    ensure_intraday_partitions,
+    retire_intraday_partitions,
+)
+from etl.facts.load_fact_intraday import CLAIM_MAX_ROWS, load_intraday_claims
+from etl.marts.load_indicators import update_indicators_for_buckets
+from etl.marts.load_intraday_ohlcv_5m import (
+    session_buckets_5m,
+    upsert_intraday_ohlcv_5m,
+)
 
 
 # ---------- KROK 1: STAGING -> FACT INTRADAY ----------
 
-@op(required_resource_keys={"db"})
+@op(
+    required_resource_keys={"db"},
+    config_schema={
+        "claim_max_rows": Field(
+            int,
+            default_value=CLAIM_MAX_ROWS,
+            description="Maks. wierszy stagingu na jeden claim (jedna krótka transakcja).",
+        ),
+        "partition_granularity": Field(
+            str,
+            default_value=DEFAULT_GRANULARITY,
+            description="Granulacja brakujących partycji – ta sama co w maintain_intraday_partitions.",
+        ),
+    },
+)
 def load_intraday_from_staging(context):
     """
-    Micro-batch: stg_price_intraday -> fact_price_intraday_raw
-    Deduplikuje dane po (symbol_id, ts_utc), żeby ON CONFLICT nie wybuchał.
+    Micro-batch: stg_price_intraday -> fact_price_intraday_raw.
+    Wiersze są "claimowane" (DELETE ... RETURNING, SKIP LOCKED), więc
+    równoległe loadery i konsument piszący w trakcie nic nie gubią.
+    Zwraca listę kubełków 5-min (symbol_id, ts_5m) dotkniętych przez batch.
     """
-    sql = """
-        with symbol_map as (
-            select symbol_id, symbol
-            from dim_symbol
-        ),
-        -- zagregowany staging: JEDEN wiersz na (symbol_id, ts_utc)
-        src as (
-            select
-                sm.symbol_id,
-                s.ts_utc,
-                -- tu możesz dobrać logikę agregacji, ale na razie bierzemy ostatnią cenę i max/min
-                max(s.open)  as open,
-                max(s.high)  as high,
-                min(s.low)   as low,
-                max(s.close) as close,
-                sum(s.volume) as volume
-            from stg_price_intraday s
-            join symbol_map sm
-              on sm.symbol = s.symbol
-            group by sm.symbol_id, s.ts_utc
-        ),
-        ins as (
-            insert into fact_price_intraday_raw (
-                symbol_id,
-                ts_utc,
-                open,
-                high,
-                low,
-                close,
-                volume
+    with op_metrics(context) as m:
+        with context.resources.db.get_connection(context.op.name) as conn:
+            context.log.info("Loading intraday from staging into fact ...")
+            rows, touched = load_intraday_claims(
+                conn,
+                context.op_config["claim_max_rows"],
+                granularity=context.op_config["partition_granularity"],
             )
-            select
-                symbol_id,
-                ts_utc,
-                open,
-                high,
-                low,
-                close,
-                volume
-            from src
-            on conflict (symbol_id, ts_utc) do update set
-                open   = excluded.open,
-                high   = excluded.high,
-                low    = excluded.low,
-                close  = excluded.close,
-                volume = excluded.volume
-            returning 1
+        m.rows("staging", rows)
+        m.rows("buckets_5m", len(touched))
+
+        context.log.info(
+            f"Intraday micro-batch finished ({rows} staging rows, {len(touched)} 5m buckets touched)."
         )
-        delete from stg_price_intraday;
-    """
+        return touched
 
-    with context.resources.db.get_connection() as conn:
-        with conn.cursor() as cur:
-            context.log.info("Loading intraday from staging into fact ...")
-            cur.execute(sql)
-        conn.commit()
 
-    context.log.info("Intraday micro-batch finished.")
-    return 1
+# ---------- KROK 2: MART INTRADAY 5m (przyrostowo) ----------
 
+@op(required_resource_keys={"db"})
+def update_intraday_ohlcv_5m(context, touched):
+    """
+    Upsert tylko tych kubełków 5-min, które dotknął bieżący mikro-batch.
+    """
+    with op_metrics(context) as m:
+        with context.resources.db.get_connection(context.op.name) as conn:
+            with conn.cursor() as cur:
+                rows = upsert_intraday_ohlcv_5m(cur, touched)
+            conn.commit()
+        m.rows("mart_intraday_ohlcv_5m", rows)
+        context.log.info(f"Done mart.intraday_ohlcv_5m ({rows} buckets)")
+        return 1
 
 
-# ---------- KROK 2: REFRESH MART INTRADAY ----------
+@op(required_resource_keys={"db"})
+def update_indicators_5m(context, touched, _deps):
+    """
+    mart.indicators ('5m') po rollupie: stan per symbol przesuwany o nowe
+    kubełki (bieżący, jeszcze otwarty kubełek jest liczony ponownie).
+    """
+    with op_metrics(context) as m:
+        with context.resources.db.get_connection(context.op.name) as conn:
+            with conn.cursor() as cur:
+                rows = update_indicators_for_buckets(cur, touched)
+            conn.commit()
+        m.rows("mart_indicators", rows)
+        context.log.info(f"Done mart.indicators '5m' ({rows} rows)")
+
 
 @op(required_resource_keys={"db"})
-def refresh_mv_intraday_ohlcv_5m(context, _deps):
-    with context.resources.db.get_connection() as conn:
-        with conn.cursor() as cur:
-            context.log.info("Refreshing mart.mv_intraday_ohlcv_5m ...")
-            cur.execute(
-                "REFRESH MATERIALIZED VIEW CONCURRENTLY mart.mv_intraday_ohlcv_5m;"
+def reconcile_intraday_ohlcv_5m_session(context, _deps):
+    """
+    Siatka bezpieczeństwa po EOD: przelicza kubełki z ostatniej doby
+    (m.in. wiersze wpisane przez stream_intraday.py poza Dagsterem)
+    i cofa stan wskaźników '5m' do najwcześniejszego przeliczonego kubełka.
+    """
+    with op_metrics(context) as m:
+        since = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=1)
+        with context.resources.db.get_connection(context.op.name) as conn:
+            with conn.cursor() as cur:
+                context.log.info(f"Reconciling mart.intraday_ohlcv_5m since {since} ...")
+                buckets = session_buckets_5m(cur, since)
+                rows = upsert_intraday_ohlcv_5m(cur, buckets)
+                indicator_rows = update_indicators_for_buckets(cur, buckets)
+            conn.commit()
+        m.rows("mart_intraday_ohlcv_5m", rows)
+        m.rows("mart_indicators", indicator_rows)
+        context.log.info(
+            f"Done mart.intraday_ohlcv_5m ({rows} buckets), mart.indicators '5m' ({indicator_rows} rows)"
+        )
+
+
+# ---------- PARTYCJE fact_price_intraday_raw ----------
+
+@op(
+    required_resource_keys={"db"},
+    config_schema={
+        "days_ahead": Field(int, default_value=3),
+        "granularity": Field(
+            str,
+            default_value=DEFAULT_GRANULARITY,
+            description="day | week | month (domyślnie $INTRADAY_PARTITION_GRANULARITY)",
+        ),
+        "retention_days": Field(int, default_value=30),
+        "drop_retired": Field(
+            bool,
+            default_value=False,
+            description="True = DROP starych partycji, False = tylko DETACH (archiwum).",
+        ),
+    },
+)
+def maintain_intraday_partitions(context):
+    with op_metrics(context) as m:
+        cfg = context.op_config
+        today = dt.datetime.now(dt.timezone.utc).date()
+
+        with context.resources.db.get_connection(context.op.name) as conn:
+            with conn.cursor() as cur:
+                created = ensure_intraday_partitions(
+                    cur, today, days_ahead=cfg["days_ahead"], granularity=cfg["granularity"]
+                )
+                retired = retire_intraday_partitions(
+                    cur, cfg["retention_days"], drop=cfg["drop_retired"], today=today
+                )
+                bad_indexes = check_intraday_indexes(cur)
+            conn.commit()
+        m.set("partitions_ready", len(created))
+        m.set("partitions_retired", len(retired))
+        m.set("indexes_missing", len(bad_indexes))
+
+        context.log.info(f"Intraday partitions ready: {created}")
+        if retired:
+            action = "Dropped" if cfg["drop_retired"] else "Detached"
+            context.log.info(f"{action} partitions: {retired}")
+        if bad_indexes:
+            context.log.warning(
+                f"Missing/invalid intraday indexes {bad_indexes} – "
+                f"run etl/sql/migrations/006_intraday_recent_window_indexes.sql"
             )
-        conn.commit()
-    context.log.info("Done mart.mv_intraday_ohlcv_5m")
 
 
 # ---------- JOB: intraday micro-batch ----------
 
-@job(resource_defs={"db": db_resource})
+@job(resource_defs={"db": db_resource}, executor_def=in_process_executor)
 def intraday_job():
-    step = load_intraday_from_staging()
-    refresh_mv_intraday_ohlcv_5m(step)
+    touched = load_intraday_from_staging()
+    r = update_intraday_ohlcv_5m(touched)
+    update_indicators_5m(touched, r)
+
+
+@job(resource_defs={"db": db_resource}, executor_def=in_process_executor)
+def intraday_partition_job():
+    maintain_intraday_partitions()
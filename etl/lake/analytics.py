@@ -0,0 +1,200 @@
+# etl/lake/analytics.py
+#
+# Tryb analityczny: logika martów (stopy zwrotu/SMA, świece 5-min) liczona
+# wbudowanym DuckDB na plikach z etl/lake/export_parquet.py – bez Postgresa.
+#
+#   python -m etl.lake.analytics returns --symbol AAPL --symbol MSFT --from 2020-01-01
+#   python -m etl.lake.analytics ohlcv5m --symbol AAPL --from 2025-01-02 --output aapl.parquet
+#   python -m etl.lake.analytics sql "select symbol, count(*) from fact_price group by 1"
+#
+# Widoki fact_price / fact_price_intraday_raw mają kolumny jak w hurtowni
+# (+ kolumny partycji z układu Hive) i zawierają tylko najnowszą wersję klucza.
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+from pathlib import Path
+from typing import Optional, Sequence
+
+import duckdb
+import pandas as pd
+
+from etl.lake.export_parquet import lake_root
+from etl.marts.load_returns_daily import _WINDOWS
+
+# Odpowiednik BUCKET_5M (etl/marts/load_intraday_ohlcv_5m.py) przy sesji w UTC.
+BUCKET_5M = "time_bucket(INTERVAL 5 MINUTE, {ts})"
+
+VIEWS = {
+    "fact_price": """
+        CREATE OR REPLACE VIEW fact_price AS
+        SELECT *
+        FROM read_parquet($glob, hive_partitioning = true,
+                          hive_types = {'symbol': VARCHAR, 'year': INTEGER})
+        QUALIFY row_number() OVER (PARTITION BY symbol, date_sk ORDER BY load_ts DESC) = 1
+    """,
+    "fact_price_intraday_raw": """
+        CREATE OR REPLACE VIEW fact_price_intraday_raw AS
+        SELECT *
+        FROM read_parquet($glob, hive_partitioning = true,
+                          hive_types = {'symbol': VARCHAR, 'date': DATE})
+        QUALIFY row_number() OVER (PARTITION BY symbol, ts_utc ORDER BY load_ts DESC) = 1
+    """,
+}
+
+# Ta sama logika okien co mart.returns_daily (_WINDOWS), price_base z Parquet.
+SQL_RETURNS_DAILY = """
+with price_base as (
+    select
+        symbol_id,
+        symbol,
+        date_sk,
+        date as trade_date,
+        close,
+        adj_close,
+        lag(close) over (partition by symbol_id order by date) as prev_close,
+        0 as from_sk
+    from fact_price
+    where {symbol_filter}
+),
+""" + _WINDOWS + """
+select
+    symbol_id, symbol, date_sk, trade_date, close, adj_close,
+    daily_return, log_return, sma_20, sma_50, vol_20d_annualized
+from computed
+where ($date_from is null or trade_date >= $date_from)
+  and ($date_to is null or trade_date <= $date_to)
+order by symbol, trade_date
+"""
+
+# Kolumny jak mart.intraday_ohlcv_5m; open/close = pierwszy/ostatni bar kubełka.
+SQL_OHLCV_5M = f"""
+select
+    symbol_id,
+    symbol,
+    cast(strftime(ts_5m, '%Y%m%d') as integer) as date_sk,
+    cast(ts_5m as date)                        as trade_date,
+    ts_5m,
+    arg_min(open, ts_utc)  as open_5m,
+    max(high)              as high_5m,
+    min(low)               as low_5m,
+    arg_max(close, ts_utc) as close_5m,
+    sum(volume)            as volume_5m,
+    min(ts_utc)            as first_ts,
+    max(ts_utc)            as last_ts
+from (
+    select *, {BUCKET_5M.format(ts="ts_utc")} as ts_5m
+    from fact_price_intraday_raw
+    where {{symbol_filter}}
+      and ($date_from is null or date >= $date_from)
+      and ($date_to is null or date <= $date_to)
+) bars
+group by symbol_id, symbol, ts_5m
+order by symbol, ts_5m
+"""
+
+
+def connect(root=None, threads: Optional[int] = None) -> duckdb.DuckDBPyConnection:
+    """
+    DuckDB w pamięci z widokami na wyeksportowane tabele (tylko te, które istnieją).
+    """
+    root = lake_root(root)
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+
+    for table, ddl in VIEWS.items():
+        table_dir = root / table
+        if any(table_dir.rglob("*.parquet")):
+            # parametry nie działają w DDL widoku – glob wklejany jako literał
+            glob = str(table_dir / "**" / "*.parquet").replace("'", "''")
+            con.execute(ddl.replace("$glob", f"'{glob}'"))
+    return con
+
+
+def _symbol_filter(symbols: Optional[Sequence[str]]) -> str:
+    # filtr po kolumnie partycji → DuckDB pomija katalogi innych symboli
+    return "list_contains($symbols, symbol)" if symbols else "true"
+
+
+def _params(symbols, date_from, date_to) -> dict:
+    params = {"date_from": date_from, "date_to": date_to}
+    if symbols:
+        params["symbols"] = list(symbols)
+    return params
+
+
+def returns_daily(
+    con,
+    symbols: Optional[Sequence[str]] = None,
+    date_from: Optional[dt.date] = None,
+    date_to: Optional[dt.date] = None,
+) -> pd.DataFrame:
+    """
+    mart.returns_daily z plików. Okna liczone na pełnej historii symbolu,
+    zakres dat filtruje dopiero wynik (SMA50 na początku zakresu jest poprawne).
+    """
+    sql = SQL_RETURNS_DAILY.format(symbol_filter=_symbol_filter(symbols))
+    return con.execute(sql, _params(symbols, date_from, date_to)).df()
+
+
+def intraday_ohlcv_5m(
+    con,
+    symbols: Optional[Sequence[str]] = None,
+    date_from: Optional[dt.date] = None,
+    date_to: Optional[dt.date] = None,
+) -> pd.DataFrame:
+    """
+    mart.intraday_ohlcv_5m z plików (daty sesji w UTC).
+    """
+    sql = SQL_OHLCV_5M.format(symbol_filter=_symbol_filter(symbols))
+    return con.execute(sql, _params(symbols, date_from, date_to)).df()
+
+
+def _write(df: pd.DataFrame, output: Optional[str]) -> None:
+    if not output:
+        with pd.option_context("display.max_rows", 50, "display.width", 200):
+            print(df)
+        return
+    path = Path(output)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    print(f"{len(df)} rows → {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analityka martów na plikach Parquet (DuckDB)")
+    parser.add_argument("--root", help="katalog eksportu (domyślnie $STOCK_DW_LAKE_DIR)")
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("returns", "ohlcv5m"):
+        p = sub.add_parser(name)
+        p.add_argument("--symbol", action="append", dest="symbols")
+        p.add_argument("--from", dest="date_from", type=dt.date.fromisoformat)
+        p.add_argument("--to", dest="date_to", type=dt.date.fromisoformat)
+        p.add_argument("--output", help=".parquet albo .csv (domyślnie stdout)")
+
+    p = sub.add_parser("sql")
+    p.add_argument("query")
+    p.add_argument("--output")
+
+    args = parser.parse_args()
+    con = connect(args.root, threads=args.threads)
+
+    if args.command == "returns":
+        df = returns_daily(con, args.symbols, args.date_from, args.date_to)
+    elif args.command == "ohlcv5m":
+        df = intraday_ohlcv_5m(con, args.symbols, args.date_from, args.date_to)
+    else:
+        df = con.execute(args.query).df()
+    _write(df, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+# etl/lake/export_parquet.py
+#
+# Przyrostowy eksport faktów do Parquet (układ Hive) – ciężkie zapytania
+# badawcze idą na pliki (etl/lake/analytics.py, DuckDB), nie na Postgresa z ingestem.
+#
+#   <root>/fact_price/symbol=AAPL/year=2024/part-<run>-<chunk>-<i>.parquet
+#   <root>/fact_price_intraday_raw/symbol=AAPL/date=2025-01-02/part-....parquet
+#   <root>/_watermarks.json
+#
+# Watermark = load_ts (ustawiany przy insercie i przy każdym upsercie), więc
+# poprawione wiersze też trafiają do eksportu – jako nowa wersja w kolejnym pliku.
+# Czytelnik bierze najnowszą wersję klucza (analytics.py), a compact_table()
+# scala pliki partycji w jeden, bez duplikatów.
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from etl.utils.db import DbConfig, get_db
+
+log = logging.getLogger(__name__)
+
+LAKE_DIR_ENV = "STOCK_DW_LAKE_DIR"
+WATERMARK_FILE = "_watermarks.json"
+
+# wiersze na porcję odczytu (server-side cursor) – pamięć ~ porcja, nie cała tabela
+CHUNK_ROWS = 500_000
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    table: str
+    sql: str
+    partition_cols: Tuple[str, ...]
+    key: Tuple[str, ...]  # klucz w obrębie partycji (kolumny partycji są w ścieżce)
+
+
+# Ceny jako double: numeric → Decimal dawałby różne skale w różnych plikach.
+EXPORTS: Dict[str, ExportSpec] = {
+    "fact_price": ExportSpec(
+        table="fact_price",
+        sql="""
+            SELECT
+                s.symbol,
+                extract(year FROM fp.date)::int AS year,
+                fp.symbol_id,
+                fp.date_sk,
+                fp.date,
+                fp.open::float8      AS open,
+                fp.high::float8      AS high,
+                fp.low::float8       AS low,
+                fp.close::float8     AS close,
+                fp.adj_close::float8 AS adj_close,
+                fp.volume::float8    AS volume,
+                fp.load_ts
+            FROM fact_price fp
+            JOIN dim_symbol s ON s.symbol_id = fp.symbol_id
+            WHERE fp.load_ts < :hi
+              AND (CAST(:lo AS timestamptz) IS NULL OR fp.load_ts >= :lo)
+        """,
+        partition_cols=("symbol", "year"),
+        key=("date_sk",),
+    ),
+    # dzienne partycje po dacie UTC, jak partycje tabeli w Postgresie
+    "fact_price_intraday_raw": ExportSpec(
+        table="fact_price_intraday_raw",
+        sql="""
+            SELECT
+                s.symbol,
+                to_char(f.ts_utc AT TIME ZONE 'UTC', 'YYYY-MM-DD') AS date,
+                f.symbol_id,
+                f.ts_utc,
+                f.open::float8  AS open,
+                f.high::float8  AS high,
+                f.low::float8   AS low,
+                f.close::float8 AS close,
+                f.volume,
+                f.ingest_seq,
+                f.load_ts
+            FROM fact_price_intraday_raw f
+            JOIN dim_symbol s ON s.symbol_id = f.symbol_id
+            WHERE f.load_ts < :hi
+              AND (CAST(:lo AS timestamptz) IS NULL OR f.load_ts >= :lo)
+        """,
+        partition_cols=("symbol", "date"),
+        key=("ts_utc",),
+    ),
+}
+
+# Górna granica eksportu: load_ts = now() transakcji piszącej, czyli jej start.
+# Wiersz z load_ts < startu najstarszej trwającej transakcji jest już zacommitowany,
+# więc nic nie "wskoczy" poniżej watermarku po eksporcie. Liczone PRZED odczytem
+# danych (osobne zapytanie), żeby snapshot odczytu widział wszystko poniżej granicy.
+# xact_start innych ról widać tylko z pg_read_all_stats (albo jako superuser) –
+# bez tego cudza otwarta transakcja jest niewidoczna, hi = now() i jej wiersze
+# lądują poniżej watermarku. Dlatego export_table sprawdza uprawnienie na starcie.
+SQL_SAFE_UPPER_BOUND = """
+SELECT least(now(), min(xact_start))
+FROM pg_stat_activity
+WHERE datname = current_database()
+  AND backend_type = 'client backend'
+  AND pid <> pg_backend_pid()
+  AND xact_start IS NOT NULL;
+"""
+
+
+# superuser jest członkiem każdej roli
+SQL_CAN_SEE_ALL_XACTS = "SELECT pg_has_role(current_user, 'pg_read_all_stats', 'member');"
+
+
+@dataclass
+class ExportResult:
+    table: str
+    rows: int
+    files: int
+    bytes: int
+    watermark_from: Optional[str]
+    watermark_to: str
+
+
+def lake_root(root: Optional[str | os.PathLike] = None) -> Path:
+    root = root or os.getenv(LAKE_DIR_ENV)
+    if not root:
+        raise ValueError(f"lake directory not configured (pass root or set {LAKE_DIR_ENV})")
+    return Path(root).expanduser()
+
+
+# ---------- watermark ----------
+
+def read_watermarks(root: Path) -> Dict[str, dict]:
+    path = root / WATERMARK_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _write_watermark(root: Path, table: str, state: dict) -> None:
+    marks = read_watermarks(root)
+    marks[table] = state
+    # zapis atomowy: tmp + replace (jak ExtractCache.put)
+    tmp = root / f"{WATERMARK_FILE}.{uuid.uuid4().hex}.tmp"
+    tmp.write_text(json.dumps(marks, indent=2, sort_keys=True) + "\n")
+    os.replace(tmp, root / WATERMARK_FILE)
+
+
+# ---------- eksport ----------
+
+def _written_files(table_dir: Path, run_id: str) -> List[Path]:
+    return list(table_dir.rglob(f"part-{run_id}-*.parquet"))
+
+
+def export_table(engine, root, table: str, chunk_rows: int = CHUNK_ROWS) -> ExportResult:
+    """
+    Eksportuje wiersze `table` z load_ts w [watermark, bezpieczna górna granica).
+    Watermark przesuwany dopiero po zapisaniu wszystkich plików: przerwany run
+    eksportuje ten zakres ponownie (duplikaty usuwa odczyt / compact_table).
+    """
+    spec = EXPORTS[table]
+    root = lake_root(root)
+    table_dir = root / spec.table
+    table_dir.mkdir(parents=True, exist_ok=True)
+
+    lo = read_watermarks(root).get(table, {}).get("load_ts")
+    with engine.connect() as conn:
+        if not conn.execute(text(SQL_CAN_SEE_ALL_XACTS)).scalar():
+            raise PermissionError(
+                "export role cannot see other sessions' xact_start "
+                "(GRANT pg_read_all_stats TO <role>) – watermark would skip in-flight rows"
+            )
+        hi = conn.execute(text(SQL_SAFE_UPPER_BOUND)).scalar()
+
+    with engine.connect() as conn:
+        run_id = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        rows = 0
+        stream = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows)
+        chunks = pd.read_sql(text(spec.sql), stream, params={"lo": lo, "hi": hi}, chunksize=chunk_rows)
+        for n, chunk in enumerate(chunks):
+            chunk.to_parquet(
+                table_dir,
+                index=False,
+                partition_cols=list(spec.partition_cols),
+                basename_template=f"part-{run_id}-{n}-{{i}}.parquet",
+            )
+            rows += len(chunk)
+
+    files = _written_files(table_dir, run_id)
+    result = ExportResult(
+        table=table,
+        rows=rows,
+        files=len(files),
+        bytes=sum(f.stat().st_size for f in files),
+        watermark_from=lo,
+        watermark_to=hi.isoformat(),
+    )
+    _write_watermark(root, table, {
+        "load_ts": result.watermark_to,
+        "rows": rows,
+        "exported_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+    })
+    log.info("Exported %s rows of %s (%s files, load_ts %s → %s)", rows, table, len(files), lo, hi)
+    return result
+
+
+# ---------- kompaktowanie ----------
+
+def compact_table(root, table: str, min_files: int = 24) -> int:
+    """
+    Scala partycje (liście katalogów) mające >= min_files plików w jeden plik:
+    najnowsza wersja klucza (load_ts), posortowana po kluczu. Nowy plik powstaje
+    przed usunięciem starych – czytelnik widzi co najwyżej duplikaty, nigdy dziurę.
+    Zwraca liczbę scalonych partycji.
+    """
+    spec = EXPORTS[table]
+    table_dir = lake_root(root) / spec.table
+    if not table_dir.exists():
+        return 0
+
+    by_dir: Dict[Path, List[Path]] = {}
+    for path in table_dir.rglob("*.parquet"):
+        by_dir.setdefault(path.parent, []).append(path)
+
+    compacted = 0
+    for part_dir, files in by_dir.items():
+        if len(files) < min_files:
+            continue
+
+        df = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+        df = (
+            df.sort_values("load_ts")
+            .drop_duplicates(list(spec.key), keep="last")
+            .sort_values(list(spec.key))
+        )
+
+        target = part_dir / f"part-compact-{uuid.uuid4().hex}.parquet"
+        tmp = target.with_suffix(".tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+        for f in files:
+            f.unlink(missing_ok=True)
+        compacted += 1
+
+    return compacted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Przyrostowy eksport faktów do Parquet")
+    parser.add_argument("--root", help=f"katalog docelowy (domyślnie ${LAKE_DIR_ENV})")
+    parser.add_argument("--tables", nargs="+", default=list(EXPORTS), choices=list(EXPORTS))
+    parser.add_argument("--compact-min-files", type=int, default=24)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    engine = get_db(DbConfig(application_name="stock_dw_lake_export")).engine
+    for table in args.tables:
+        export_table(engine, args.root, table)
+        n = compact_table(args.root, table, min_files=args.compact_min_files)
+        if n:
+            log.info("Compacted %s partitions of %s", n, table)
+
+
+if __name__ == "__main__":
+    main()
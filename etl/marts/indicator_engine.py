@@ -0,0 +1,162 @@
+# etl/marts/indicator_engine.py
+#
+# Wektorowy silnik wskaźników technicznych ze stanem przenoszonym między batchami.
+# Rekurencje (EMA, Wilder) są sekwencyjne w czasie, więc pętla idzie po krokach
+# czasu, a każdy krok liczy naraz wszystkie symbole (NumPy). Koszt aktualizacji
+# = O(nowe bary × stałe okno), niezależnie od długości historii.
+#
+# Rozgrzewka (klasycznie): EMA/ATR/średnie RSI zaczynają od średniej arytmetycznej
+# pierwszych N wartości, potem wygładzanie wykładnicze. Kolumny pochodne
+# (macd, macd_hist, rsi, bb_*) są NaN, dopóki nie ma pełnego okresu.
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+EMA_FAST = 12
+EMA_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+BB_PERIOD = 20
+BB_K = 2.0
+
+# kolumny stanu (wszystkie float poza n_bars); okno zamknięć osobno
+STATE_FIELDS = ("prev_close", "ema_12", "ema_26", "macd_signal", "avg_gain", "avg_loss", "atr_14")
+
+OUTPUT_FIELDS = (
+    "ema_12", "ema_26", "macd", "macd_signal", "macd_hist", "rsi_14",
+    "bb_mid", "bb_upper", "bb_lower", "atr_14", "avg_gain", "avg_loss",
+)
+
+
+@dataclass
+class IndicatorState:
+    """
+    Stan dla n symboli (wiersze tablic w tej samej kolejności).
+    `closes` – ostatnie BB_PERIOD-1 zamknięć, najstarsze pierwsze, NaN = brak.
+    """
+    n_bars: np.ndarray
+    values: Dict[str, np.ndarray]
+    closes: np.ndarray
+
+    @classmethod
+    def empty(cls, n: int) -> "IndicatorState":
+        return cls(
+            n_bars=np.zeros(n, dtype=np.int64),
+            values={f: np.full(n, np.nan) for f in STATE_FIELDS},
+            closes=np.full((n, BB_PERIOD - 1), np.nan),
+        )
+
+
+def _smooth(current, x, k, alpha):
+    """
+    Krok średniej: k <= okres → średnia arytmetyczna (1/k), dalej stała alpha.
+    NaN w `current` = pierwsza wartość.
+    """
+    step = np.where(k <= 0, 0.0, alpha)
+    out = current + step * (x - current)
+    return np.where(np.isnan(current), x, out)
+
+
+def _ema(current, x, k, period):
+    # k = numer wartości w serii (1, 2, ...); seed = SMA pierwszych `period`
+    alpha = np.where(k <= period, 1.0 / np.maximum(k, 1), 2.0 / (period + 1))
+    return _smooth(current, x, k, alpha)
+
+
+def _wilder(current, x, k, period):
+    alpha = 1.0 / np.clip(k, 1, period)
+    return _smooth(current, x, k, alpha)
+
+
+def advance(state: IndicatorState, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+            mask: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Przesuwa stan o nowe bary. Tablice (n_symboli, T): bar t symbolu i jest
+    ważny, gdy mask[i, t]; ważne bary symbolu muszą być na początku wiersza.
+    Modyfikuje `state` w miejscu; zwraca wyjścia (n_symboli, T) + "n_bars".
+    """
+    n, steps = close.shape
+    out = {f: np.full((n, steps), np.nan) for f in OUTPUT_FIELDS}
+    out["n_bars"] = np.zeros((n, steps), dtype=np.int64)
+    v = state.values
+
+    for t in range(steps):
+        lanes = np.flatnonzero(mask[:, t])
+        if lanes.size == 0:
+            break
+        h, l, c = high[lanes, t], low[lanes, t], close[lanes, t]
+        k = state.n_bars[lanes] + 1
+        prev = v["prev_close"][lanes]
+
+        # ---- EMA / MACD ----
+        ema_f = _ema(v["ema_12"][lanes], c, k, EMA_FAST)
+        ema_s = _ema(v["ema_26"][lanes], c, k, EMA_SLOW)
+        macd = np.where(k >= EMA_SLOW, ema_f - ema_s, np.nan)
+        k_sig = k - EMA_SLOW + 1
+        signal = np.where(
+            k_sig >= 1,
+            _ema(v["macd_signal"][lanes], macd, k_sig, MACD_SIGNAL),
+            np.nan,
+        )
+        signal_ready = k_sig >= MACD_SIGNAL
+
+        # ---- RSI (Wilder) ----
+        change = c - prev  # NaN na pierwszym barze
+        has_change = k >= 2
+        avg_gain = np.where(
+            has_change, _wilder(v["avg_gain"][lanes], np.maximum(change, 0.0), k - 1, RSI_PERIOD), np.nan
+        )
+        avg_loss = np.where(
+            has_change, _wilder(v["avg_loss"][lanes], np.maximum(-change, 0.0), k - 1, RSI_PERIOD), np.nan
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0),
+                           100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        rsi = np.where(k > RSI_PERIOD, rsi, np.nan)
+
+        # ---- ATR (Wilder) ----
+        tr = np.where(
+            has_change,
+            np.maximum.reduce([h - l, np.abs(h - prev), np.abs(l - prev)]),
+            h - l,
+        )
+        atr = _wilder(v["atr_14"][lanes], tr, k, ATR_PERIOD)
+
+        # ---- Bollinger (okno zamknięć w stanie) ----
+        window = np.concatenate([state.closes[lanes], c[:, None]], axis=1)
+        bb_ready = k >= BB_PERIOD
+        with np.errstate(invalid="ignore"):
+            mid = np.where(bb_ready, window.mean(axis=1), np.nan)
+            sd = np.where(bb_ready, window.std(axis=1), np.nan)
+
+        # ---- zapis stanu + wyjść ----
+        state.n_bars[lanes] = k
+        state.closes[lanes] = window[:, 1:]
+        v["prev_close"][lanes] = c
+        v["ema_12"][lanes] = ema_f
+        v["ema_26"][lanes] = ema_s
+        v["macd_signal"][lanes] = signal
+        v["avg_gain"][lanes] = avg_gain
+        v["avg_loss"][lanes] = avg_loss
+        v["atr_14"][lanes] = atr
+
+        out["n_bars"][lanes, t] = k
+        out["ema_12"][lanes, t] = ema_f
+        out["ema_26"][lanes, t] = ema_s
+        out["macd"][lanes, t] = macd
+        out["macd_signal"][lanes, t] = signal
+        out["macd_hist"][lanes, t] = np.where(signal_ready, macd - signal, np.nan)
+        out["rsi_14"][lanes, t] = rsi
+        out["bb_mid"][lanes, t] = mid
+        out["bb_upper"][lanes, t] = mid + BB_K * sd
+        out["bb_lower"][lanes, t] = mid - BB_K * sd
+        out["atr_14"][lanes, t] = atr
+        out["avg_gain"][lanes, t] = avg_gain
+        out["avg_loss"][lanes, t] = avg_loss
+
+    return out
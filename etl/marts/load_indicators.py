@@ -0,0 +1,298 @@
+# etl/marts/load_indicators.py
+#
+# mart.indicators (EMA, MACD, RSI, Bollinger, ATR) aktualizowany przyrostowo
+# ze stanu w mart.indicator_state – per batch czytamy tylko nowe bary symbolu,
+# nie całą historię (silnik: etl/marts/indicator_engine.py).
+#
+# Szeregi (timeframe):
+#   '1d' – fact_price (close/high/low), po batchu EOD
+#   '5m' – mart.intraday_ohlcv_5m, po mikro-batchu intraday
+#
+# Korekty wstecz (lookback EOD, dopisywany bieżący kubełek 5-min): jeśli batch
+# dotyka baru <= last_ts stanu, stan jest odtwarzany z wiersza martu sprzed
+# najwcześniejszej zmiany (mart trzyma wszystkie składowe rekurencji)
+# + BB_PERIOD-1 wcześniejszych zamknięć – nadal O(zmienione bary), nie O(historia).
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from etl.marts.indicator_engine import (
+    BB_PERIOD,
+    OUTPUT_FIELDS,
+    STATE_FIELDS,
+    IndicatorState,
+    advance,
+)
+from etl.staging.copy_loader import copy_frame
+
+TIMEFRAMES = ("1d", "5m")
+
+# ---------- źródła barów: (symbol_id, after_ts) → bary z ts > after_ts ----------
+
+_SOURCE_SQL = {
+    "1d": """
+        select
+            c.symbol_id,
+            s.symbol,
+            fp.date::timestamp at time zone 'UTC' as ts,
+            fp.date                               as trade_date,
+            fp.high::float8                       as high,
+            fp.low::float8                        as low,
+            fp.close::float8                      as close
+        from unnest(%(symbol_ids)s::int[], %(after_ts)s::timestamptz[]) as c(symbol_id, after_ts)
+        join dim_symbol s on s.symbol_id = c.symbol_id
+        join fact_price fp
+            on fp.symbol_id = c.symbol_id
+           and fp.date_sk > coalesce(to_char(c.after_ts at time zone 'UTC', 'YYYYMMDD')::int, 0)
+        order by c.symbol_id, fp.date_sk;
+    """,
+    "5m": """
+        select
+            c.symbol_id,
+            b.symbol,
+            b.ts_5m             as ts,
+            b.trade_date,
+            b.high_5m::float8   as high,
+            b.low_5m::float8    as low,
+            b.close_5m::float8  as close
+        from unnest(%(symbol_ids)s::int[], %(after_ts)s::timestamptz[]) as c(symbol_id, after_ts)
+        join mart.intraday_ohlcv_5m b
+            on b.symbol_id = c.symbol_id
+           and (c.after_ts is null or b.ts_5m > c.after_ts)
+        order by c.symbol_id, b.ts_5m;
+    """,
+}
+
+# symbole i najwcześniejsza data z batcha stagingu EOD
+SQL_EOD_CHANGES = """
+select ds.symbol_id, min(s.date_value)::timestamp at time zone 'UTC'
+from stg.stg_price s
+join dim_symbol ds on ds.symbol = s.symbol
+where s.batch_id = %(batch_id)s
+group by ds.symbol_id;
+"""
+
+SQL_ALL_SYMBOLS = {
+    "1d": "select distinct symbol_id from fact_price;",
+    "5m": "select distinct symbol_id from mart.intraday_ohlcv_5m;",
+}
+
+# jeden aktualizujący per timeframe – stan czytany i pisany w tej samej transakcji
+SQL_LOCK = "select pg_advisory_xact_lock(hashtext('mart.indicator_state:' || %(timeframe)s));"
+
+SQL_READ_STATE = f"""
+select symbol_id, last_ts, n_bars, {", ".join(STATE_FIELDS)}, closes
+from mart.indicator_state
+where timeframe = %(timeframe)s
+  and symbol_id = any(%(symbol_ids)s::int[]);
+"""
+
+# ostatnie BB_PERIOD-1 wierszy martu przed from_ts – najnowszy niesie stan
+SQL_READ_REWIND = f"""
+select c.symbol_id, m.ts, m.n_bars, m.close, m.ema_12, m.ema_26, m.macd_signal,
+       m.avg_gain, m.avg_loss, m.atr_14
+from unnest(%(symbol_ids)s::int[], %(from_ts)s::timestamptz[]) as c(symbol_id, from_ts)
+cross join lateral (
+    select *
+    from mart.indicators m
+    where m.symbol_id = c.symbol_id
+      and m.timeframe = %(timeframe)s
+      and m.ts < c.from_ts
+    order by m.ts desc
+    limit {BB_PERIOD - 1}
+) m
+order by c.symbol_id, m.ts;
+"""
+
+MART_COLUMNS = [
+    "symbol_id", "symbol", "timeframe", "ts", "trade_date", "close", "n_bars", *OUTPUT_FIELDS,
+]
+STATE_COLUMNS = ["symbol_id", "timeframe", "last_ts", "n_bars", *STATE_FIELDS, "closes"]
+
+SQL_UPSERT_MART = f"""
+insert into mart.indicators ({", ".join(MART_COLUMNS)}, updated_at)
+select {", ".join(MART_COLUMNS)}, now()
+from _indicators_new
+on conflict (symbol_id, timeframe, ts) do update set
+    {", ".join(f"{c} = excluded.{c}" for c in MART_COLUMNS[4:])},
+    updated_at = excluded.updated_at;
+"""
+
+SQL_UPSERT_STATE = f"""
+insert into mart.indicator_state ({", ".join(STATE_COLUMNS)}, updated_at)
+select {", ".join(STATE_COLUMNS)}, now()
+from _indicator_state_new
+on conflict (symbol_id, timeframe) do update set
+    {", ".join(f"{c} = excluded.{c}" for c in STATE_COLUMNS[2:])},
+    updated_at = excluded.updated_at;
+"""
+
+
+def _pg_array(row: np.ndarray) -> str:
+    return "{" + ",".join("NULL" if math.isnan(x) else repr(float(x)) for x in row) + "}"
+
+
+def _load_states(cur, timeframe: str, changes: Dict[int, Optional[dt.datetime]]):
+    """
+    Stan startowy per symbol + granica `after_ts` odczytu barów.
+    Zwraca (symbol_ids, IndicatorState, after_ts).
+    """
+    symbol_ids = sorted(changes)
+    pos = {sid: i for i, sid in enumerate(symbol_ids)}
+    state = IndicatorState.empty(len(symbol_ids))
+    after_ts = [None] * len(symbol_ids)
+
+    cur.execute(SQL_READ_STATE, {"timeframe": timeframe, "symbol_ids": symbol_ids})
+    rewind = {}
+    for row in cur.fetchall():
+        sid, last_ts, n_bars = row[0], row[1], row[2]
+        from_ts = changes[sid]
+        i = pos[sid]
+        if from_ts is not None and from_ts <= last_ts:
+            rewind[sid] = from_ts
+            continue
+        state.n_bars[i] = n_bars
+        for f, value in zip(STATE_FIELDS, row[3:3 + len(STATE_FIELDS)]):
+            state.values[f][i] = np.nan if value is None else value
+        closes = [np.nan if x is None else x for x in row[-1] or []]
+        if closes:
+            state.closes[i, -len(closes):] = closes
+        after_ts[i] = last_ts
+
+    if rewind:
+        cur.execute(SQL_READ_REWIND, {
+            "timeframe": timeframe,
+            "symbol_ids": list(rewind),
+            "from_ts": list(rewind.values()),
+        })
+        rows = pd.DataFrame(cur.fetchall(), columns=[
+            "symbol_id", "ts", "n_bars", "close", "ema_12", "ema_26", "macd_signal",
+            "avg_gain", "avg_loss", "atr_14",
+        ])
+        # symbole bez wcześniejszych wierszy martu: od zera (after_ts = None)
+        for sid, hist in rows.groupby("symbol_id", sort=False):
+            i = pos[sid]
+            last = hist.iloc[-1]
+            state.n_bars[i] = last["n_bars"]
+            state.values["prev_close"][i] = last["close"]
+            for f in STATE_FIELDS[1:]:
+                state.values[f][i] = np.nan if pd.isna(last[f]) else last[f]
+            closes = hist["close"].astype(float).to_numpy()
+            state.closes[i, -len(closes):] = closes
+            after_ts[i] = last["ts"]
+
+    return symbol_ids, state, after_ts
+
+
+def _to_matrix(bars: pd.DataFrame, pos: Dict[int, int], n: int):
+    """
+    Bary (posortowane po symbol_id, ts) → macierze (n, T) + maska.
+    """
+    row = bars["symbol_id"].map(pos).to_numpy()
+    col = bars.groupby("symbol_id", sort=False).cumcount().to_numpy()
+    steps = int(col.max()) + 1 if len(col) else 0
+
+    mask = np.zeros((n, steps), dtype=bool)
+    mask[row, col] = True
+    mats = {}
+    for name in ("high", "low", "close"):
+        m = np.full((n, steps), np.nan)
+        m[row, col] = bars[name].to_numpy(dtype=float)
+        mats[name] = m
+    return mats, mask, row, col
+
+
+def update_indicators(cur, timeframe: str, changes: Dict[int, Optional[dt.datetime]]) -> int:
+    """
+    Aktualizuje mart.indicators i mart.indicator_state dla symboli z `changes`
+    (symbol_id → najwcześniejszy zmieniony ts albo None = tylko nowe bary).
+    Transakcją zarządza wywołujący. Zwraca liczbę zapisanych wierszy martu.
+    """
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"timeframe must be one of {TIMEFRAMES}")
+    if not changes:
+        return 0
+
+    cur.execute(SQL_LOCK, {"timeframe": timeframe})
+    symbol_ids, state, after_ts = _load_states(cur, timeframe, changes)
+    pos = {sid: i for i, sid in enumerate(symbol_ids)}
+
+    cur.execute(_SOURCE_SQL[timeframe], {"symbol_ids": symbol_ids, "after_ts": after_ts})
+    bars = pd.DataFrame(
+        cur.fetchall(),
+        columns=["symbol_id", "symbol", "ts", "trade_date", "high", "low", "close"],
+    )
+    if bars.empty:
+        return 0
+
+    mats, mask, row, col = _to_matrix(bars, pos, len(symbol_ids))
+    out = advance(state, mats["high"], mats["low"], mats["close"], mask)
+
+    # ---- mart: wiersze w kolejności `bars` ----
+    mart = bars[["symbol_id", "symbol", "ts", "trade_date", "close"]].copy()
+    mart["timeframe"] = timeframe
+    mart["n_bars"] = out["n_bars"][row, col]
+    for f in OUTPUT_FIELDS:
+        mart[f] = out[f][row, col]
+
+    # ---- stan: symbole, które dostały bary ----
+    touched = np.flatnonzero(mask[:, 0])
+    last_ts = bars.groupby("symbol_id", sort=False)["ts"].last()
+    new_state = pd.DataFrame({
+        "symbol_id": [symbol_ids[i] for i in touched],
+        "timeframe": timeframe,
+        "n_bars": state.n_bars[touched],
+        **{f: state.values[f][touched] for f in STATE_FIELDS},
+        "closes": [_pg_array(state.closes[i]) for i in touched],
+    })
+    new_state["last_ts"] = new_state["symbol_id"].map(last_ts)
+
+    cur.execute("create temp table _indicators_new (like mart.indicators including defaults) on commit drop;")
+    copy_frame(cur, mart, "_indicators_new", MART_COLUMNS)
+    cur.execute(SQL_UPSERT_MART)
+    rows = cur.rowcount
+
+    cur.execute("create temp table _indicator_state_new (like mart.indicator_state including defaults) on commit drop;")
+    copy_frame(cur, new_state, "_indicator_state_new", STATE_COLUMNS)
+    cur.execute(SQL_UPSERT_STATE)
+
+    return rows
+
+
+# ---------- wejścia z batchy ----------
+
+def update_indicators_for_eod_batch(cur, batch_id: str) -> int:
+    """
+    '1d' dla symboli z batcha EOD (od najwcześniejszej daty w batchu – lookback
+    nadpisuje stare notowania, więc stan jest w razie potrzeby cofany).
+    """
+    cur.execute(SQL_EOD_CHANGES, {"batch_id": batch_id})
+    return update_indicators(cur, "1d", dict(cur.fetchall()))
+
+
+def update_indicators_for_buckets(cur, touched: Iterable[Tuple[int, dt.datetime]]) -> int:
+    """
+    '5m' dla kubełków (symbol_id, ts_5m) dotkniętych przez mikro-batch
+    (bieżący kubełek jest przeliczany przy każdym batchu – stąd cofanie stanu).
+    """
+    changes: Dict[int, dt.datetime] = {}
+    for symbol_id, ts_5m in touched:
+        if symbol_id not in changes or ts_5m < changes[symbol_id]:
+            changes[symbol_id] = ts_5m
+    return update_indicators(cur, "5m", changes)
+
+
+def rebuild_indicators(cur, timeframe: str) -> int:
+    """
+    Pełne przeliczenie timeframe'u od zera (pierwsze zasilenie / zmiana parametrów).
+    """
+    cur.execute("delete from mart.indicator_state where timeframe = %(tf)s;", {"tf": timeframe})
+    cur.execute("delete from mart.indicators where timeframe = %(tf)s;", {"tf": timeframe})
+    cur.execute(SQL_ALL_SYMBOLS[timeframe])
+    return update_indicators(cur, timeframe, {sid: None for (sid,) in cur.fetchall()})
@@ -0,0 +1,103 @@
+# etl/marts/load_intraday_ohlcv_5m.py
+
+# Kubełek 5-min – to samo wyrażenie co w mart.mv_intraday_ohlcv_5m.
+BUCKET_5M = (
+    "date_trunc('hour', {ts}) "
+    "+ make_interval(mins => (extract(minute from {ts})::int / 5) * 5)"
+)
+
+# Przelicza wskazane kubełki (symbol_id, ts_5m) z fact_price_intraday_raw.
+# open/close = pierwszy/ostatni bar w kubełku (po ts_utc), nie max().
+# date_sk liczony wprost (YYYYMMDD) – dim_date i tak pokrywa cały horyzont.
+SQL_UPSERT_BUCKETS = """
+with buckets as (
+    select distinct b.symbol_id, b.ts_5m
+    from unnest(%(symbol_ids)s::int[], %(buckets)s::timestamptz[]) as b(symbol_id, ts_5m)
+),
+agg as (
+    select
+        f.symbol_id,
+        b.ts_5m,
+        (array_agg(f.open  order by f.ts_utc asc))[1]  as open_5m,
+        max(f.high)                                    as high_5m,
+        min(f.low)                                     as low_5m,
+        (array_agg(f.close order by f.ts_utc desc))[1] as close_5m,
+        sum(f.volume)                                  as volume_5m,
+        min(f.ts_utc)                                  as first_ts,
+        max(f.ts_utc)                                  as last_ts
+    from buckets b
+    join fact_price_intraday_raw f
+        on f.symbol_id = b.symbol_id
+       and f.ts_utc >= b.ts_5m
+       and f.ts_utc <  b.ts_5m + interval '5 minutes'
+    group by f.symbol_id, b.ts_5m
+)
+insert into mart.intraday_ohlcv_5m (
+    symbol_id, symbol, date_sk, trade_date, ts_5m,
+    open_5m, high_5m, low_5m, close_5m, volume_5m,
+    first_ts, last_ts, updated_at
+)
+select
+    a.symbol_id,
+    s.symbol,
+    to_char(a.ts_5m, 'YYYYMMDD')::int,
+    a.ts_5m::date,
+    a.ts_5m,
+    a.open_5m,
+    a.high_5m,
+    a.low_5m,
+    a.close_5m,
+    a.volume_5m,
+    a.first_ts,
+    a.last_ts,
+    now()
+from agg a
+join dim_symbol s on s.symbol_id = a.symbol_id
+on conflict (symbol_id, ts_5m) do update set
+    open_5m    = excluded.open_5m,
+    high_5m    = excluded.high_5m,
+    low_5m     = excluded.low_5m,
+    close_5m   = excluded.close_5m,
+    volume_5m  = excluded.volume_5m,
+    first_ts   = excluded.first_ts,
+    last_ts    = excluded.last_ts,
+    updated_at = excluded.updated_at;
+"""
+
+# Kubełki z bieżącej sesji (siatka bezpieczeństwa dla wierszy załadowanych
+# poza Dagsterem, np. przez stream_intraday.py).
+SQL_SESSION_BUCKETS = f"""
+select distinct
+    f.symbol_id,
+    {BUCKET_5M.format(ts="f.ts_utc")} as ts_5m
+from fact_price_intraday_raw f
+where f.ts_utc >= %(since)s;
+"""
+
+
+def upsert_intraday_ohlcv_5m(cur, touched) -> int:
+    """
+    Upsert kubełków 5-min dotkniętych przez ostatni mikro-batch.
+
+    :param cur: kursor psycopg2 (transakcją zarządza wywołujący).
+    :param touched: sekwencja (symbol_id, ts_5m).
+    :return: liczba zaktualizowanych kubełków.
+    """
+    if not touched:
+        return 0
+
+    symbol_ids = [t[0] for t in touched]
+    buckets = [t[1] for t in touched]
+    cur.execute(SQL_UPSERT_BUCKETS, {"symbol_ids": symbol_ids, "buckets": buckets})
+    return cur.rowcount
+
+
+def session_buckets_5m(cur, since) -> list:
+    """
+    Kubełki (symbol_id, ts_5m) z danymi od `since`. Po upsercie tych kubełków
+    trzeba cofnąć stan wskaźników '5m' (update_indicators_for_buckets) –
+    tak robi op reconcile_intraday_ohlcv_5m_session.
+    """
+    cur.execute(SQL_SESSION_BUCKETS, {"since": since})
+    return cur.fetchall()
+
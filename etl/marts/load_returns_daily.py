@@ -0,0 +1,150 @@
+from sqlalchemy import text
+
+# Wspólna część: okna lag()/SMA/vol liczone na `price_base`.
+# Kolumny jak w mart.mv_returns_daily.
+_WINDOWS = """
+returns as (
+    select
+        *,
+        case
+            when prev_close is null or prev_close = 0 then null
+            else (close / prev_close) - 1
+        end as daily_return,
+        case
+            when prev_close is null or prev_close = 0 then null
+            else ln(close / prev_close)
+        end as log_return
+    from price_base
+),
+computed as (
+    select
+        symbol_id,
+        symbol,
+        date_sk,
+        trade_date,
+        close,
+        adj_close,
+        daily_return,
+        log_return,
+        avg(close) over w20 as sma_20,
+        avg(close) over w50 as sma_50,
+        stddev_samp(daily_return) over w20 * sqrt(252) as vol_20d_annualized,
+        from_sk
+    from returns
+    window
+        w20 as (partition by symbol_id order by trade_date rows between 19 preceding and current row),
+        w50 as (partition by symbol_id order by trade_date rows between 49 preceding and current row)
+)
+"""
+
+_UPSERT = """
+insert into mart.returns_daily (
+    symbol_id, symbol, date_sk, trade_date, close, adj_close,
+    daily_return, log_return, sma_20, sma_50, vol_20d_annualized
+)
+select
+    symbol_id, symbol, date_sk, trade_date, close, adj_close,
+    daily_return, log_return, sma_20, sma_50, vol_20d_annualized
+from computed
+where date_sk >= from_sk
+on conflict (symbol_id, date_sk) do update set
+    symbol             = excluded.symbol,
+    trade_date         = excluded.trade_date,
+    close              = excluded.close,
+    adj_close          = excluded.adj_close,
+    daily_return       = excluded.daily_return,
+    log_return         = excluded.log_return,
+    sma_20             = excluded.sma_20,
+    sma_50             = excluded.sma_50,
+    vol_20d_annualized = excluded.vol_20d_annualized;
+"""
+
+# Przyrostowo: tylko symbole z batcha, od najwcześniejszej daty w batchu,
+# plus 50 wcześniejszych notowań (49 dla SMA50 + 1 dla lag()).
+SQL_INCREMENTAL = """
+with touched as (
+    select
+        ds.symbol_id,
+        to_char(min(s.date_value), 'YYYYMMDD')::int as from_sk
+    from stg.stg_price s
+    join dim_symbol ds on ds.symbol = s.symbol
+    where s.batch_id = :batch_id
+    group by ds.symbol_id
+),
+bounds as (
+    select
+        t.symbol_id,
+        t.from_sk,
+        coalesce(lb.date_sk, 0) as lookback_sk
+    from touched t
+    left join lateral (
+        select fp.date_sk
+        from fact_price fp
+        where fp.symbol_id = t.symbol_id
+          and fp.date_sk < t.from_sk
+        order by fp.date_sk desc
+        offset 49
+        limit 1
+    ) lb on true
+),
+price_base as (
+    select
+        fp.symbol_id,
+        s.symbol,
+        fp.date_sk,
+        d.date_value as trade_date,
+        fp.close,
+        fp.adj_close,
+        lag(fp.close) over (
+            partition by fp.symbol_id
+            order by d.date_value
+        ) as prev_close,
+        b.from_sk
+    from bounds b
+    join fact_price fp
+        on fp.symbol_id = b.symbol_id
+       and fp.date_sk >= b.lookback_sk
+    join dim_date d
+        on d.date_sk = fp.date_sk
+    join dim_symbol s
+        on s.symbol_id = fp.symbol_id
+),
+""" + _WINDOWS + _UPSERT
+
+# Pełna przebudowa (pierwsze zasilenie / naprawa) – cała historia fact_price.
+SQL_FULL = """
+with price_base as (
+    select
+        fp.symbol_id,
+        s.symbol,
+        fp.date_sk,
+        d.date_value as trade_date,
+        fp.close,
+        fp.adj_close,
+        lag(fp.close) over (
+            partition by fp.symbol_id
+            order by d.date_value
+        ) as prev_close,
+        0 as from_sk
+    from fact_price fp
+    join dim_date d
+        on d.date_sk = fp.date_sk
+    join dim_symbol s
+        on s.symbol_id = fp.symbol_id
+),
+""" + _WINDOWS + _UPSERT
+
+
+def load_returns_daily(engine, batch_id):
+    """
+    Aktualizuje mart.returns_daily tylko dla symboli i dat dotkniętych batchem.
+    Zwraca liczbę przeliczonych wierszy.
+    """
+    with engine.begin() as conn:
+        return conn.execute(text(SQL_INCREMENTAL), {"batch_id": batch_id}).rowcount
+
+
+def rebuild_returns_daily(engine):
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE mart.returns_daily;"))
+        return conn.execute(text(SQL_FULL)).rowcount
@@ -1,33 +1,39 @@
 # etl/resources.py
-import psycopg2
-from contextlib import contextmanager
-from dagster import resource
+from dagster import Field, resource
 
+from etl.utils.db import DbConfig, get_db
 
-@resource
+
+@resource(
+    config_schema={
+        "host": Field(str, is_required=False),
+        "port": Field(int, is_required=False),
+        "dbname": Field(str, is_required=False),
+        "user": Field(str, is_required=False),
+        "min_size": Field(int, default_value=1),
+        "max_size": Field(int, default_value=10),
+        "statement_timeout_ms": Field(int, default_value=300_000),
+        "pool_timeout_s": Field(float, default_value=30.0),
+    }
+)
 def db_resource(init_context):
     """
-    Prosty resource DB używany przez wszystkie op'y.
-    """
-    conn_params = {
-        "host": "localhost",
-        "port": 5432,
-        "dbname": "stock_dw",
-        "user": "postgres",
-        "password": "postgres",
-    }
+    Resource DB używany przez wszystkie op'y: jedna, rozgrzana pula na proces.
+    Joby działają na in_process_executor – wszystkie op'y runu w jednym procesie,
+    więc dzielą tę pulę (domyślny multiprocess executor = pula i connect per op).
 
-    @contextmanager
-    def get_connection():
-        conn = psycopg2.connect(**conn_params)
-        try:
-            yield conn
-        finally:
-            conn.close()
+    - context.resources.db.get_connection(label) – surowe połączenie psycopg2
+    - context.resources.db.engine – silnik SQLAlchemy nad tą samą pulą
 
-    # zwracamy obiekt z metodą get_connection()
-    class DbWrapper:
-        def get_connection(self):
-            return get_connection()
+    Hasło tylko ze zmiennej środowiskowej PGPASSWORD (nie z configu runu).
+    """
+    db = get_db(DbConfig(**init_context.resource_config))
+    db.warm_up()
 
-    return DbWrapper()
+    try:
+        yield db
+    finally:
+        init_context.log.info(
+            f"DB pool: {db.pool_status()}, connects={db.connects}, "
+            f"checkout_seconds={db.checkout_stats()}"
+        )
@@ -0,0 +1,24 @@
+-- Kalendarz (dzienny) z atrybutami sesji NYSE.
+-- Wypełniany z góry dla całego horyzontu przez etl/dims/load_dim_date.py.
+
+CREATE TABLE IF NOT EXISTS dim_date (
+    date_sk          integer  PRIMARY KEY,        -- YYYYMMDD
+    date_value       date     NOT NULL UNIQUE,
+    year             integer  NOT NULL,
+    month            integer  NOT NULL,
+    day              integer  NOT NULL,
+    quarter          integer,
+    iso_year         integer,
+    iso_week         integer,
+    week_start       date,                        -- poniedziałek tygodnia ISO
+    day_of_week      integer,                     -- 1 = poniedziałek
+    is_weekend       boolean,
+    is_holiday       boolean,
+    holiday_name     text,
+    is_trading_day   boolean,
+    trading_day_seq  integer                      -- gęsty numer sesji (N sesji wstecz = seq - N)
+);
+
+CREATE INDEX IF NOT EXISTS ix_dim_date_trading_day_seq
+    ON dim_date (trading_day_seq)
+    WHERE is_trading_day;
@@ -1,5 +1,12 @@
+-- Partycjonowanie zakresowe po ts_utc (domyślnie dzienne, UTC).
+-- Partycje tworzy ensure_fact_price_intraday_partition()
+-- (etl/sql/facts/fn_ensure_fact_price_intraday_partition.sql),
+-- z wyprzedzeniem – op maintain_intraday_partitions w Dagsterze.
+-- Klucz unikalny musi zawierać klucz partycjonowania, więc intraday_id
+-- nie jest już PK – naturalnym kluczem jest (symbol_id, ts_utc).
+
 CREATE TABLE fact_price_intraday_raw (
-    intraday_id  bigserial PRIMARY KEY,
+    intraday_id  bigserial,
     symbol_id    int NOT NULL REFERENCES dim_symbol(symbol_id),
     ts_utc       timestamptz NOT NULL,
 
@@ -8,6 +15,15 @@ CREATE TABLE fact_price_intraday_raw (
     low          numeric(18,6),
     close        numeric(18,6),
     volume       bigint,
+    ingest_seq   bigint,  -- stg_price_intraday.ingest_seq zwycięskiej wersji baru
+    load_ts      timestamptz NOT NULL DEFAULT now(),  -- watermark eksportu Parquet (etl/lake)
 
     CONSTRAINT uq_fact_price_intraday_raw UNIQUE (symbol_id, ts_utc)
-);
+) PARTITION BY RANGE (ts_utc);
+
+-- Siatka bezpieczeństwa na wiersze spoza utworzonych partycji;
+-- ensure_fact_price_intraday_partition() przenosi je do właściwej partycji.
+CREATE TABLE fact_price_intraday_raw_default
+    PARTITION OF fact_price_intraday_raw DEFAULT;
+
+-- Indeksy dla odczytów ostatniego okna: etl/sql/facts/idx_fact_price_intraday_raw.sql
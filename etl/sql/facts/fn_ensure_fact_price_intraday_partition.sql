@@ -0,0 +1,120 @@
+-- Tworzy (jeśli brak) partycję fact_price_intraday_raw pokrywającą p_ts.
+--
+-- Nazwy: fact_price_intraday_raw_<g><YYYYMMDD>, gdzie <g> = d / w / m
+-- (dzień / tydzień ISO / miesiąc, granice w UTC), data = dolna granica.
+-- Pokrycie sprawdzane po granicach podpiętych partycji (relpartbound), nie po
+-- nazwach: jeśli p_ts leży w dowolnej partycji – nic nie robi. Nowa partycja jest
+-- przycinana do sąsiednich, więc mieszane granulacje (np. dzienna z loadera,
+-- tygodniowa z maintain_intraday_partitions) nie kończą się "would overlap partition".
+-- Tabela odłączona przez retire_intraday_partitions(drop=False) nie pokrywa zakresu;
+-- jeśli nadal nosi docelową nazwę, dostaje sufiks _detached_<czas>.
+-- Wiersze z tego zakresu, które wpadły do partycji DEFAULT, są przenoszone.
+
+-- Granice podpiętych partycji (bez DEFAULT).
+CREATE OR REPLACE FUNCTION fact_price_intraday_partition_bounds()
+RETURNS TABLE (relname text, lo timestamptz, hi timestamptz)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.relname::text, b[1]::timestamptz, b[2]::timestamptz
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    CROSS JOIN LATERAL regexp_match(
+        pg_get_expr(c.relpartbound, c.oid),
+        'FROM \(''([^'']+)''\) TO \(''([^'']+)''\)'
+    ) AS b
+    WHERE i.inhparent = 'fact_price_intraday_raw'::regclass
+      AND b IS NOT NULL;
+$$;
+
+CREATE OR REPLACE FUNCTION ensure_fact_price_intraday_partition(
+    p_ts          timestamptz,
+    p_granularity text DEFAULT 'day'
+)
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_day   date := (p_ts AT TIME ZONE 'UTC')::date;
+    v_lo    date;
+    v_hi    date;
+    v_name  text;
+    v_lo_ts timestamptz;
+    v_hi_ts timestamptz;
+BEGIN
+    SELECT b.relname INTO v_name
+    FROM fact_price_intraday_partition_bounds() b
+    WHERE p_ts >= b.lo AND p_ts < b.hi
+    LIMIT 1;
+    IF v_name IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+
+    CASE p_granularity
+        WHEN 'day' THEN
+            v_lo := v_day;
+            v_hi := v_lo + 1;
+        WHEN 'week' THEN
+            v_lo := date_trunc('week', v_day::timestamp)::date;
+            v_hi := v_lo + 7;
+        WHEN 'month' THEN
+            v_lo := date_trunc('month', v_day::timestamp)::date;
+            v_hi := (v_lo + interval '1 month')::date;
+        ELSE
+            RAISE EXCEPTION 'unknown granularity: %', p_granularity;
+    END CASE;
+
+    -- równoległe loadery: jeden tworzy, reszta czeka i widzi gotową partycję
+    PERFORM pg_advisory_xact_lock(hashtext('fact_price_intraday_raw:partitions'));
+
+    SELECT b.relname INTO v_name
+    FROM fact_price_intraday_partition_bounds() b
+    WHERE p_ts >= b.lo AND p_ts < b.hi
+    LIMIT 1;
+    IF v_name IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+
+    -- przycięcie do sąsiadów: [koniec poprzedniej, początek następnej partycji)
+    -- (greatest/least pomijają NULL, gdy sąsiada brak)
+    v_lo_ts := v_lo::timestamp AT TIME ZONE 'UTC';
+    v_hi_ts := v_hi::timestamp AT TIME ZONE 'UTC';
+    SELECT greatest(v_lo_ts, max(b.hi)) INTO v_lo_ts
+    FROM fact_price_intraday_partition_bounds() b
+    WHERE b.hi <= p_ts;
+    SELECT least(v_hi_ts, min(b.lo)) INTO v_hi_ts
+    FROM fact_price_intraday_partition_bounds() b
+    WHERE b.lo > p_ts;
+
+    v_name := 'fact_price_intraday_raw_' || left(p_granularity, 1)
+              || to_char(v_lo_ts AT TIME ZONE 'UTC', 'YYYYMMDD');
+
+    -- odłączone archiwum o tej samej nazwie – zwalniamy nazwę
+    IF to_regclass(v_name) IS NOT NULL THEN
+        EXECUTE format(
+            'ALTER TABLE %I RENAME TO %I',
+            v_name, v_name || '_detached_' || to_char(clock_timestamp(), 'YYYYMMDDHH24MISS')
+        );
+    END IF;
+
+    CREATE TEMP TABLE IF NOT EXISTS _fpir_moved
+        (LIKE fact_price_intraday_raw) ON COMMIT DROP;
+    TRUNCATE _fpir_moved;
+
+    WITH moved AS (
+        DELETE FROM fact_price_intraday_raw_default
+        WHERE ts_utc >= v_lo_ts AND ts_utc < v_hi_ts
+        RETURNING *
+    )
+    INSERT INTO _fpir_moved SELECT * FROM moved;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF fact_price_intraday_raw FOR VALUES FROM (%L) TO (%L)',
+        v_name, v_lo_ts, v_hi_ts
+    );
+
+    INSERT INTO fact_price_intraday_raw SELECT * FROM _fpir_moved;
+
+    RETURN v_name;
+END;
+$$;
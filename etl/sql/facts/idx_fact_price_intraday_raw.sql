@@ -0,0 +1,25 @@
+-- Ścieżki dostępu fact_price_intraday_raw dla odczytów "ostatnie N minut"
+-- (mart.vw_intraday_last_30m, dashboard). Indeksy na tabeli partycjonowanej –
+-- nowe partycje (ensure_fact_price_intraday_partition) dostają je automatycznie.
+--
+-- BRIN(ts_utc): bary przychodzą ~rosnąco w czasie, więc zakres 32 stron to wąskie
+--   okno czasu; okno 30 min czyta kilka zakresów zamiast całej partycji dnia.
+--   autosummarize – nowe zakresy opisywane przez autovacuum, bez ręcznego summarize.
+-- (symbol_id, ts_utc DESC) INCLUDE OHLCV: ostatnie bary symbolu jako index-only scan
+--   (uq_fact_price_intraday_raw ma ten sam klucz, ale bez kolumn OHLCV → wizyty w stercie).
+--
+-- Na istniejącej, dużej tabeli: migracja 006 (CONCURRENTLY per partycja).
+
+CREATE INDEX IF NOT EXISTS ix_fact_price_intraday_raw_ts_brin
+    ON fact_price_intraday_raw USING brin (ts_utc)
+    WITH (pages_per_range = 32, autosummarize = on);
+
+CREATE INDEX IF NOT EXISTS ix_fact_price_intraday_raw_symbol_ts_cov
+    ON fact_price_intraday_raw (symbol_id, ts_utc DESC)
+    INCLUDE (open, high, low, close, volume);
+
+-- Eksport przyrostowy do Parquet (etl/lake/export_parquet.py): load_ts > watermark.
+-- load_ts rośnie z kolejnością zapisu, więc BRIN wystarcza.
+CREATE INDEX IF NOT EXISTS ix_fact_price_intraday_raw_load_ts_brin
+    ON fact_price_intraday_raw USING brin (load_ts)
+    WITH (autosummarize = on);
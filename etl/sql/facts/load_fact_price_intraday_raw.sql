@@ -1,37 +1,70 @@
 -- etl/sql/facts/load_fact_price_intraday_raw.sql
+--
+-- Ręczny odpowiednik etl/facts/load_fact_intraday.py (psql stock_dw -f ...).
+-- Jeden claim całego stagingu: wiersze dopisane w trakcie przez konsumenta
+-- zostają na następny przebieg (zamiast znikać w TRUNCATE).
 
--- 1. Załaduj z STAGING do FACT z mapowaniem symbol -> symbol_id
---    i z obsługą UPSERT (idempotentne ładowanie mikro-batchy).
+BEGIN;
 
-INSERT INTO fact_price_intraday_raw (
-    symbol_id,
-    ts_utc,
-    open,
-    high,
-    low,
-    close,
-    volume
-)
-SELECT
-    ds.symbol_id,
-    s.ts_utc,
-    s.open,
-    s.high,
-    s.low,
-    s.close,
-    s.volume
-FROM stg_price_intraday s
-JOIN dim_symbol ds
-  ON ds.symbol = s.symbol
-ON CONFLICT (symbol_id, ts_utc) DO UPDATE
-SET
-    open   = EXCLUDED.open,
-    high   = EXCLUDED.high,
-    low    = EXCLUDED.low,
-    close  = EXCLUDED.close,
-    volume = EXCLUDED.volume;
+-- 0. Upewnij się, że istnieją partycje dla dni obecnych w stagingu –
+--    upsert trafia wtedy tylko w indeks bieżącej partycji, nie w DEFAULT.
+
+SELECT ensure_fact_price_intraday_partition(d)
+FROM (
+    SELECT DISTINCT date_trunc('day', ts_utc AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS d
+    FROM stg_price_intraday
+) days;
+
+-- 1. Claim (DELETE ... RETURNING, SKIP LOCKED) i UPSERT do FACT.
+--    Duplikaty baru: wygrywa najpóźniej wstawiony wiersz (ingest_seq).
+--    2. Powiadom nasłuchujących (streamlit/live_feed.py) – NOTIFY dociera po COMMIT.
 
--- 2. Wyczyść staging po udanym załadowaniu,
---    żeby kolejne mikro-batche nie dublowały danych.
+WITH claimed AS (
+    DELETE FROM stg_price_intraday
+    WHERE ctid = ANY(ARRAY(
+        SELECT ctid
+        FROM stg_price_intraday
+        FOR UPDATE SKIP LOCKED
+    ))
+    RETURNING symbol_id, ts_utc, open, high, low, close, volume, ingest_seq
+),
+src AS (
+    SELECT DISTINCT ON (symbol_id, ts_utc)
+        symbol_id, ts_utc, open, high, low, close, volume, ingest_seq
+    FROM claimed
+    ORDER BY symbol_id, ts_utc, ingest_seq DESC
+),
+ins AS (
+    INSERT INTO fact_price_intraday_raw (
+        symbol_id,
+        ts_utc,
+        open,
+        high,
+        low,
+        close,
+        volume,
+        ingest_seq
+    )
+    SELECT symbol_id, ts_utc, open, high, low, close, volume, ingest_seq
+    FROM src
+    ON CONFLICT (symbol_id, ts_utc) DO UPDATE
+    SET
+        open       = EXCLUDED.open,
+        high       = EXCLUDED.high,
+        low        = EXCLUDED.low,
+        close      = EXCLUDED.close,
+        volume     = EXCLUDED.volume,
+        ingest_seq = EXCLUDED.ingest_seq,
+        load_ts    = EXCLUDED.load_ts
+    WHERE fact_price_intraday_raw.ingest_seq IS NULL
+       OR fact_price_intraday_raw.ingest_seq < EXCLUDED.ingest_seq
+    RETURNING ts_utc
+)
+SELECT pg_notify(
+    'intraday_ticks',
+    json_build_object('rows', count(*), 'max_ts', max(ts_utc))::text
+)
+FROM ins
+HAVING count(*) > 0;
 
-TRUNCATE TABLE stg_price_intraday;
+COMMIT;
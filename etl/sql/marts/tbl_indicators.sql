@@ -0,0 +1,64 @@
+-- Wskaźniki techniczne (EMA 12/26, MACD 12/26/9, RSI 14, Bollinger 20/2, ATR 14)
+-- per symbol i interwał; aktualizowane przyrostowo przez etl/marts/load_indicators.py.
+--   timeframe '1d' – z fact_price, '5m' – z mart.intraday_ohlcv_5m
+-- Kolumny pochodne są NULL w rozgrzewce (n_bars < okres wskaźnika).
+
+create schema if not exists mart;
+
+create table if not exists mart.indicators (
+    symbol_id    int         not null,
+    symbol       text        not null,
+    timeframe    text        not null,
+    ts           timestamptz not null,   -- '1d': północ UTC dnia notowania
+    trade_date   date        not null,
+    close        float8,
+
+    ema_12       float8,
+    ema_26       float8,
+    macd         float8,
+    macd_signal  float8,
+    macd_hist    float8,
+    rsi_14       float8,
+    bb_mid       float8,
+    bb_upper     float8,
+    bb_lower     float8,
+    atr_14       float8,
+
+    -- składowe rekurencji – z nich odtwarzany jest stan przy korektach wstecz
+    n_bars       int         not null,
+    avg_gain     float8,
+    avg_loss     float8,
+
+    updated_at   timestamptz not null default now(),
+
+    constraint pk_indicators primary key (symbol_id, timeframe, ts),
+    constraint ck_indicators_timeframe check (timeframe in ('1d', '5m'))
+);
+
+create index if not exists idx_indicators_symbol_time
+    on mart.indicators (symbol, timeframe, ts desc);
+
+-- Stan rekurencji po ostatnim przetworzonym barze (jeden wiersz na symbol/interwał).
+-- Kolejny batch czyta tylko bary z ts > last_ts.
+create table if not exists mart.indicator_state (
+    symbol_id    int         not null,
+    timeframe    text        not null,
+    last_ts      timestamptz not null,
+    n_bars       int         not null,
+
+    prev_close   float8,
+    ema_12       float8,
+    ema_26       float8,
+    macd_signal  float8,
+    avg_gain     float8,
+    avg_loss     float8,
+    atr_14       float8,
+    closes       float8[]    not null,   -- ostatnie 19 zamknięć (okno Bollingera), najstarsze pierwsze
+
+    updated_at   timestamptz not null default now(),
+
+    constraint pk_indicator_state primary key (symbol_id, timeframe)
+);
+
+-- Pierwsze zasilenie: op refresh_indicators_daily z configiem {"full_rebuild": true}
+-- (albo etl.marts.load_indicators.rebuild_indicators(cur, '1d' / '5m')).
@@ -0,0 +1,28 @@
+-- Tabelaryczny rollup 5-min, upsertowany per mikro-batch
+-- (etl/marts/load_intraday_ohlcv_5m.py) zamiast REFRESH całego widoku.
+-- Kolumny jak w mart.mv_intraday_ohlcv_5m + ts pierwszego/ostatniego bara w kubełku.
+
+create schema if not exists mart;
+
+create table if not exists mart.intraday_ohlcv_5m (
+    symbol_id   int         not null,
+    symbol      text        not null,
+    date_sk     int         not null,
+    trade_date  date        not null,
+    ts_5m       timestamptz not null,
+
+    open_5m     numeric(18,6),
+    high_5m     numeric(18,6),
+    low_5m      numeric(18,6),
+    close_5m    numeric(18,6),
+    volume_5m   bigint,
+
+    first_ts    timestamptz not null,
+    last_ts     timestamptz not null,
+    updated_at  timestamptz not null default now(),
+
+    constraint pk_intraday_ohlcv_5m primary key (symbol_id, ts_5m)
+);
+
+create index if not exists idx_intraday_ohlcv_5m_symbol_time
+    on mart.intraday_ohlcv_5m (symbol, ts_5m desc);
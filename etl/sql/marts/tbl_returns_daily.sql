@@ -0,0 +1,26 @@
+-- Tabelaryczny (przyrostowo utrzymywany) odpowiednik mart.mv_returns_daily.
+-- Te same kolumny; aktualizowany przez etl/marts/load_returns_daily.py
+-- tylko dla ogona (symbol, data) dotkniętego bieżącym batch_id.
+
+create schema if not exists mart;
+
+create table if not exists mart.returns_daily (
+    symbol_id           int     not null,
+    symbol              text    not null,
+    date_sk             int     not null,
+    trade_date          date    not null,
+    close               numeric,
+    adj_close           numeric,
+    daily_return        numeric,
+    log_return          numeric,
+    sma_20              numeric,
+    sma_50              numeric,
+    vol_20d_annualized  numeric,
+    constraint pk_returns_daily primary key (symbol_id, date_sk)
+);
+
+create index if not exists idx_returns_daily_symbol_date
+    on mart.returns_daily (symbol, trade_date desc);
+
+-- Pierwsze zasilenie: op refresh_returns_daily z configiem {"full_rebuild": true}
+-- (albo etl.marts.load_returns_daily.rebuild_returns_daily(engine)).
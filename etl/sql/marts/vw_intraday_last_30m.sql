@@ -1,3 +1,10 @@
+-- Ostatnie 30 minut barów 1-min.
+-- - now() jest STABLE → pruning partycji przy starcie wykonania (zwykle tylko partycja bieżącego dnia),
+-- - bez filtra po symbolu: bitmap scan po BRIN(ts_utc),
+-- - z filtrem po symbolu: index-only scan po (symbol_id, ts_utc DESC) INCLUDE OHLCV
+--   (etl/sql/facts/idx_fact_price_intraday_raw.sql).
+-- Bez ORDER BY w widoku – sortowanie całego okna przed filtrem wołającego było
+-- zbędne (dashboard i tak sortuje po ts_utc).
 CREATE OR REPLACE VIEW mart.vw_intraday_last_30m AS
 SELECT
     s.symbol,
@@ -8,6 +15,5 @@ SELECT
     f.close,
     f.volume
 FROM fact_price_intraday_raw f
-JOIN dim_symbol s USING (symbol_id)
-WHERE f.ts_utc >= now() - interval '30 minutes'
-ORDER BY s.symbol, f.ts_utc;
+JOIN dim_symbol s ON s.symbol_id = f.symbol_id
+WHERE f.ts_utc >= now() - interval '30 minutes';
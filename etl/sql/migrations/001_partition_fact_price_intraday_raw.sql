@@ -0,0 +1,39 @@
+-- Migracja: fact_price_intraday_raw (jedna sterta) -> tabela partycjonowana po ts_utc.
+-- Uruchamiać z psql z katalogu etl/sql/migrations:  psql stock_dw -f 001_partition_fact_price_intraday_raw.sql
+
+BEGIN;
+
+-- widoki zależą od starej tabeli (po OID) – odtwarzamy je na końcu
+DROP VIEW IF EXISTS mart.vw_intraday_last_30m;
+DROP MATERIALIZED VIEW IF EXISTS mart.mv_intraday_ohlcv_5m;  -- zastąpiony przez mart.intraday_ohlcv_5m
+
+ALTER TABLE fact_price_intraday_raw RENAME TO fact_price_intraday_raw_old;
+ALTER TABLE fact_price_intraday_raw_old
+    RENAME CONSTRAINT uq_fact_price_intraday_raw TO uq_fact_price_intraday_raw_old;
+ALTER TABLE fact_price_intraday_raw_old
+    RENAME CONSTRAINT fact_price_intraday_raw_pkey TO fact_price_intraday_raw_old_pkey;
+
+\ir ../facts/create_fact_price_intraday_raw.sql
+\ir ../facts/fn_ensure_fact_price_intraday_partition.sql
+
+SELECT ensure_fact_price_intraday_partition(d)
+FROM (
+    SELECT DISTINCT date_trunc('day', ts_utc AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS d
+    FROM fact_price_intraday_raw_old
+) days;
+
+SELECT ensure_fact_price_intraday_partition(now());
+
+INSERT INTO fact_price_intraday_raw
+SELECT * FROM fact_price_intraday_raw_old;
+
+SELECT setval(
+    pg_get_serial_sequence('fact_price_intraday_raw', 'intraday_id'),
+    coalesce((SELECT max(intraday_id) FROM fact_price_intraday_raw), 1)
+);
+
+DROP TABLE fact_price_intraday_raw_old;
+
+\ir ../marts/vw_intraday_last_30m.sql
+
+COMMIT;
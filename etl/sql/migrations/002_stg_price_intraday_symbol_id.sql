@@ -0,0 +1,21 @@
+-- Migracja: stg_price_intraday.symbol (text) -> symbol_id (integer).
+-- Loadery intraday rozwiązują symbol_id w Pythonie (SymbolIdCache),
+-- więc mikro-batch nie joinuje już dim_symbol.
+-- Uruchamiać przy zatrzymanych loaderach intraday:  psql stock_dw -f 002_stg_price_intraday_symbol_id.sql
+
+BEGIN;
+
+ALTER TABLE stg_price_intraday ADD COLUMN symbol_id integer;
+
+UPDATE stg_price_intraday s
+SET symbol_id = ds.symbol_id
+FROM dim_symbol ds
+WHERE ds.symbol = s.symbol;
+
+-- te wiersze i tak odpadłyby na JOIN w starym loaderze
+DELETE FROM stg_price_intraday WHERE symbol_id IS NULL;
+
+ALTER TABLE stg_price_intraday DROP COLUMN symbol;
+ALTER TABLE stg_price_intraday ALTER COLUMN symbol_id SET NOT NULL;
+
+COMMIT;
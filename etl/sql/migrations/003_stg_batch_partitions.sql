@@ -0,0 +1,17 @@
+-- Migracja: stg.stg_price / stg.stg_dividend (rosnące bez końca sterty)
+-- -> tabele partycjonowane po batch_id z UNLOGGED partycjami per batch.
+-- Stare batche są już w faktach, więc nie są przenoszone.
+-- Uruchamiać z psql z katalogu etl/sql/migrations, poza oknem nocnego ETL:
+--     psql stock_dw -f 003_stg_batch_partitions.sql
+
+BEGIN;
+
+\ir ../staging/create_stg_batch.sql
+
+DROP TABLE IF EXISTS stg.stg_price;
+DROP TABLE IF EXISTS stg.stg_dividend;
+
+\ir ../staging/create_stg_price.sql
+\ir ../staging/create_stg_dividend.sql
+
+COMMIT;
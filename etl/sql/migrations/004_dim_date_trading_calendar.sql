@@ -0,0 +1,23 @@
+-- Migracja: dim_date (date_sk, date_value, year, month, day) -> kalendarz giełdowy.
+-- Nowe kolumny wypełnia pierwszy run daily_price_job (ensure_dim_date)
+-- albo ręcznie:  python -c "from etl.utils.db import get_db; from etl.dims.load_dim_date import load_dim_date; load_dim_date(get_db().engine)"
+
+BEGIN;
+
+ALTER TABLE dim_date
+    ADD COLUMN IF NOT EXISTS quarter          integer,
+    ADD COLUMN IF NOT EXISTS iso_year         integer,
+    ADD COLUMN IF NOT EXISTS iso_week         integer,
+    ADD COLUMN IF NOT EXISTS week_start       date,
+    ADD COLUMN IF NOT EXISTS day_of_week      integer,
+    ADD COLUMN IF NOT EXISTS is_weekend       boolean,
+    ADD COLUMN IF NOT EXISTS is_holiday       boolean,
+    ADD COLUMN IF NOT EXISTS holiday_name     text,
+    ADD COLUMN IF NOT EXISTS is_trading_day   boolean,
+    ADD COLUMN IF NOT EXISTS trading_day_seq  integer;
+
+CREATE INDEX IF NOT EXISTS ix_dim_date_trading_day_seq
+    ON dim_date (trading_day_seq)
+    WHERE is_trading_day;
+
+COMMIT;
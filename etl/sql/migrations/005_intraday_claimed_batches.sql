@@ -0,0 +1,15 @@
+-- Migracja: claimowane batche stg_price_intraday -> fact_price_intraday_raw
+-- (etl/facts/load_fact_intraday.py). ingest_seq = kolejność wpisu do stagingu,
+-- używana do last-write-wins przy zdublowanych barach.
+--     psql stock_dw -f 005_intraday_claimed_batches.sql
+
+BEGIN;
+
+ALTER TABLE stg_price_intraday
+    ADD COLUMN IF NOT EXISTS ingest_seq bigint GENERATED BY DEFAULT AS IDENTITY;
+
+-- bez DEFAULT: na tabeli partycjonowanej to tylko zmiana katalogu, bez przepisywania
+ALTER TABLE fact_price_intraday_raw
+    ADD COLUMN IF NOT EXISTS ingest_seq bigint;
+
+COMMIT;
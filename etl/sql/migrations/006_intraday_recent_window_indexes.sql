@@ -0,0 +1,57 @@
+-- Migracja: indeksy dla odczytów ostatniego okna intraday + przepisany
+-- mart.vw_intraday_last_30m (etl/sql/facts/idx_fact_price_intraday_raw.sql).
+--
+-- Bez długiej blokady zapisu: indeks tworzony najpierw tylko na rodzicu (ON ONLY,
+-- nieważny), potem CONCURRENTLY na każdej partycji i dołączany (ATTACH PARTITION).
+-- Po dołączeniu ostatniej partycji indeks rodzica staje się ważny.
+-- CONCURRENTLY nie działa w transakcji – migracja bez BEGIN/COMMIT, idempotentna
+-- (po przerwaniu można puścić ponownie; nieudane indeksy INVALID usunąć ręcznie).
+--     psql stock_dw -f 006_intraday_recent_window_indexes.sql
+
+\set ON_ERROR_STOP on
+
+CREATE INDEX IF NOT EXISTS ix_fact_price_intraday_raw_ts_brin
+    ON ONLY fact_price_intraday_raw USING brin (ts_utc)
+    WITH (pages_per_range = 32, autosummarize = on);
+
+CREATE INDEX IF NOT EXISTS ix_fact_price_intraday_raw_symbol_ts_cov
+    ON ONLY fact_price_intraday_raw (symbol_id, ts_utc DESC)
+    INCLUDE (open, high, low, close, volume);
+
+-- ---------- indeksy partycji (CONCURRENTLY) + ATTACH ----------
+-- Partycje, które już mają indeks dołączony do rodzica (np. założone po ON ONLY
+-- przez ensure_fact_price_intraday_partition), są pomijane.
+
+CREATE TEMP VIEW _fpir_missing_indexes AS
+SELECT c.relname AS partition, p.parent, c.relname || p.suffix AS index_name, p.definition
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+CROSS JOIN (VALUES
+    ('ix_fact_price_intraday_raw_ts_brin', '_ts_brin',
+     'USING brin (ts_utc) WITH (pages_per_range = 32, autosummarize = on)'),
+    ('ix_fact_price_intraday_raw_symbol_ts_cov', '_symbol_ts_cov',
+     '(symbol_id, ts_utc DESC) INCLUDE (open, high, low, close, volume)')
+) AS p(parent, suffix, definition)
+WHERE i.inhparent = 'fact_price_intraday_raw'::regclass
+  AND NOT EXISTS (
+      SELECT 1
+      FROM pg_inherits ii
+      JOIN pg_index x ON x.indexrelid = ii.inhrelid
+      WHERE ii.inhparent = p.parent::regclass
+        AND x.indrelid = c.oid
+  );
+
+SELECT format('CREATE INDEX CONCURRENTLY IF NOT EXISTS %I ON %I ', index_name, partition) || definition
+FROM _fpir_missing_indexes
+\gexec
+
+SELECT format('ALTER INDEX %I ATTACH PARTITION %I', parent, index_name)
+FROM _fpir_missing_indexes
+\gexec
+
+-- ---------- widok ----------
+
+\ir ../marts/vw_intraday_last_30m.sql
+
+-- statystyki + visibility map (index-only scan) dla istniejących partycji
+VACUUM (ANALYZE) fact_price_intraday_raw;
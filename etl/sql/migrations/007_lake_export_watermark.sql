@@ -0,0 +1,22 @@
+-- Migracja: kolumna/indeksy pod przyrostowy eksport faktów do Parquet
+-- (etl/lake/export_parquet.py, watermark = load_ts).
+--     psql stock_dw -f 007_lake_export_watermark.sql
+--
+-- ADD COLUMN ... DEFAULT now(): now() nie jest VOLATILE, więc bez przepisywania
+-- tabeli – istniejące wiersze dostają czas migracji (pierwszy eksport i tak bierze wszystko).
+-- Indeksy BRIN budują się jednym przebiegiem; krótka blokada zapisu – poza sesją.
+
+BEGIN;
+
+ALTER TABLE fact_price_intraday_raw
+    ADD COLUMN IF NOT EXISTS load_ts timestamptz NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS ix_fact_price_intraday_raw_load_ts_brin
+    ON fact_price_intraday_raw USING brin (load_ts)
+    WITH (autosummarize = on);
+
+CREATE INDEX IF NOT EXISTS ix_fact_price_load_ts_brin
+    ON fact_price USING brin (load_ts)
+    WITH (autosummarize = on);
+
+COMMIT;
@@ -0,0 +1,9 @@
+-- Migracja: mart.indicators + mart.indicator_state (etl/marts/load_indicators.py).
+--     psql stock_dw -f 008_indicators_mart.sql
+-- Po migracji jednorazowo zasilić od zera (rebuild_indicators), dalej przyrostowo.
+
+BEGIN;
+
+\ir ../marts/tbl_indicators.sql
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Migracja: ensure_fact_price_intraday_partition sprawdza pokrycie po granicach
+-- podpiętych partycji (relpartbound) i przycina nowe partycje do sąsiadów –
+-- mieszane granulacje (dzienna z loadera, tygodniowa/miesięczna z joba) nie nachodzą na siebie.
+--     psql stock_dw -f 009_intraday_partition_bounds.sql
+-- Granulację dla loadera, stream_intraday.py i joba ustawia INTRADAY_PARTITION_GRANULARITY.
+
+BEGIN;
+
+\ir ../facts/fn_ensure_fact_price_intraday_partition.sql
+
+COMMIT;
@@ -0,0 +1,44 @@
+CREATE SCHEMA IF NOT EXISTS stg;
+
+-- Rejestr batchy stagingu EOD. Każdy batch = osobna partycja (UNLOGGED)
+-- stg.stg_price / stg.stg_dividend; po załadowaniu faktów i przekroczeniu
+-- retencji partycja jest usuwana (etl/staging/batches.py).
+
+CREATE TABLE IF NOT EXISTS stg.stg_batch (
+    batch_id         uuid        NOT NULL,
+    table_name       text        NOT NULL,   -- stg_price / stg_dividend
+    created_at       timestamptz NOT NULL DEFAULT now(),
+    facts_loaded_at  timestamptz,
+    dropped_at       timestamptz,
+    PRIMARY KEY (batch_id, table_name)
+);
+
+-- Tworzy (jeśli brak) partycję stg.<p_table> dla batcha i rejestruje batch.
+-- Nazwa: <p_table>_b<uuid bez myślników>. Partycja jest UNLOGGED – staging
+-- da się zawsze odtworzyć z ekstraktu, więc nie płacimy za WAL.
+-- (Sam rodzic nie może być UNLOGGED – Postgres na to nie pozwala, ale nie trzyma danych.)
+
+CREATE OR REPLACE FUNCTION stg.ensure_batch_partition(
+    p_table    text,
+    p_batch_id uuid
+)
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_name text := p_table || '_b' || replace(p_batch_id::text, '-', '');
+BEGIN
+    IF to_regclass(format('stg.%I', v_name)) IS NULL THEN
+        EXECUTE format(
+            'CREATE UNLOGGED TABLE stg.%I PARTITION OF stg.%I FOR VALUES IN (%L)',
+            v_name, p_table, p_batch_id
+        );
+    END IF;
+
+    INSERT INTO stg.stg_batch (batch_id, table_name)
+    VALUES (p_batch_id, p_table)
+    ON CONFLICT DO NOTHING;
+
+    RETURN 'stg.' || v_name;
+END;
+$$;
@@ -1,5 +1,7 @@
 CREATE SCHEMA IF NOT EXISTS stg;
 
+-- Partycja per batch_id (LIST), partycje UNLOGGED – zob. create_stg_batch.sql.
+
 CREATE TABLE IF NOT EXISTS stg.stg_dividend (
     load_ts   timestamptz NOT NULL DEFAULT now(),
     symbol    text        NOT NULL,
@@ -7,4 +9,4 @@ CREATE TABLE IF NOT EXISTS stg.stg_dividend (
     dividend  numeric     NOT NULL,
     source    text        NOT NULL,
     batch_id  uuid        NOT NULL
-);
+) PARTITION BY LIST (batch_id);
@@ -0,0 +1,18 @@
+CREATE SCHEMA IF NOT EXISTS stg;
+
+-- Partycja per batch_id (LIST), partycje UNLOGGED – zob. create_stg_batch.sql.
+-- Load faktów filtruje po batch_id → partition pruning, czyta tylko swój batch.
+
+CREATE TABLE IF NOT EXISTS stg.stg_price (
+    load_ts     timestamptz NOT NULL DEFAULT now(),
+    symbol      text        NOT NULL,
+    date_value  date        NOT NULL,
+    open        numeric,
+    high        numeric,
+    low         numeric,
+    close       numeric,
+    adj_close   numeric,
+    volume      bigint,
+    source      text        NOT NULL,
+    batch_id    uuid        NOT NULL
+) PARTITION BY LIST (batch_id);
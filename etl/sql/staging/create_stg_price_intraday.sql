@@ -1,9 +1,11 @@
 CREATE TABLE stg_price_intraday (
-    symbol       text NOT NULL,
+    symbol_id    integer NOT NULL,   -- rozwiązany w loaderze (SymbolIdCache)
     ts_utc       timestamptz NOT NULL,
     open         numeric(18,6),
     high         numeric(18,6),
     low          numeric(18,6),
     close        numeric(18,6),
-    volume       bigint
+    volume       bigint,
+    -- kolejność wpisu: przy zdublowanym barze wygrywa najwyższy (last-write-wins)
+    ingest_seq   bigint GENERATED BY DEFAULT AS IDENTITY
 );
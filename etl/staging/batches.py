@@ -0,0 +1,83 @@
+# etl/staging/batches.py
+
+from __future__ import annotations
+
+from typing import List
+
+from sqlalchemy import text
+
+STG_PRICE = "stg_price"
+STG_DIVIDEND = "stg_dividend"
+
+SQL_ENSURE = "SELECT stg.ensure_batch_partition(:table_name, CAST(:batch_id AS uuid));"
+
+SQL_MARK_LOADED = """
+UPDATE stg.stg_batch
+SET facts_loaded_at = now()
+WHERE batch_id = CAST(:batch_id AS uuid)
+  AND table_name = :table_name;
+"""
+
+# Do usunięcia: wszystko poza `keep_batches` najnowszymi batchami danej tabeli,
+# o ile fakty są już załadowane albo batch utknął (nieudany run) dłużej niż stale_hours.
+SQL_RETIRE_CANDIDATES = """
+SELECT batch_id, table_name
+FROM (
+    SELECT
+        b.*,
+        row_number() OVER (PARTITION BY table_name ORDER BY created_at DESC) AS rn
+    FROM stg.stg_batch b
+    WHERE dropped_at IS NULL
+) x
+WHERE rn > :keep_batches
+  AND (facts_loaded_at IS NOT NULL
+       OR created_at < now() - make_interval(hours => :stale_hours));
+"""
+
+SQL_MARK_DROPPED = """
+UPDATE stg.stg_batch
+SET dropped_at = now()
+WHERE batch_id = :batch_id
+  AND table_name = :table_name;
+"""
+
+
+def partition_name(table_name: str, batch_id) -> str:
+    return f"{table_name}_b{str(batch_id).replace('-', '')}"
+
+
+def create_batch_partition(conn, table_name: str, batch_id: str) -> str:
+    """
+    Zakłada UNLOGGED partycję stg.<table_name> dla batcha (idempotentne).
+    """
+    return conn.execute(
+        text(SQL_ENSURE), {"table_name": table_name, "batch_id": batch_id}
+    ).scalar_one()
+
+
+def mark_batch_loaded(conn, table_name: str, batch_id: str) -> None:
+    """
+    Wołać w tej samej transakcji co load faktów – znacznik commituje się razem z nimi.
+    """
+    conn.execute(text(SQL_MARK_LOADED), {"table_name": table_name, "batch_id": batch_id})
+
+
+def retire_stg_batches(engine, keep_batches: int = 3, stale_hours: int = 24) -> List[str]:
+    """
+    Usuwa (DROP) partycje batchy poza retencją. Zwraca nazwy usuniętych partycji.
+    `keep_batches` najnowszych batchy per tabela zostaje do debugowania.
+    """
+    dropped = []
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text(SQL_RETIRE_CANDIDATES),
+            {"keep_batches": keep_batches, "stale_hours": stale_hours},
+        ).fetchall()
+
+        for batch_id, table_name in rows:
+            name = partition_name(table_name, batch_id)
+            conn.execute(text(f'DROP TABLE IF EXISTS stg."{name}";'))
+            conn.execute(text(SQL_MARK_DROPPED), {"batch_id": batch_id, "table_name": table_name})
+            dropped.append(f"stg.{name}")
+
+    return sorted(dropped)
@@ -0,0 +1,176 @@
+# etl/staging/extract_cache.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+class ExtractCache:
+    """
+    Lokalny cache surowych wyników ekstrakcji (yfinance) w plikach Parquet.
+
+    - klucz: (kind, symbol, interval, start, end) → sha256, plik `<kind>/<ab>/<hash>.parquet`
+    - TTL: wpis starszy niż `ttl_seconds` (od zapisu) traktujemy jak brak
+    - LRU: odczyt ustawia atime; gdy katalog przekroczy `max_bytes`,
+      usuwamy najdawniej używane pliki
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None  # liczone leniwie, pełny skan tylko przy eviction
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ---------- klucze ----------
+
+    @staticmethod
+    def make_key(kind: str, symbol: str, interval: str, start, end) -> str:
+        payload = json.dumps(
+            [kind, symbol, interval, str(start), str(end)],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.root / kind / key[:2] / f"{key}.parquet"
+
+    # ---------- API ----------
+
+    def get(self, kind: str, symbol: str, interval: str, start, end) -> Optional[pd.DataFrame]:
+        path = self._path(kind, self.make_key(kind, symbol, interval, start, end))
+
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+
+        # mtime = moment zapisu (TTL), atime = ostatnie użycie (LRU)
+        if time.time() - st.st_mtime > self.ttl_seconds:
+            self._count("expired")
+            self._count("misses")
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            df = pd.read_parquet(path)
+        except Exception:
+            log.warning("Corrupted cache entry %s, dropping", path, exc_info=True)
+            path.unlink(missing_ok=True)
+            self._count("misses")
+            return None
+
+        os.utime(path, (time.time(), st.st_mtime))
+        self._count("hits")
+        return df
+
+    def put(self, kind: str, symbol: str, interval: str, start, end, df: pd.DataFrame) -> None:
+        path = self._path(kind, self.make_key(kind, symbol, interval, start, end))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # zapis atomowy: tmp + replace, żeby równoległe joby nie czytały połówek
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += path.stat().st_size
+        self._evict_if_needed()
+
+    def clear(self) -> None:
+        for path in self.root.rglob("*.parquet"):
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._approx_bytes = 0
+
+    # ---------- wewnętrzne ----------
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def _evict_if_needed(self) -> None:
+        if self._approx_bytes is not None and self._approx_bytes <= self.max_bytes:
+            return
+
+        entries = []
+        total = 0
+        for path in self.root.rglob("*.parquet"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+            total += st.st_size
+
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                total -= size
+                self._count("evictions")
+                if total <= self.max_bytes:
+                    break
+
+        with self._lock:
+            self._approx_bytes = total
+
+
+def default_cache() -> Optional[ExtractCache]:
+    """
+    Cache z konfiguracji środowiska; wyłączony, jeśli brak STOCK_DW_CACHE_DIR.
+
+        STOCK_DW_CACHE_DIR      katalog cache
+        STOCK_DW_CACHE_TTL      TTL w sekundach (domyślnie 6h)
+        STOCK_DW_CACHE_MAX_MB   limit rozmiaru (domyślnie 2048 MB)
+    """
+    root = os.getenv("STOCK_DW_CACHE_DIR")
+    if not root:
+        return None
+
+    return ExtractCache(
+        root,
+        ttl_seconds=float(os.getenv("STOCK_DW_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+        max_bytes=int(os.getenv("STOCK_DW_CACHE_MAX_MB", DEFAULT_MAX_BYTES // 1024 ** 2)) * 1024 ** 2,
+    )
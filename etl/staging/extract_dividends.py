@@ -1,40 +1,94 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import yfinance as yf
 import pandas as pd
 
+from etl.utils.rate_limit import TokenBucket
+
+
+log = logging.getLogger(__name__)
 
-def extract_dividends(tickers, start, end):
+COLUMNS = ["symbol", "ex_date", "dividend"]
+
+
+def _extract_symbol_dividends(symbol, start, end, cache=None, limiter=None):
+    """
+    Dywidendy jednego symbolu, już przefiltrowane do [start, end].
+    """
+    if cache is not None:
+        cached = cache.get("dividends", symbol, "div", start, end)
+        if cached is not None:
+            return None if cached.empty else cached
+
+    # limit dotyczy tylko prawdziwych zapytań do yfinance, nie trafień w cache
+    if limiter is not None:
+        limiter.acquire()
+    df = _download_symbol_dividends(symbol, start, end)
+
+    if cache is not None:
+        cache.put("dividends", symbol, "div", start, end,
+                  df if df is not None else pd.DataFrame(columns=COLUMNS))
+    return df
+
+
+def _download_symbol_dividends(symbol, start, end):
+    t = yf.Ticker(symbol)
+    divs = t.dividends  # Series: index = DatetimeIndex, values = dividend amount
+
+    if divs is None or divs.empty:
+        return None
+
+    df = divs.reset_index()
+    df.columns = ["ex_date", "dividend"]
+    df["symbol"] = symbol
+
+    df["ex_date"] = pd.to_datetime(df["ex_date"]).dt.date
+
+    if start:
+        df = df[df["ex_date"] >= pd.to_datetime(start).date()]
+    if end:
+        df = df[df["ex_date"] <= pd.to_datetime(end).date()]
+
+    if df.empty:
+        return None
+
+    return df[COLUMNS]
+
+
+def extract_dividends(tickers, start, end, max_workers=1, rate_per_sec=None, cache=None):
     """
     Zwraca dataframe:
       symbol, ex_date, dividend
     w zakresie dat [start, end].
+
+    max_workers > 1 włącza tryb równoległy: pula wątków + wspólny token bucket
+    (`rate_per_sec` zapytań do yfinance). Błąd jednego symbolu jest logowany
+    i nie przerywa pozostałych. `cache` (ExtractCache) pozwala odtworzyć
+    wynik z dysku przy retry/backfillu.
     """
 
     if isinstance(tickers, str):
         tickers = [tickers]
 
-    frames = []
-
-    for symbol in tickers:
-        t = yf.Ticker(symbol)
-        divs = t.dividends  # Series: index = DatetimeIndex, values = dividend amount
-
-        if divs is None or divs.empty:
-            continue
-
-        df = divs.reset_index()
-        df.columns = ["ex_date", "dividend"]
-        df["symbol"] = symbol
+    limiter = TokenBucket(rate_per_sec) if rate_per_sec and max_workers > 1 else None
 
-        df["ex_date"] = pd.to_datetime(df["ex_date"]).dt.date
+    def task(symbol):
+        try:
+            return _extract_symbol_dividends(symbol, start, end, cache, limiter)
+        except Exception:
+            log.warning("Dividend extract failed for %s", symbol, exc_info=True)
+            return None
 
-        if start:
-            df = df[df["ex_date"] >= pd.to_datetime(start).date()]
-        if end:
-            df = df[df["ex_date"] <= pd.to_datetime(end).date()]
+    if max_workers <= 1:
+        frames = [task(symbol) for symbol in tickers]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = list(pool.map(task, tickers))
 
-        frames.append(df)
+    frames = [f for f in frames if f is not None]
 
     if not frames:
-        return pd.DataFrame(columns=["symbol", "ex_date", "dividend"])
+        return pd.DataFrame(columns=COLUMNS)
 
-    return pd.concat(frames, ignore_index=True)[["symbol", "ex_date", "dividend"]]
+    return pd.concat(frames, ignore_index=True)
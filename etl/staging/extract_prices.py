@@ -2,12 +2,43 @@ import yfinance as yf
 import pandas as pd
 
 
-def extract_prices(tickers, start, end):
+COLUMNS = ["symbol", "date_value", "open", "high", "low", "close", "adj_close", "volume"]
+
+
+def extract_prices(tickers, start, end, cache=None):
     """
     Extract prices from yfinance and normalize to a flat DataFrame:
 
     columns: symbol, date_value, open, high, low, close, adj_close, volume
+
+    With `cache` (ExtractCache) every symbol is looked up on disk first,
+    only the misses are downloaded (in one call) and stored per symbol.
     """
+    if cache is None:
+        return _download_prices(tickers, start, end)
+
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+
+    frames = []
+    missing = []
+    for symbol in tickers:
+        cached = cache.get("prices", symbol, "1d", start, end)
+        if cached is None:
+            missing.append(symbol)
+        else:
+            frames.append(cached)
+
+    if missing:
+        fresh = _download_prices(missing, start, end)
+        for symbol in missing:
+            # pusty wynik też zapisujemy – replay nie powtórzy pustego zapytania
+            cache.put("prices", symbol, "1d", start, end, fresh[fresh["symbol"] == symbol])
+        frames.append(fresh)
+
+    return pd.concat(frames, ignore_index=True)[COLUMNS]
+
+
+def _download_prices(tickers, start, end):
     # Wymuszamy auto_adjust=False, żeby mieć kolumnę 'Adj Close'
     df = yf.download(
         tickers,
@@ -17,6 +48,10 @@ def extract_prices(tickers, start, end):
         progress=True,
     )
 
+    if df is None or df.empty:
+        # brak nowych notowań w zakresie (np. przyrostowy run w weekend)
+        return pd.DataFrame(columns=COLUMNS)
+
     # Przenosimy indeks Date do kolumny
     df = df.reset_index().rename(columns={"Date": "date_value"})
 
@@ -37,6 +72,17 @@ def extract_prices(tickers, start, end):
             # fallback: jeśli nie ma adj close, użyj close
             df["adj_close"] = df["close"]
 
-        return df[["symbol", "date_value", "open", "high", "low", "close", "adj_close", "volume"]]
+        return df[COLUMNS]
 
     # ===== CASE 2:
+    # jeden ticker → płaskie kolumny Open, High, ..., bez poziomu 'symbol'
+    symbol = tickers if isinstance(tickers, str) else list(tickers)[0]
+
+    df = df.rename(columns=str.lower)
+    if "adj close" in df.columns:
+        df = df.rename(columns={"adj close": "adj_close"})
+    else:
+        df["adj_close"] = df["close"]
+    df["symbol"] = symbol
+
+    return df[COLUMNS]
@@ -0,0 +1,167 @@
+# etl/staging/intraday/chunked_fetch.py
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from etl.staging.intraday.fetch_intraday import (
+    IntradayWatermark,
+    empty_intraday_frame,
+    apply_watermark,
+    download_intraday_symbols,
+)
+from etl.utils.metrics import REGISTRY, LATENCY_BUCKETS
+from etl.utils.rate_limit import TokenBucket
+
+
+@dataclass
+class ChunkReport:
+    symbols: List[str]
+    status: str  # ok | partial | late | error | still_running
+    seconds: float = 0.0
+    rows: int = 0
+    error: Optional[str] = None
+    retry: List[str] = field(default_factory=list)  # partial: symbole do ponowienia
+
+
+@dataclass
+class CycleReport:
+    seconds: float
+    rows: int
+    chunks: List[ChunkReport] = field(default_factory=list)
+
+    @property
+    def retry_symbols(self) -> List[str]:
+        out = []
+        for c in self.chunks:
+            if c.status == "partial":
+                out.extend(c.retry)
+            elif c.status != "ok":
+                out.extend(c.symbols)
+        return out
+
+    def summary(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for c in self.chunks:
+            out[c.status] = out.get(c.status, 0) + 1
+        return out
+
+
+class ChunkedIntradayFetcher:
+    """
+    Dzieli uniwersum symboli na paczki po `chunk_size` i pobiera je równolegle
+    (pula wątków). Wątek pobiera paczkę per symbol (yf.Ticker.history –
+    yf.download nie jest bezpieczny wątkowo), biorąc przed każdym zapytaniem
+    token ze wspólnego token bucketu, więc `rate_per_sec` limituje zapytania HTTP.
+
+    Cykl ma twardy deadline: paczka przestaje zaczynać nowe zapytania przed
+    deadline'em i oddaje to, co już pobrała (`partial` + symbole do ponowienia,
+    tak samo symbole z błędem). Paczki, które mimo to nie zdążą, są raportowane
+    jako `late` i nie blokują reszty. Watermark przesuwamy tylko dla paczek
+    zakończonych w terminie, więc spóźnione symbole w następnym cyklu
+    zostaną pobrane od starego watermarku – bez utraty barów. Wynik spóźnionej
+    paczki, który dotrze po deadline, jest odrzucany.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 10,
+        max_workers: int = 8,
+        rate_per_sec: float = 2.0,
+        cycle_deadline_s: float = 45.0,
+        interval: str = "1m",
+        watermark: Optional[IntradayWatermark] = None,
+    ):
+        self.chunk_size = chunk_size
+        self.cycle_deadline_s = cycle_deadline_s
+        self.interval = interval
+        self.watermark = watermark or IntradayWatermark()
+        self.limiter = TokenBucket(rate_per_sec, capacity=max_workers)
+        self.chunk_seconds = REGISTRY.histogram(
+            "stock_dw_intraday_fetch_chunk_seconds", LATENCY_BUCKETS, help="Czas pobrania jednej paczki symboli."
+        )
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="intraday-fetch")
+        # paczki z poprzednich cykli, które wciąż się wykonują (symbol -> future)
+        self._running: Dict[str, object] = {}
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _chunks(self, symbols: List[str]) -> List[List[str]]:
+        return [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+
+    def _run_chunk(self, symbols: List[str], start: pd.Timestamp, deadline: float):
+        t0 = time.monotonic()
+        frame, pending, errors = download_intraday_symbols(
+            symbols, start, self.interval, limiter=self.limiter, deadline=deadline
+        )
+        return frame, pending, errors, time.monotonic() - t0
+
+    def fetch_cycle(self, symbols) -> tuple[pd.DataFrame, CycleReport]:
+        t_start = time.monotonic()
+        deadline = t_start + self.cycle_deadline_s
+        symbols = list(symbols)
+
+        # symbole z paczek, które wciąż wiszą – nie dokładamy im nowych zapytań
+        self._running = {s: f for s, f in self._running.items() if not f.done()}
+        busy = [s for s in symbols if s in self._running]
+        todo = [s for s in symbols if s not in self._running]
+
+        report = CycleReport(seconds=0.0, rows=0)
+        if busy:
+            report.chunks.append(ChunkReport(symbols=busy, status="still_running"))
+
+        futures = {}
+        for chunk in self._chunks(todo):
+            start = self.watermark.window_start(chunk)
+            fut = self._pool.submit(self._run_chunk, chunk, start, deadline)
+            futures[fut] = chunk
+
+        frames = []
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                chunk = futures[fut]
+                try:
+                    frame, pending, errors, seconds = fut.result()
+                except Exception as e:  # błąd jednej paczki nie przerywa cyklu
+                    report.chunks.append(ChunkReport(symbols=chunk, status="error", error=repr(e)))
+                    continue
+
+                self.chunk_seconds.observe(seconds)
+                # watermark przesuwa się tylko dla symboli obecnych w ramce –
+                # niepobrane i błędne zostaną pobrane od starego watermarku
+                frame = apply_watermark(frame, self.watermark)
+                frames.append(frame)
+                retry = pending + list(errors)
+                report.chunks.append(ChunkReport(
+                    symbols=chunk,
+                    status="partial" if retry else "ok",
+                    seconds=seconds,
+                    rows=len(frame),
+                    error="; ".join(f"{s}: {e}" for s, e in errors.items()) or None,
+                    retry=retry,
+                ))
+
+        for fut in pending:
+            chunk = futures[fut]
+            if not fut.cancel():
+                for s in chunk:
+                    self._running[s] = fut
+            report.chunks.append(
+                ChunkReport(symbols=chunk, status="late", seconds=time.monotonic() - t_start)
+            )
+
+        result = pd.concat(frames, ignore_index=True) if frames else empty_intraday_frame()
+        report.rows = len(result)
+        report.seconds = time.monotonic() - t_start
+        return result, report
@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import pandas as pd
 import datetime as dt
+import threading
+import time
 
-from typing import Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from yfinance.exceptions import YFPricesMissingError
 import yfinance as yf
@@ -14,8 +16,15 @@ import yfinance as yf
 Row = Tuple[str, dt.datetime, float, float, float, float, int]
 # (symbol, ts_utc, open, high, low, close, volume)
 
+ROW_COLUMNS = ["symbol", "ts_utc", "open", "high", "low", "close", "volume"]
 
-def fetch_intraday(symbols: Iterable[str]) -> List[Row]:
+# yf.download zeruje i wypełnia globalny stan modułu (yfinance.shared._DFS/_ERRORS),
+# więc równoległe wywołania mieszają sobie wyniki – serializujemy je.
+# Równoległość per wątek: download_intraday_symbols (yf.Ticker.history).
+_YF_DOWNLOAD_LOCK = threading.Lock()
+
+
+def fetch_intraday(symbols: Iterable[str], cache=None) -> List[Row]:
     """
     Pobiera najnowsze dane intraday (1m) dla podanych tickerów z yfinance.
 
@@ -28,24 +37,51 @@ def fetch_intraday(symbols: Iterable[str]) -> List[Row]:
     - Dla uproszczenia pobieramy małe okno czasowe (ostatnie 2 minuty)
       i bierzemy ostatnią świeczkę dla każdego symbolu.
       Ewentualne duplikaty wytnie ON CONFLICT w loaderze do fact.
+    - `cache` (ExtractCache): klucz to symbol + okno zaokrąglone do minuty,
+      więc powtórzony run w tej samej minucie nie idzie do yfinance.
     """
     symbols = list(symbols)
     if not symbols:
         return []
 
-    end = dt.datetime.utcnow()
+    end = dt.datetime.utcnow().replace(second=0, microsecond=0)
     start = end - dt.timedelta(minutes=2)
 
+    if cache is None:
+        return _download_last_bars(symbols)
+
+    rows: List[Row] = []
+    missing = []
+    for symbol in symbols:
+        cached = cache.get("intraday", symbol, "1m", start, end)
+        if cached is None:
+            missing.append(symbol)
+        else:
+            rows.extend(cached.itertuples(index=False, name=None))
+
+    if missing:
+        fresh = _download_last_bars(missing)
+        by_symbol = {r[0]: r for r in fresh}
+        for symbol in missing:
+            frame = pd.DataFrame([by_symbol[symbol]] if symbol in by_symbol else [], columns=ROW_COLUMNS)
+            cache.put("intraday", symbol, "1m", start, end, frame)
+        rows.extend(fresh)
+
+    return rows
+
+
+def _download_last_bars(symbols: List[str]) -> List[Row]:
     try:
-        data = yf.download(
-            tickers=" ".join(symbols),
-            period="1d",
-            interval="1m",
-            group_by="ticker",
-            auto_adjust=False,
-            progress=False,
-            threads=True,
-        )
+        with _YF_DOWNLOAD_LOCK:
+            data = yf.download(
+                tickers=" ".join(symbols),
+                period="1d",
+                interval="1m",
+                group_by="ticker",
+                auto_adjust=False,
+                progress=False,
+                threads=True,
+            )
     except YFPricesMissingError:
         return []
 
@@ -81,3 +117,214 @@ def fetch_intraday(symbols: Iterable[str]) -> List[Row]:
         )
 
     return rows
+
+
+# ---------- tryb przyrostowy: wszystkie bary od watermarku ----------
+
+# symbol bez watermarku (pierwszy cykl po starcie) – tyle historii dociągamy
+DEFAULT_BACKFILL = dt.timedelta(minutes=30)
+
+
+def _utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert("UTC") if ts.tzinfo else ts.tz_localize("UTC")
+
+
+class IntradayWatermark:
+    """
+    Ostatni widziany ts_utc per symbol (w pamięci procesu).
+    """
+
+    def __init__(self, initial: Optional[Dict[str, dt.datetime]] = None):
+        self._last: Dict[str, pd.Timestamp] = {
+            sym: _utc(ts) for sym, ts in (initial or {}).items()
+        }
+
+    def get(self, symbol: str) -> Optional[pd.Timestamp]:
+        return self._last.get(symbol)
+
+    def as_series(self) -> pd.Series:
+        return pd.Series(self._last, dtype="datetime64[ns, UTC]")
+
+    def window_start(self, symbols: Iterable[str], backfill: dt.timedelta = DEFAULT_BACKFILL) -> pd.Timestamp:
+        """
+        Najwcześniejszy potrzebny moment dla grupy symboli (minimalne okno zapytania).
+        """
+        fallback = pd.Timestamp.now(tz="UTC").floor("min") - backfill
+        starts = [self._last.get(s, fallback) for s in symbols]
+        return min(starts) if starts else fallback
+
+    def advance(self, frame: pd.DataFrame) -> None:
+        if frame.empty:
+            return
+        latest = frame.groupby("symbol", sort=False)["ts_utc"].max()
+        for sym, ts in latest.items():
+            prev = self._last.get(sym)
+            if prev is None or ts > prev:
+                self._last[sym] = ts
+
+
+def empty_intraday_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "symbol": pd.Series(dtype="object"),
+            "ts_utc": pd.Series(dtype="datetime64[ns, UTC]"),
+            "open": pd.Series(dtype="float64"),
+            "high": pd.Series(dtype="float64"),
+            "low": pd.Series(dtype="float64"),
+            "close": pd.Series(dtype="float64"),
+            "volume": pd.Series(dtype="int64"),
+        }
+    )
+
+
+def _to_long_frame(data: pd.DataFrame, symbols: List[str]) -> pd.DataFrame:
+    """
+    Wynik yf.download → płaska ramka ROW_COLUMNS, w całości wektorowo.
+    """
+    if data is None or data.empty:
+        return empty_intraday_frame()
+
+    if isinstance(data.columns, pd.MultiIndex):
+        # group_by="ticker" → kolumny (ticker, field)
+        long = data.stack(level=0)
+        long.index = long.index.set_names(["ts_utc", "symbol"])
+        long = long.reset_index()
+    else:
+        long = data.rename_axis("ts_utc").reset_index()
+        long["symbol"] = symbols[0]
+
+    long = long.rename(columns=str.lower).dropna(subset=["close"])
+
+    ts = pd.to_datetime(long["ts_utc"])
+    long["ts_utc"] = ts.dt.tz_convert("UTC") if ts.dt.tz is not None else ts.dt.tz_localize("UTC")
+    long["volume"] = long["volume"].fillna(0).astype("int64")
+
+    return long[ROW_COLUMNS].reset_index(drop=True)
+
+
+def download_intraday_window(
+    symbols: List[str],
+    start: pd.Timestamp,
+    interval: str = "1m",
+) -> pd.DataFrame:
+    """
+    Jedno zapytanie yfinance o okno [start, teraz] → ramka ROW_COLUMNS.
+    Czysta funkcja (bez watermarku). yf.download dzieli globalny stan modułu,
+    więc równoległe wywołania czekają na _YF_DOWNLOAD_LOCK – z wielu wątków
+    lepiej download_intraday_symbols.
+    """
+    try:
+        with _YF_DOWNLOAD_LOCK:
+            data = yf.download(
+                tickers=symbols,
+                start=start.to_pydatetime(),
+                interval=interval,
+                group_by="ticker",
+                auto_adjust=False,
+                progress=False,
+                threads=True,
+            )
+    except YFPricesMissingError:
+        return empty_intraday_frame()
+
+    return _to_long_frame(data, symbols)
+
+
+# timeout jednego zapytania yf.Ticker.history; nowe zapytanie startuje tylko,
+# jeśli zdąży przed deadline'em paczki
+REQUEST_TIMEOUT_S = 10.0
+
+
+def download_intraday_symbols(
+    symbols: List[str],
+    start: pd.Timestamp,
+    interval: str = "1m",
+    limiter=None,
+    deadline: Optional[float] = None,
+) -> Tuple[pd.DataFrame, List[str], Dict[str, str]]:
+    """
+    Okno [start, teraz] symbol po symbolu przez yf.Ticker(...).history –
+    bez globalnego stanu yf.download, więc bezpieczne z wielu wątków
+    (każdy wątek puli pobiera swoją paczkę).
+
+    - `limiter` (TokenBucket): jeden token na zapytanie (= na symbol),
+    - `deadline` (time.monotonic()): po nim nie startujemy nowych zapytań.
+
+    Zwraca (bary ROW_COLUMNS pobrane do tej pory, symbole niepobrane przed
+    deadline'em, błędy per symbol). Błąd jednego symbolu nie wyrzuca barów pozostałych.
+    """
+    frames = []
+    errors: Dict[str, str] = {}
+    for n, symbol in enumerate(symbols):
+        if deadline is not None:
+            remaining = deadline - REQUEST_TIMEOUT_S - time.monotonic()
+            if remaining <= 0:
+                return _concat_frames(frames), list(symbols[n:]), errors
+            if limiter is not None and not limiter.acquire(timeout=remaining):
+                return _concat_frames(frames), list(symbols[n:]), errors
+        elif limiter is not None:
+            limiter.acquire()
+
+        try:
+            data = yf.Ticker(symbol).history(
+                start=start.to_pydatetime(),
+                interval=interval,
+                auto_adjust=False,
+                actions=False,
+                timeout=REQUEST_TIMEOUT_S,
+            )
+        except YFPricesMissingError:
+            continue
+        except Exception as e:  # jeden symbol nie przerywa paczki
+            errors[symbol] = repr(e)
+            continue
+        frame = _to_long_frame(data, [symbol])
+        if not frame.empty:
+            frames.append(frame)
+
+    return _concat_frames(frames), [], errors
+
+
+def _concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    if not frames:
+        return empty_intraday_frame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def apply_watermark(frame: pd.DataFrame, watermark: IntradayWatermark) -> pd.DataFrame:
+    """
+    Zostawia bary nie starsze od watermarku danego symbolu i przesuwa watermark.
+    Bar równy watermarkowi jest wysyłany ponownie: ostatni bar 1m bywa jeszcze
+    w trakcie formowania (częściowe OHLCV), a upsert faktu (last-write-wins po
+    ingest_seq) podmienia go na pełną wersję.
+    """
+    if frame.empty:
+        return frame
+
+    last_seen = frame["symbol"].map(watermark.as_series())
+    frame = frame[last_seen.isna() | (frame["ts_utc"] >= last_seen)].reset_index(drop=True)
+
+    watermark.advance(frame)
+    return frame
+
+
+def fetch_intraday_since(
+    symbols: Iterable[str],
+    watermark: IntradayWatermark,
+    interval: str = "1m",
+) -> pd.DataFrame:
+    """
+    Pobiera wszystkie bary od watermarku każdego symbolu (ostatni widziany bar
+    ponownie – mógł być niepełny), także te, które "przepadłyby" przy spóźnionej
+    pętli – i przesuwa watermark.
+
+    Zapytanie obejmuje tylko okno [min(watermark), teraz], a nie cały dzień.
+    Zwraca DataFrame z kolumnami ROW_COLUMNS (ts_utc w UTC), bez konwersji per wiersz.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return empty_intraday_frame()
+
+    frame = download_intraday_window(symbols, watermark.window_start(symbols), interval)
+    return apply_watermark(frame, watermark)
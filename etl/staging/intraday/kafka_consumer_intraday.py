@@ -1,51 +1,140 @@
 from confluent_kafka import Consumer
-import pickle
+import logging
+import math
+import os
+import time
 
-from load_staging import get_pg_connection, load_intraday_staging
+from etl.staging.intraday.load_staging import get_pg_connection, load_intraday_staging
+from etl.staging.intraday.symbol_cache import SymbolIdCache
+from etl.staging.intraday.tick_codec import MAX_TICKS_PER_MESSAGE, TickDecodeError, decode_batch
+from etl.utils.metrics import REGISTRY, LATENCY_BUCKETS, SIZE_BUCKETS, start_exporter_from_env
+
+log = logging.getLogger(__name__)
 
 TOPIC = "ticks_intraday_v1"
 
+# batch zamykamy po N wierszach albo T ms od pierwszej wiadomości – co pierwsze
+BATCH_MAX_ROWS = int(os.getenv("INTRADAY_BATCH_MAX_ROWS", "5000"))
+BATCH_MAX_MS = int(os.getenv("INTRADAY_BATCH_MAX_MS", "500"))
+
+STATS_EVERY_SECONDS = 30
+
+batch_rows_hist = REGISTRY.histogram(
+    "stock_dw_intraday_consumer_batch_rows", SIZE_BUCKETS, help="Wiersze w batchu do stagingu."
+)
+flush_seconds_hist = REGISTRY.histogram(
+    "stock_dw_intraday_consumer_flush_seconds", LATENCY_BUCKETS, help="Insert do stagingu + commit offsetów."
+)
+batch_latency_hist = REGISTRY.histogram(
+    "stock_dw_intraday_consumer_batch_latency_seconds",
+    LATENCY_BUCKETS,
+    help="Od pierwszej wiadomości batcha do commitu offsetów.",
+)
+messages_total = REGISTRY.counter("stock_dw_intraday_consumer_messages_total", help="Odebrane wiadomości Kafki.")
+ticks_total = REGISTRY.counter("stock_dw_intraday_consumer_ticks_total", help="Ticki zapisane do stagingu.")
+errors_total = REGISTRY.counter(
+    "stock_dw_intraday_consumer_errors_total", help="Błędy konsumenta i niepoprawne payloady."
+)
+last_flush = REGISTRY.gauge(
+    "stock_dw_intraday_consumer_last_flush_timestamp_seconds", help="Czas ostatniego zapisu batcha."
+)
+
+
+def flush_batch(consumer, conn, symbol_ids, batch, first_msg_at) -> None:
+    """
+    Jeden bulk insert do stagingu, COMMIT w Postgresie, dopiero potem
+    synchroniczny commit offsetów w Kafce. Awaria między tymi krokami daje
+    ponowne dostarczenie (at-least-once) – duplikaty wytnie ON CONFLICT w fact.
+    """
+    t0 = time.monotonic()
+    rows = load_intraday_staging(conn, batch, symbol_ids)  # commituje transakcję
+    consumer.commit(asynchronous=False)
+    done = time.monotonic()
+
+    ticks_total.inc(rows)
+    last_flush.set_to_now()
+
+    batch_rows_hist.observe(len(batch))
+    flush_seconds_hist.observe(done - t0)
+    batch_latency_hist.observe(done - first_msg_at)
+
+
+def run_batched(consumer, conn, max_rows=BATCH_MAX_ROWS, max_ms=BATCH_MAX_MS):
+    # symbol -> symbol_id raz na proces; nowe symbole dociągane przy pierwszym wystąpieniu
+    symbol_ids = SymbolIdCache(conn)
+    batch = []
+    first_msg_at = None
+    last_stats = time.monotonic()
+
+    while True:
+        if batch:
+            timeout = max(0.0, first_msg_at + max_ms / 1000 - time.monotonic())
+        else:
+            timeout = 1.0
+
+        # wiadomość niesie do MAX_TICKS_PER_MESSAGE ticków – pobieramy tyle wiadomości,
+        # żeby batch przekroczył max_rows najwyżej o jedną (offsety commitujemy
+        # za wszystkie pobrane, więc nie można flushować w połowie listy)
+        num_messages = max(1, math.ceil((max_rows - len(batch)) / MAX_TICKS_PER_MESSAGE))
+        msgs = consumer.consume(num_messages=num_messages, timeout=timeout)
+
+        for msg in msgs:
+            if msg.error():
+                errors_total.inc()
+                log.error("consumer error: %s", msg.error())
+                continue
+            messages_total.inc()
+            try:
+                ticks = decode_batch(msg.value())
+            except TickDecodeError as e:
+                errors_total.inc()
+                log.error("bad payload at offset %s: %s", msg.offset(), e)
+                continue
+            if first_msg_at is None:
+                first_msg_at = time.monotonic()
+            batch.extend(ticks)
+
+        if batch and (
+            len(batch) >= max_rows
+            or time.monotonic() - first_msg_at >= max_ms / 1000
+        ):
+            flush_batch(consumer, conn, symbol_ids, batch, first_msg_at)
+            batch = []
+            first_msg_at = None
+
+        if time.monotonic() - last_stats >= STATS_EVERY_SECONDS:
+            log.info(
+                "batch_rows=%s flush_s=%s latency_s=%s symbol_cache_hits=%d misses=%d",
+                batch_rows_hist.snapshot(),
+                flush_seconds_hist.snapshot(),
+                batch_latency_hist.snapshot(),
+                symbol_ids.hits,
+                symbol_ids.misses,
+            )
+            last_stats = time.monotonic()
+
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    start_exporter_from_env()
+
     consumer = Consumer({
         "bootstrap.servers": "localhost:9092",
         "group.id": "intraday_loader",
         "auto.offset.reset": "latest",
+        # offsety commitujemy sami, po zapisie do bazy
+        "enable.auto.commit": False,
     })
 
     consumer.subscribe([TOPIC])
     conn = get_pg_connection()
 
-    batch = []
-    BATCH_SIZE = 1
-
     try:
-        while True:
-            msg = consumer.poll(timeout=1.0)
-            if msg is None:
-                continue
-            if msg.error():
-                print(f"❌ Consumer error: {msg.error()}")
-                continue
-            print("⬇️ received message from Kafka")
-            row = pickle.loads(msg.value())
-            print(row)
-
-            row = pickle.loads(msg.value())
-            batch.append(row)
-
-            if len(batch) >= BATCH_SIZE:
-                load_intraday_staging(conn, batch)
-                conn.commit()
-                batch.clear()
-
+        run_batched(consumer, conn)
     finally:
-        if batch:
-            load_intraday_staging(conn, batch)
-            conn.commit()
+        # niezapisany batch nie ma commitu offsetów → wróci po restarcie
         consumer.close()
         conn.close()
-    
 
 
 if __name__ == "__main__":
@@ -1,31 +1,43 @@
 from confluent_kafka import Producer
-import pickle
+import logging
 import time
 from datetime import datetime, timezone
 import random
 
-from fetch_intraday import fetch_intraday
-from load_staging import get_pg_connection
+from etl.staging.intraday.fetch_intraday import IntradayWatermark, fetch_intraday_since
+from etl.staging.intraday.load_staging import get_pg_connection
+from etl.staging.intraday.symbol_cache import SymbolIdCache
+from etl.staging.intraday.tick_codec import MAX_TICKS_PER_MESSAGE, encode_frame
+from etl.utils.metrics import REGISTRY, LATENCY_BUCKETS, start_exporter_from_env
 
-TOPIC = "ticks_intraday_v1"
+log = logging.getLogger(__name__)
 
+TOPIC = "ticks_intraday_v1"
 
-def load_active_symbols(conn) -> list[str]:
-    with conn.cursor() as cur:
-        cur.execute("select symbol from dim_symbol;")
-        return [r[0] for r in cur.fetchall()]
+fetch_seconds_hist = REGISTRY.histogram(
+    "stock_dw_intraday_producer_fetch_seconds", LATENCY_BUCKETS, help="Pobranie nowych barów z yfinance."
+)
+messages_total = REGISTRY.counter("stock_dw_intraday_producer_messages_total", help="Wysłane wiadomości.")
+ticks_total = REGISTRY.counter("stock_dw_intraday_producer_ticks_total", help="Wysłane ticki.")
+bytes_total = REGISTRY.counter("stock_dw_intraday_producer_bytes_total", help="Bajty payloadów.")
+delivery_failures_total = REGISTRY.counter(
+    "stock_dw_intraday_producer_delivery_failures_total", help="Nieudane dostarczenia do Kafki."
+)
+last_send = REGISTRY.gauge(
+    "stock_dw_intraday_producer_last_send_timestamp_seconds", help="Czas ostatniej wysyłki ticków."
+)
 
 
 def delivery_report(err, msg):
     if err:
-        print(f"❌ Delivery failed: {err}")
+        delivery_failures_total.inc()
+        log.error("delivery failed: %s", err)
 
 
 def generate_fake_rows(symbols):
     """
-    Generuje testowe 1-min ticki dla podanych symboli.
-    DOPASUJ strukturę 'row' do tego, co normalnie zwraca fetch_intraday()
-    i czego oczekuje load_intraday_staging().
+    Generuje testowe 1-min ticki dla podanych symboli – te same krotki
+    (symbol, ts_utc, open, high, low, close, volume), co fetch_intraday().
     """
     now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
     rows = []
@@ -38,26 +50,15 @@ def generate_fake_rows(symbols):
         l = min(o, c) - random.uniform(0, 0.3)
         v = random.randint(100, 10_000)
 
-        # jeśli normalnie używasz SŁOWNIKÓW:
-        rows.append(
-            {
-                "symbol": sym,
-                "ts_utc": now,
-                "open": o,
-                "high": h,
-                "low": l,
-                "close": c,
-                "volume": v,
-            }
-        )
-
-        # jeśli używasz KROTEK, zamień powyższe na:
-        # rows.append((sym, now, o, h, l, c, v))
+        rows.append((sym, now, o, h, l, c, v))
 
     return rows
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    start_exporter_from_env()
+
     producer = Producer(
         {
             "bootstrap.servers": "localhost:9092",
@@ -67,41 +68,33 @@ def main():
     )
 
     conn = get_pg_connection()
-    symbols = load_active_symbols(conn)
+    symbols = SymbolIdCache(conn).symbols()
     conn.close()
 
-
-    last_ts_per_symbol = {}
+    watermark = IntradayWatermark()
 
     try:
         while True:
-            rows = fetch_intraday(symbols)
-
-            filtered_rows = []
-            for symbol, ts, o, h, l, c, v in rows:
-                last_ts = last_ts_per_symbol.get(symbol)
-                if last_ts == ts:
-                    # ten sam bar co poprzednio -> pomijamy
-                    continue
-
-                # nowy bar dla symbolu
-                last_ts_per_symbol[symbol] = ts
-                filtered_rows.append((symbol, ts, o, h, l, c, v))
+            # tylko bary nowsze niż ostatnio wysłane – także kilka naraz po spóźnionej pętli
+            t0 = time.monotonic()
+            bars = fetch_intraday_since(symbols, watermark)
+            fetch_seconds_hist.observe(time.monotonic() - t0)
 
-            if not filtered_rows:
-                print("Rynek zamknięty, czekam na nowe ticki...")
+            if bars.empty:
+                log.info("no new bars (market closed?), waiting ...")
                 time.sleep(10)
                 continue  # wracamy do while True
 
-            for row in filtered_rows:
-                print("Yfinance zwraca nowe dane...", row)
-                producer.produce(
-                    TOPIC,
-                    value=pickle.dumps(row),
-                    on_delivery=delivery_report,
-                )
+            log.info("sending %d new bars", len(bars))
+            for i in range(0, len(bars), MAX_TICKS_PER_MESSAGE):
+                payload = encode_frame(bars.iloc[i:i + MAX_TICKS_PER_MESSAGE])
+                producer.produce(TOPIC, value=payload, on_delivery=delivery_report)
+                messages_total.inc()
+                bytes_total.inc(len(payload))
 
             producer.flush()
+            ticks_total.inc(len(bars))
+            last_send.set_to_now()
             time.sleep(60)
 
     finally:
@@ -6,13 +6,22 @@ import datetime as dt
 from typing import Iterable, Sequence, Tuple
 
 import os
+import pandas as pd
 import psycopg2
 from psycopg2.extras import execute_values
 
+from etl.staging.copy_loader import copy_frame
+from etl.staging.intraday.symbol_cache import SymbolIdCache
+from etl.utils.db_timing import TimedCursor
+
 
 # 1. Typ jednego wiersza z fetch_intraday
 Row = Tuple[str, dt.datetime, float, float, float, float, int]
 
+# symbol rozwiązany na symbol_id po stronie Pythona (SymbolIdCache) –
+# loader fact nie musi joinować dim_symbol w każdym mikro-batchu
+STAGING_COLUMNS = ["symbol_id", "ts_utc", "open", "high", "low", "close", "volume"]
+
 
 # 2. Funkcja pomocnicza do uzyskania połączenia z Postgres
 def get_pg_connection():
@@ -31,6 +40,7 @@ def get_pg_connection():
         dbname=os.getenv("PGDATABASE", "stock_dw"),
         user=os.getenv("PGUSER", "postgres"),
         password=os.getenv("PGPASSWORD", "postgres"),
+        cursor_factory=TimedCursor,
     )
 
 
@@ -38,6 +48,7 @@ def get_pg_connection():
 def load_intraday_staging(
     conn,
     rows: Sequence[Row],
+    symbol_ids: SymbolIdCache,
 ) -> int:
     """
     Ładuje zebrane ticki intraday do tabeli stg_price_intraday.
@@ -45,34 +56,63 @@ def load_intraday_staging(
     :param conn: otwarte połączenie psycopg2 do bazy.
     :param rows: sekwencja krotek:
                  (symbol, ts_utc, open, high, low, close, volume)
+    :param symbol_ids: cache symbol -> symbol_id; ticki nieznanych symboli
+                       są pomijane.
     :return: liczba wierszy załadowanych do stagingu.
     """
     if not rows:
         return 0
 
+    ids = symbol_ids.resolve({r[0] for r in rows})
+    rows = [(ids[r[0]],) + tuple(r[1:]) for r in rows if r[0] in ids]
+    if not rows:
+        return 0
+
     sql = """
         INSERT INTO stg_price_intraday
-            (symbol, ts_utc, open, high, low, close, volume)
+            (symbol_id, ts_utc, open, high, low, close, volume)
         VALUES %s
     """
 
+    # page_size = len(rows) → jeden INSERT ... VALUES na cały batch
     with conn.cursor() as cur:
-        execute_values(cur, sql, rows)
+        execute_values(cur, sql, rows, page_size=len(rows))
 
     conn.commit()
     return len(rows)
 
 
-# 4. Prosty CLI do ręcznego testu
+# 4. Wariant wektorowy: cała ramka z fetch_intraday_since() jednym COPY
+def load_intraday_staging_frame(conn, df: pd.DataFrame, symbol_ids: SymbolIdCache) -> int:
+    """
+    Ładuje ramkę (symbol, ts_utc, open, high, low, close, volume)
+    do stg_price_intraday przez COPY, bez konwersji per wiersz.
+    """
+    if df.empty:
+        return 0
+
+    df = df.assign(symbol_id=symbol_ids.map_series(df["symbol"]))
+    df = df[df["symbol_id"].notna()]
+    if df.empty:
+        return 0
+
+    with conn.cursor() as cur:
+        copy_frame(cur, df, "stg_price_intraday", STAGING_COLUMNS)
+
+    conn.commit()
+    return len(df)
+
+
+# 5. Prosty CLI do ręcznego testu
 if __name__ == "__main__":
-    from fetch_intraday import fetch_intraday
+    from etl.staging.intraday.fetch_intraday import fetch_intraday
 
     symbols = ["AAPL", "MSFT"]
 
     conn = get_pg_connection()
     try:
         ticks = fetch_intraday(symbols)
-        inserted = load_intraday_staging(conn, ticks)
+        inserted = load_intraday_staging(conn, ticks, SymbolIdCache(conn))
         print(f"Załadowano {inserted} wierszy do stg_price_intraday.")
     finally:
         conn.close()
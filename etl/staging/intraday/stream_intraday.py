@@ -1,47 +1,120 @@
+import logging
+import os
 import time
-from pathlib import Path
 
-from fetch_intraday import fetch_intraday
-from load_staging import get_pg_connection, load_intraday_staging
+from etl.facts.load_fact_intraday import load_intraday_claims
+from etl.marts.load_indicators import update_indicators_for_buckets
+from etl.marts.load_intraday_ohlcv_5m import upsert_intraday_ohlcv_5m
+from etl.staging.intraday.chunked_fetch import ChunkedIntradayFetcher
+from etl.staging.intraday.fetch_intraday import IntradayWatermark
+from etl.staging.intraday.load_staging import get_pg_connection, load_intraday_staging_frame
+from etl.staging.intraday.symbol_cache import SymbolIdCache
+from etl.utils.db_timing import track_db_time
+from etl.utils.metrics import REGISTRY, LATENCY_BUCKETS, start_exporter_from_env
 
+log = logging.getLogger(__name__)
 
-SQL_LOAD_FACT_INTRADAY = (
-    Path(__file__)
-    .resolve()
-    .parents[2]  # wychodzi z intraday/ do etl/
-    / "sql"
-    / "facts"
-    / "load_fact_price_intraday_raw.sql"
+LOOP_SECONDS = 60
+
+# duże uniwersum: paczki pobierane równolegle, twardy deadline na cykl
+FETCH_CHUNK_SIZE = int(os.getenv("INTRADAY_FETCH_CHUNK_SIZE", "10"))
+FETCH_WORKERS = int(os.getenv("INTRADAY_FETCH_WORKERS", "8"))
+FETCH_RATE_PER_SEC = float(os.getenv("INTRADAY_FETCH_RATE_PER_SEC", "2"))
+FETCH_DEADLINE_S = float(os.getenv("INTRADAY_FETCH_DEADLINE_S", "45"))
+
+CYCLE_BUCKETS = LATENCY_BUCKETS + (30.0, 45.0, 60.0, 120.0)
+
+fetch_seconds_hist = REGISTRY.histogram(
+    "stock_dw_intraday_stream_fetch_seconds", CYCLE_BUCKETS, help="Pobranie barów w jednym cyklu."
+)
+load_seconds_hist = REGISTRY.histogram(
+    "stock_dw_intraday_stream_load_seconds", CYCLE_BUCKETS, help="Staging + claim do fact w jednym cyklu."
+)
+load_db_seconds_hist = REGISTRY.histogram(
+    "stock_dw_intraday_stream_load_db_seconds", CYCLE_BUCKETS, help="Czas DB w ładowaniu cyklu."
+)
+rows_total = REGISTRY.counter("stock_dw_intraday_stream_rows_total", help="Bary zapisane do fact.")
+bytes_total = REGISTRY.counter("stock_dw_intraday_stream_copy_bytes_total", help="Bajty COPY do stagingu.")
+retry_symbols = REGISTRY.gauge(
+    "stock_dw_intraday_stream_retry_symbols", help="Symbole nieobsłużone w ostatnim cyklu (deadline/błąd)."
 )
+last_cycle = REGISTRY.gauge(
+    "stock_dw_intraday_stream_last_cycle_timestamp_seconds", help="Koniec ostatniego cyklu."
+)
+
 
-def load_active_symbols(conn) -> list[str]:
+def load_last_seen(conn) -> dict:
+    """
+    Startowy watermark: ostatni bar per symbol z ostatniej doby
+    (restart skryptu nie dociąga ponownie całej sesji).
+    """
     with conn.cursor() as cur:
         cur.execute("""
-                    SELECT symbol
-                    FROM dim_symbol;
+                    SELECT s.symbol, last.ts_utc
+                    FROM dim_symbol s
+                    CROSS JOIN LATERAL (
+                        SELECT max(f.ts_utc) AS ts_utc
+                        FROM fact_price_intraday_raw f
+                        WHERE f.symbol_id = s.symbol_id
+                          AND f.ts_utc >= now() - interval '1 day'
+                    ) last
+                    WHERE last.ts_utc IS NOT NULL;
                     """)
-        return [r[0] for r in cur.fetchall()]
-def run_load_fact_intraday(conn):
-    with conn.cursor() as cur:
-        cur.execute(SQL_LOAD_FACT_INTRADAY.read_text())
-    conn.commit()
+        return dict(cur.fetchall())
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    start_exporter_from_env()
+
     conn = get_pg_connection()
-    symbols = load_active_symbols(conn)  # albo wczytane z configu
+    symbol_ids = SymbolIdCache(conn)
+    symbols = symbol_ids.symbols()  # albo wczytane z configu
+    fetcher = ChunkedIntradayFetcher(
+        chunk_size=FETCH_CHUNK_SIZE,
+        max_workers=FETCH_WORKERS,
+        rate_per_sec=FETCH_RATE_PER_SEC,
+        cycle_deadline_s=FETCH_DEADLINE_S,
+        watermark=IntradayWatermark(load_last_seen(conn)),
+    )
 
     try:
         while True:
-            rows = fetch_intraday(symbols)
+            t0 = time.monotonic()
+            bars, report = fetcher.fetch_cycle(symbols)
+            fetch_seconds_hist.observe(report.seconds)
+            retry_symbols.set(len(report.retry_symbols))
+
+            if report.retry_symbols:
+                log.warning(
+                    "cycle %.1fs, chunks: %s, to retry: %d symbols",
+                    report.seconds, report.summary(), len(report.retry_symbols),
+                )
+
+            if not bars.empty:
+                t1 = time.monotonic()
+                with track_db_time() as db:
+                    load_intraday_staging_frame(conn, bars, symbol_ids)
+                    # claim tylko własnych + zaległych wierszy; nie gubi ticków konsumenta Kafki
+                    rows, touched = load_intraday_claims(conn)
+                    # ten proces zabrał wiersze ze stagingu → intraday_job ich nie zobaczy,
+                    # więc rollup 5m i wskaźniki '5m' aktualizujemy tutaj
+                    if touched:
+                        with conn.cursor() as cur:
+                            upsert_intraday_ohlcv_5m(cur, touched)
+                            update_indicators_for_buckets(cur, touched)
+                        conn.commit()
+                load_seconds_hist.observe(time.monotonic() - t1)
+                load_db_seconds_hist.observe(db.seconds)
+                rows_total.inc(rows)
+                bytes_total.inc(db.bytes_copied)
 
-            if rows:
-                load_intraday_staging(conn, rows)
-                run_load_fact_intraday(conn)
+            last_cycle.set_to_now()
 
-            time.sleep(60)
+            time.sleep(max(0.0, LOOP_SECONDS - (time.monotonic() - t0)))
 
     finally:
+        fetcher.close()
         conn.close()
 
 
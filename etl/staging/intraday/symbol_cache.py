@@ -0,0 +1,96 @@
+# etl/staging/intraday/symbol_cache.py
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+
+SQL_ALL = "SELECT symbol, symbol_id FROM dim_symbol;"
+
+SQL_SOME = "SELECT symbol, symbol_id FROM dim_symbol WHERE symbol = ANY(%(symbols)s);"
+
+# jak długo pamiętamy, że symbolu nie ma w dim_symbol (bez odpytywania bazy)
+NEGATIVE_TTL_SECONDS = 60.0
+
+
+class SymbolIdCache:
+    """
+    Cache symbol -> symbol_id (dim_symbol) w pamięci procesu.
+
+    Ładowany w całości przy pierwszym użyciu. Symbol spoza cache (np. dodany
+    przez nocny EOD) powoduje dociągnięcie tylko brakujących wpisów;
+    symbol, którego nadal nie ma w dim_symbol, jest pamiętany jako brak
+    przez NEGATIVE_TTL_SECONDS. Ticki takich symboli są pomijane –
+    tak samo, jak robił to wcześniej JOIN do dim_symbol w loaderze.
+
+    Unieważnianie = ten TTL: nowe symbole wstawia inny proces (EOD:
+    merge_eod_batch / load_dim_symbol), więc nie ma jak powiadomić tego cache'u –
+    nowy symbol jest widoczny najpóźniej NEGATIVE_TTL_SECONDS po wstawieniu.
+    symbol_id istniejących symboli się nie zmienia, więc trafienia nie wymagają
+    odświeżania (pełne przeładowanie: refresh()).
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._ids: Dict[str, int] = {}
+        self._missing: Dict[str, float] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _fetch(self, sql, params=None) -> Dict[str, int]:
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            return dict(cur.fetchall())
+
+    def refresh(self) -> None:
+        ids = self._fetch(SQL_ALL)
+        with self._lock:
+            self._ids = ids
+            self._missing.clear()
+            self._loaded = True
+
+    def symbols(self) -> List[str]:
+        if not self._loaded:
+            self.refresh()
+        return sorted(self._ids)
+
+    def resolve(self, symbols: Iterable[str]) -> Dict[str, int]:
+        """
+        Mapowanie dla podanych symboli (bez tych, których nie ma w dim_symbol).
+        """
+        if not self._loaded:
+            self.refresh()
+
+        wanted = set(symbols)
+        now = time.monotonic()
+        with self._lock:
+            unknown = [
+                s for s in wanted
+                if s not in self._ids and now - self._missing.get(s, -NEGATIVE_TTL_SECONDS) >= NEGATIVE_TTL_SECONDS
+            ]
+            self.hits += len(wanted) - len(unknown)
+            self.misses += len(unknown)
+
+        if unknown:
+            found = self._fetch(SQL_SOME, {"symbols": unknown})
+            with self._lock:
+                self._ids.update(found)
+                for s in unknown:
+                    if s not in found:
+                        self._missing[s] = now
+
+        with self._lock:
+            return {s: self._ids[s] for s in wanted if s in self._ids}
+
+    def map_series(self, symbols: pd.Series) -> pd.Series:
+        """
+        Wektorowe symbol -> symbol_id (Int64, <NA> dla nieznanych).
+        """
+        mapping = self.resolve(symbols.unique())
+        return symbols.map(mapping).astype("Int64")
@@ -0,0 +1,153 @@
+# etl/staging/intraday/tick_codec.py
+
+"""
+Binarny, wersjonowany format ticków intraday na potrzeby Kafki.
+
+Wiadomość = nagłówek + N rekordów o stałej długości (little-endian):
+
+    nagłówek  <2sBI   magic b"TK", wersja (u8), liczba rekordów (u32)      7 B
+    rekord v1 <16sqddddq
+              symbol (UTF-8, dopełniony NUL, max 16 B)
+              ts_utc (int64, mikrosekundy od epoki UTC)
+              open, high, low, close (float64)
+              volume (int64)                                             64 B
+
+Pojedynczy tick to batch z jednym rekordem, więc konsument zawsze woła
+`decode_batch`. Format jest czytelny dla dowolnego języka (struct/ByteBuffer),
+w przeciwieństwie do pickle.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+import struct
+from typing import Iterable, List, Sequence, Tuple
+
+Row = Tuple[str, dt.datetime, float, float, float, float, int]
+# (symbol, ts_utc, open, high, low, close, volume)
+
+MAGIC = b"TK"
+VERSION = 1
+
+HEADER = struct.Struct("<2sBI")
+RECORD_V1 = struct.Struct("<16sqddddq")
+
+SYMBOL_MAX_BYTES = 16
+
+# jedna wiadomość Kafki = batch ticków (max tyle rekordów) – producent dzieli
+# po tyle, konsument liczy z tego, ile wiadomości pobrać do pełnego batcha
+MAX_TICKS_PER_MESSAGE = 1000
+
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_US = dt.timedelta(microseconds=1)
+
+
+class TickDecodeError(ValueError):
+    pass
+
+
+def _to_micros(ts: dt.datetime) -> int:
+    if ts.tzinfo is None:
+        # naiwne znaczniki czasu traktujemy jak UTC (tak zwraca je fetch_intraday)
+        ts = ts.replace(tzinfo=dt.timezone.utc)
+    return (ts - _EPOCH) // _US
+
+
+def _pack_record(row: Sequence) -> bytes:
+    symbol, ts, o, h, l, c, v = row
+    sym = symbol.encode("utf-8")
+    if len(sym) > SYMBOL_MAX_BYTES:
+        raise ValueError(f"symbol too long for wire format: {symbol!r}")
+    return RECORD_V1.pack(
+        sym,
+        _to_micros(ts),
+        float(o),
+        float(h),
+        float(l),
+        float(c),
+        0 if v is None or (isinstance(v, float) and math.isnan(v)) else int(v),
+    )
+
+
+def encode_batch(rows: Iterable[Sequence]) -> bytes:
+    records = [_pack_record(r) for r in rows]
+    return HEADER.pack(MAGIC, VERSION, len(records)) + b"".join(records)
+
+
+def encode_tick(row: Sequence) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, 1) + _pack_record(row)
+
+
+def encode_frame(df) -> bytes:
+    """
+    Wektorowe kodowanie ramki (symbol, ts_utc, open, high, low, close, volume)
+    – tablica strukturalna NumPy o układzie RECORD_V1, bez pętli per wiersz.
+    """
+    import numpy as np
+
+    dtype = np.dtype([
+        ("symbol", "S16"),
+        ("ts_us", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<i8"),
+    ])
+    assert dtype.itemsize == RECORD_V1.size
+
+    symbols = df["symbol"].str.encode("utf-8")
+    if len(df) and symbols.str.len().max() > SYMBOL_MAX_BYTES:
+        raise ValueError("symbol too long for wire format")
+
+    ts = df["ts_utc"]
+    if ts.dt.tz is None:
+        ts = ts.dt.tz_localize("UTC")
+
+    records = np.empty(len(df), dtype=dtype)
+    records["symbol"] = symbols.to_numpy(dtype="S16")
+    records["ts_us"] = ((ts - _EPOCH) // _US).to_numpy(dtype="int64")
+    for col in ("open", "high", "low", "close"):
+        records[col] = df[col].to_numpy(dtype="float64")
+    records["volume"] = df["volume"].fillna(0).to_numpy(dtype="int64")
+
+    return HEADER.pack(MAGIC, VERSION, len(records)) + records.tobytes()
+
+
+def decode_batch(payload: bytes) -> List[Row]:
+    if len(payload) < HEADER.size:
+        raise TickDecodeError("payload shorter than header")
+
+    magic, version, count = HEADER.unpack_from(payload, 0)
+    if magic != MAGIC:
+        raise TickDecodeError(f"bad magic: {magic!r}")
+    if version != VERSION:
+        raise TickDecodeError(f"unsupported tick format version: {version}")
+
+    body = memoryview(payload)[HEADER.size:]
+    if len(body) != count * RECORD_V1.size:
+        raise TickDecodeError(
+            f"length mismatch: header says {count} records, got {len(body)} bytes"
+        )
+
+    # w batchu powtarzają się symbole i minuty – dekodujemy każdą wartość raz
+    symbols = {}
+    stamps = {}
+    rows = []
+    for sym, ts_us, o, h, l, c, v in RECORD_V1.iter_unpack(body):
+        s = symbols.get(sym)
+        if s is None:
+            s = symbols[sym] = sym.rstrip(b"\x00").decode("utf-8")
+        ts = stamps.get(ts_us)
+        if ts is None:
+            ts = stamps[ts_us] = _EPOCH + ts_us * _US
+        rows.append((s, ts, o, h, l, c, v))
+    return rows
+
+
+def decode_tick(payload: bytes) -> Row:
+    rows = decode_batch(payload)
+    if len(rows) != 1:
+        raise TickDecodeError(f"expected a single tick, got {len(rows)}")
+    return rows[0]
@@ -1,11 +1,15 @@
 import uuid
-from sqlalchemy import text
 import pandas as pd
 
+from etl.staging.batches import STG_DIVIDEND, create_batch_partition
+from etl.staging.copy_loader import copy_dataframe
+
+COLUMNS = ["symbol", "ex_date", "dividend", "batch_id", "source"]
+
 
 def load_stg_dividend(df: pd.DataFrame, engine) -> str:
     """
-    Ładuje dywidendy do stg.stg_dividend i zwraca batch_id.
+    Ładuje dywidendy do stg.stg_dividend (COPY FROM STDIN) i zwraca batch_id.
     """
 
     batch_id = str(uuid.uuid4())
@@ -17,18 +21,9 @@ def load_stg_dividend(df: pd.DataFrame, engine) -> str:
     df["batch_id"] = batch_id
     df["source"] = "yfinance"
 
-    records = df.to_dict(orient="records")
-
-    sql = """
-    INSERT INTO stg.stg_dividend (
-        symbol, ex_date, dividend, batch_id, source
-    )
-    VALUES (
-        :symbol, :ex_date, :dividend, :batch_id, :source
-    );
-    """
-
+    # każdy batch ląduje we własnej partycji (UNLOGGED), usuwanej po retencji
     with engine.begin() as conn:
-        conn.execute(text(sql), records)
+        create_batch_partition(conn, STG_DIVIDEND, batch_id)
+    copy_dataframe(engine, df, "stg.stg_dividend", COLUMNS)
 
     return batch_id
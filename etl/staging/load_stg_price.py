@@ -1,7 +1,13 @@
 import uuid
-from sqlalchemy import text
 import pandas as pd
 
+from etl.staging.batches import STG_PRICE, create_batch_partition
+from etl.staging.copy_loader import copy_dataframe
+
+COLUMNS = [
+    "symbol", "date_value", "open", "high", "low", "close", "adj_close", "volume", "batch_id", "source",
+]
+
 def load_stg_price(df, engine):
     batch_id = str(uuid.uuid4())
 
@@ -9,20 +15,14 @@ def load_stg_price(df, engine):
     df["batch_id"] = batch_id
     df["source"] = "yfinance"
 
-    df["date_value"] = pd.to_datetime(df["date_value"]).dt.date
-
-    records = df.to_dict(orient="records")
-
-    sql = """
-    INSERT INTO stg.stg_price (
-        symbol, date_value, open, high, low, close, adj_close, volume, batch_id, source
-    )
-    VALUES (
-        :symbol, :date_value, :open, :high, :low, :close, :adj_close, :volume, :batch_id, :source
-    )
-    """
+    # zostajemy przy datetime64 – to_csv sformatuje datę bez obiektów `date` per wiersz
+    df["date_value"] = pd.to_datetime(df["date_value"]).dt.normalize()
+    # yfinance zwraca wolumen jako float – COPY do bigint nie przyjmie "123.0"
+    df["volume"] = df["volume"].round().astype("Int64")
 
+    # każdy batch ląduje we własnej partycji (UNLOGGED), usuwanej po retencji
     with engine.begin() as conn:
-        conn.execute(text(sql), records)
+        create_batch_partition(conn, STG_PRICE, batch_id)
+    copy_dataframe(engine, df, "stg.stg_price", COLUMNS, date_format="%Y-%m-%d")
 
     return batch_id
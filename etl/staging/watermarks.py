@@ -0,0 +1,73 @@
+# etl/staging/watermarks.py
+
+from __future__ import annotations
+
+import datetime as dt
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import bindparam, text
+
+
+SQL_LAST_LOADED = text("""
+SELECT
+    ds.symbol,
+    last.date_sk AS last_date_sk
+FROM dim_symbol ds
+CROSS JOIN LATERAL (
+    SELECT fp.date_sk
+    FROM fact_price fp
+    WHERE fp.symbol_id = ds.symbol_id
+    ORDER BY fp.date_sk DESC
+    LIMIT 1
+) last
+WHERE ds.symbol IN :symbols
+""").bindparams(bindparam("symbols", expanding=True))
+
+
+def _date_from_sk(date_sk: int) -> dt.date:
+    # date_sk = YYYYMMDD
+    return dt.date(date_sk // 10000, (date_sk // 100) % 100, date_sk % 100)
+
+
+def get_price_watermarks(engine, tickers: Iterable[str]) -> Dict[str, dt.date]:
+    """
+    High-watermark per symbol: ostatnia data załadowana do fact_price.
+    Symbole bez żadnych notowań nie pojawiają się w wyniku.
+    Per symbol jedno zejście po unikalnym indeksie (symbol_id, date_sk) od końca
+    (LATERAL ... ORDER BY date_sk DESC LIMIT 1), bez skanu historii.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return {}
+
+    with engine.connect() as conn:
+        rows = conn.execute(SQL_LAST_LOADED, {"symbols": tickers}).fetchall()
+
+    return {symbol: _date_from_sk(last_sk) for symbol, last_sk in rows}
+
+
+def plan_incremental_extract(
+    tickers: Iterable[str],
+    watermarks: Dict[str, dt.date],
+    default_start: dt.date,
+    lookback_days: int = 5,
+) -> Dict[dt.date, List[str]]:
+    """
+    Grupuje tickery po dacie startu ekstrakcji:
+      start = watermark - lookback_days (korekty z opóźnieniem),
+      albo `default_start` dla symboli jeszcze nie załadowanych.
+
+    Symbole o tym samym starcie idą jednym wywołaniem yf.download.
+    """
+    groups: Dict[dt.date, List[str]] = defaultdict(list)
+
+    for symbol in tickers:
+        last = watermarks.get(symbol)
+        if last is None:
+            start = default_start
+        else:
+            start = max(default_start, last - dt.timedelta(days=lookback_days))
+        groups[start].append(symbol)
+
+    return dict(sorted(groups.items()))
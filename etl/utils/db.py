@@ -0,0 +1,145 @@
+# etl/utils/db.py
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL
+
+from etl.utils.db_timing import TimedCursor
+from etl.utils.metrics import REGISTRY, Histogram, LATENCY_BUCKETS
+
+
+@dataclass
+class DbConfig:
+    """
+    Konfiguracja połączenia i puli. Domyślne wartości ze zmiennych
+    środowiskowych PG* (jak get_pg_connection w stagingu intraday).
+    """
+    host: str = field(default_factory=lambda: os.getenv("PGHOST", "localhost"))
+    port: int = field(default_factory=lambda: int(os.getenv("PGPORT", "5432")))
+    dbname: str = field(default_factory=lambda: os.getenv("PGDATABASE", "stock_dw"))
+    user: str = field(default_factory=lambda: os.getenv("PGUSER", "postgres"))
+    password: str = field(default_factory=lambda: os.getenv("PGPASSWORD", "postgres"))
+
+    min_size: int = 1
+    max_size: int = 10
+    statement_timeout_ms: int = 300_000
+    pool_timeout_s: float = 30.0
+    pool_recycle_s: int = 1800
+    application_name: str = "stock_dw_etl"
+
+    def url(self) -> URL:
+        return URL.create(
+            "postgresql+psycopg2",
+            username=self.user,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+            database=self.dbname,
+        )
+
+
+class WarehouseDb:
+    """
+    Jedna pula połączeń (QueuePool SQLAlchemy) dla całego procesu.
+
+    - `engine` – silnik SQLAlchemy dla loaderów (engine.begin() ...)
+    - `get_connection()` – surowe połączenie psycopg2 z tej samej puli;
+      wyjście z `with` oddaje je do puli (rollback niezacommitowanej transakcji)
+
+    Health check: pool_pre_ping. Timeout zapytań: statement_timeout ustawiany
+    przy zakładaniu połączenia. Metryki: czas oczekiwania na połączenie
+    z puli (checkout) per etykieta, np. nazwa opa.
+    """
+
+    def __init__(self, config: Optional[DbConfig] = None):
+        self.config = config or DbConfig()
+        cfg = self.config
+
+        self.engine = create_engine(
+            cfg.url(),
+            pool_size=cfg.max_size,
+            max_overflow=0,
+            pool_timeout=cfg.pool_timeout_s,
+            pool_recycle=cfg.pool_recycle_s,
+            pool_pre_ping=True,
+            connect_args={
+                "application_name": cfg.application_name,
+                "options": f"-c statement_timeout={cfg.statement_timeout_ms}",
+                # czas każdego zapytania → metryki / metadane opów (etl/utils/op_metrics.py)
+                "cursor_factory": TimedCursor,
+            },
+        )
+
+        self._lock = threading.Lock()
+        self.checkout_seconds: Dict[str, Histogram] = {}
+        self.connects = 0
+
+        @event.listens_for(self.engine, "connect")
+        def _on_connect(dbapi_conn, conn_record):
+            with self._lock:
+                self.connects += 1
+
+    def warm_up(self) -> None:
+        """
+        Otwiera `min_size` połączeń z góry, żeby pierwsze opy nie płaciły za connect/auth.
+        """
+        conns = [self.engine.raw_connection() for _ in range(self.config.min_size)]
+        for c in conns:
+            c.close()
+
+    def _observe_checkout(self, label: str, seconds: float) -> None:
+        with self._lock:
+            hist = self.checkout_seconds.get(label)
+            if hist is None:
+                hist = self.checkout_seconds[label] = REGISTRY.histogram(
+                    "stock_dw_db_checkout_seconds",
+                    LATENCY_BUCKETS,
+                    help="Czas oczekiwania na połączenie z puli.",
+                    labels={"label": label},
+                )
+        hist.observe(seconds)
+
+    @contextmanager
+    def get_connection(self, label: str = "default"):
+        t0 = time.perf_counter()
+        fairy = self.engine.raw_connection()
+        self._observe_checkout(label, time.perf_counter() - t0)
+        try:
+            yield fairy.dbapi_connection
+        finally:
+            fairy.close()  # zwrot do puli, nie zamknięcie
+
+    def pool_status(self) -> str:
+        return self.engine.pool.status()
+
+    def checkout_stats(self) -> Dict[str, dict]:
+        with self._lock:
+            items = list(self.checkout_seconds.items())
+        return {label: hist.snapshot() for label, hist in items}
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+
+
+_default_db: Optional[WarehouseDb] = None
+_default_lock = threading.Lock()
+
+
+def get_db(config: Optional[DbConfig] = None) -> WarehouseDb:
+    """
+    Współdzielona (per proces) instancja WarehouseDb.
+    Config brany pod uwagę tylko przy pierwszym wywołaniu.
+    """
+    global _default_db
+    with _default_lock:
+        if _default_db is None:
+            _default_db = WarehouseDb(config)
+        return _default_db
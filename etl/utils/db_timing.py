@@ -0,0 +1,85 @@
+# etl/utils/db_timing.py
+
+from __future__ import annotations
+
+import contextvars
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import psycopg2.extensions
+
+from etl.utils.metrics import REGISTRY, LATENCY_BUCKETS
+
+
+@dataclass
+class DbTimer:
+    seconds: float = 0.0
+    queries: int = 0
+    rows: int = 0           # suma rowcount (DML + zwrócone wiersze)
+    bytes_copied: int = 0   # COPY ... FROM STDIN
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("db_timer", default=None)
+
+query_seconds = REGISTRY.histogram(
+    "stock_dw_db_query_seconds", LATENCY_BUCKETS, help="Czas wykonania zapytań (kursor psycopg2)."
+)
+copy_bytes = REGISTRY.counter(
+    "stock_dw_db_copy_bytes_total", help="Bajty wysłane przez COPY FROM STDIN."
+)
+
+
+@contextmanager
+def track_db_time():
+    """
+    Sumuje czas DB z kursorów TimedCursor wołanych w tym kontekście
+    (ten sam wątek / task), np. w obrębie jednego opa Dagstera.
+    """
+    timer = DbTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """
+    Kursor mierzący czas każdego execute/executemany/copy_expert.
+    Podpinany jako cursor_factory – działa też pod SQLAlchemy i execute_values.
+    """
+
+    def _record(self, seconds: float, copied: int = 0) -> None:
+        query_seconds.observe(seconds)
+        if copied:
+            copy_bytes.inc(copied)
+        timer = _current.get()
+        if timer is not None:
+            timer.seconds += seconds
+            timer.queries += 1
+            timer.rows += max(self.rowcount, 0)
+            timer.bytes_copied += copied
+
+    def execute(self, query, vars=None):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(time.perf_counter() - t0)
+
+    def executemany(self, query, vars_list):
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(time.perf_counter() - t0)
+
+    def copy_expert(self, sql, file, size=8192):
+        t0 = time.perf_counter()
+        start = file.tell() if hasattr(file, "tell") else 0
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            copied = file.tell() - start if hasattr(file, "tell") else 0
+            self._record(time.perf_counter() - t0, copied)
@@ -0,0 +1,284 @@
+# etl/utils/metrics.py
+
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+
+# domyślne kubełki: sekundy (latencje)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# domyślne kubełki: liczba wierszy w batchu
+SIZE_BUCKETS = (1, 10, 50, 100, 500, 1_000, 5_000, 10_000, 50_000, 100_000)
+
+
+class Histogram:
+    """
+    Histogram o stałych kubełkach (styl Prometheusa: kubełki "<= le").
+    Wątkowo-bezpieczny, bez zależności zewnętrznych.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        help: str = "",
+        labels: Optional[Dict[str, str]] = None,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = dict(labels or {})
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # ostatni = +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def quantile(self, q: float) -> float:
+        """
+        Przybliżony kwantyl: górna granica kubełka, w którym leży q-ty element.
+        """
+        with self._lock:
+            total = self._count
+            counts = list(self._counts)
+        if total == 0:
+            return 0.0
+
+        rank = q * total
+        running = 0
+        for le, c in zip(self.buckets + (float("inf"),), counts):
+            running += c
+            if running >= rank:
+                return le
+        return float("inf")
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """
+        [(le, liczba obserwacji <= le)], ostatni kubełek = +Inf (jak w Prometheusie).
+        """
+        with self._lock:
+            counts = list(self._counts)
+        out, running = [], 0
+        for le, c in zip(self.buckets + (float("inf"),), counts):
+            running += c
+            out.append((le, running))
+        return out
+
+    def samples(self):
+        for le, n in self.cumulative():
+            yield "_bucket", {**self.labels, "le": _fmt(le)}, n
+        yield "_sum", self.labels, self._sum
+        yield "_count", self.labels, self._count
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self._count,
+            "sum": round(self._sum, 6),
+            "avg": round(self._sum / self._count, 6) if self._count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Counter:
+    """
+    Licznik monotoniczny (np. wiersze, bajty, błędy).
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.help = help
+        self.labels = dict(labels or {})
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self):
+        yield "", self.labels, self._value
+
+
+class Gauge(Counter):
+    """
+    Wartość chwilowa (np. timestamp ostatniego batcha, liczba symboli do ponowienia).
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def set_to_now(self) -> None:
+        self.set(time.time())
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in sorted(labels.items())
+    )
+    return "{" + body + "}"
+
+
+class Registry:
+    """
+    Zbiór metryk procesu + render w formacie tekstowym Prometheusa.
+    `counter()` / `gauge()` / `histogram()` zwracają istniejącą metrykę
+    o tej samej nazwie i etykietach (bezpieczne przy wielokrotnym imporcie).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        key = (metric.name, tuple(sorted(metric.labels.items())))
+        with self._lock:
+            return self._metrics.setdefault(key, metric)
+
+    def counter(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        help: str = "",
+        labels: Optional[Dict[str, str]] = None,
+    ) -> Histogram:
+        return self.register(Histogram(name, buckets, help, labels))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+
+        lines, seen = [], set()
+        for m in metrics:
+            if m.name not in seen:
+                seen.add(m.name)
+                if m.help:
+                    lines.append(f"# HELP {m.name} {m.help}")
+                lines.append(f"# TYPE {m.name} {m.kind}")
+            for suffix, labels, value in m.samples():
+                lines.append(f"{m.name}{suffix}{_fmt_labels(labels)} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# domyślny rejestr procesu
+REGISTRY = Registry()
+
+
+# ---------- eksport ----------
+
+def start_http_exporter(port: int, registry: Registry = REGISTRY, host: str = "127.0.0.1"):
+    """
+    Endpoint /metrics do scrapowania przez Prometheusa (wątek w tle, daemon).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):  # bez logu per scrape
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    log.info("metrics exporter on http://%s:%d/metrics", host, port)
+    return server
+
+
+def write_textfile(path: str, registry: Registry = REGISTRY) -> None:
+    """
+    Zapis dla textfile collectora node_exportera – atomowo (tmp + rename).
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+def start_textfile_exporter(path: str, interval_s: float = 15.0, registry: Registry = REGISTRY):
+    def loop():
+        while True:
+            try:
+                write_textfile(path, registry)
+            except OSError as e:
+                log.warning("metrics textfile %s: %s", path, e)
+            time.sleep(interval_s)
+
+    thread = threading.Thread(target=loop, name="metrics-textfile", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_exporter_from_env(registry: Registry = REGISTRY) -> None:
+    """
+    STOCK_DW_METRICS_PORT      – endpoint HTTP /metrics
+    STOCK_DW_METRICS_TEXTFILE  – plik .prom dla node_exportera (co STOCK_DW_METRICS_INTERVAL s)
+    Bez zmiennych – nic nie startuje (metryki dalej zbierane w pamięci).
+    """
+    port = os.getenv("STOCK_DW_METRICS_PORT")
+    if port:
+        start_http_exporter(int(port), registry, host=os.getenv("STOCK_DW_METRICS_HOST", "127.0.0.1"))
+
+    path = os.getenv("STOCK_DW_METRICS_TEXTFILE")
+    if path:
+        start_textfile_exporter(path, float(os.getenv("STOCK_DW_METRICS_INTERVAL", "15")), registry)
@@ -0,0 +1,63 @@
+# etl/utils/op_metrics.py
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from etl.utils.db_timing import track_db_time
+
+
+class OpMetrics:
+    """
+    Metadane wyjścia opa zbierane w trakcie wykonania:
+    `rows("fact_price", n)`, `bytes(n)`, `set(klucz, wartość)`.
+    """
+
+    def __init__(self):
+        self.metadata: Dict[str, Any] = {}
+
+    def rows(self, name: str, n: int) -> None:
+        self.metadata[f"rows_{name}"] = int(n)
+
+    def bytes(self, n: int) -> None:
+        self.metadata["bytes"] = self.metadata.get("bytes", 0) + int(n)
+
+    def set(self, key: str, value) -> None:
+        self.metadata[key] = value
+
+
+@contextmanager
+def op_metrics(context):
+    """
+    Owija ciało opa: czas całkowity, czas DB (TimedCursor), liczba zapytań,
+    wiersze i bajty COPY – jako output metadata Dagstera (widoczne w UI,
+    porównywalne między runami). Przy wyjątku metadane nie są dodawane.
+
+        with op_metrics(context) as m:
+            ...
+            m.rows("fact_price", n)
+    """
+    m = OpMetrics()
+    t0 = time.perf_counter()
+    with track_db_time() as db:
+        yield m
+    duration = time.perf_counter() - t0
+
+    extra = dict(m.metadata)
+    metadata = {
+        "duration_s": round(duration, 3),
+        "db_seconds": round(db.seconds, 3),
+        "db_share": round(db.seconds / duration, 3) if duration > 0 else 0.0,
+        "db_queries": db.queries,
+        "db_rows": db.rows,
+        "bytes": db.bytes_copied + extra.pop("bytes", 0),
+    }
+    metadata.update(extra)
+
+    context.add_output_metadata(metadata)
+    context.log.info(
+        f"{context.op.name}: {metadata['duration_s']}s (db {metadata['db_seconds']}s, "
+        f"{metadata['db_queries']} queries)"
+    )
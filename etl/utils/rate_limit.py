@@ -0,0 +1,66 @@
+# etl/utils/rate_limit.py
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Prosty, wątkowo-bezpieczny token bucket.
+
+    `rate` tokenów na sekundę, maksymalnie `capacity` naraz (burst).
+    Domyślnie capacity = max(1, rate) – przy rate < 1 kubełek i tak mieści jeden token.
+    Jeden obiekt współdzielą wszystkie wątki, które odpytują to samo API.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def _check(self, tokens: float) -> None:
+        # więcej niż mieści kubełek → nigdy się nie doczekamy
+        if tokens > self.capacity:
+            raise ValueError(f"tokens ({tokens}) exceed bucket capacity ({self.capacity})")
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._check(tokens)
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        """
+        Blokuje aż będą dostępne tokeny. Zwraca False, jeśli minął `timeout`.
+        """
+        self._check(tokens)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
@@ -1,16 +1,17 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sqlalchemy import create_engine
+from sqlalchemy import text
 import time
 
+from data_access import cached_query, read_sql
+
 
 # ----------------------------------------------------
 # CONFIG
 # ----------------------------------------------------
 
-DB_URL = "postgresql+psycopg2://pkorzec@localhost:5432/stock_dw"
-engine = create_engine(DB_URL)
+# połączenie: data_access.get_engine() (STOCK_DW_DSN)
 
 st.set_page_config(
     page_title="Stock Price Dashboard",
@@ -22,46 +23,157 @@ st.set_page_config(
 # ----------------------------------------------------
 
 
-@st.cache_data(ttl=60)
-def load_data() -> pd.DataFrame:
+# docelowa liczba punktów na symbol – dłuższe zakresy są agregowane w SQL
+MAX_POINTS = 1000
+
+
+def to_date_sk(d) -> int:
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+@cached_query("load_symbols", ttl=60)
+def load_symbols() -> list[str]:
     """
-    Loads joined price + symbol + date data from the warehouse.
-    Cached for 60 seconds.
+    Symbole, które mają jakiekolwiek notowania EOD.
     """
-    query = """
-        SELECT 
-            date_value AS date,
-            symbol,
-            open,
-            high,
-            low,
-            close,
-            adj_close,
-            volume
-        FROM mart.vw_price_daily
-        ORDER BY date_value ASC
+    query = text("""
+        SELECT s.symbol
+        FROM dim_symbol s
+        WHERE EXISTS (SELECT 1 FROM fact_price fp WHERE fp.symbol_id = s.symbol_id)
+        ORDER BY s.symbol
+    """)
+    return read_sql("load_symbols", query)["symbol"].tolist()
+
+
+@cached_query("load_date_bounds", ttl=60)
+def load_date_bounds():
+    """
+    Min/max data w fact_price – min()/max() per symbol po indeksie (symbol_id, date_sk).
     """
-    with engine.connect() as conn:
-        df = pd.read_sql(query, conn)
+    query = text("""
+        SELECT min(b.min_sk) AS min_sk, max(b.max_sk) AS max_sk
+        FROM dim_symbol s
+        CROSS JOIN LATERAL (
+            SELECT min(fp.date_sk) AS min_sk, max(fp.date_sk) AS max_sk
+            FROM fact_price fp
+            WHERE fp.symbol_id = s.symbol_id
+        ) b
+    """)
+    row = read_sql("load_date_bounds", query).iloc[0]
+
+    if pd.isna(row["min_sk"]):
+        return None, None
+    return (
+        pd.to_datetime(str(int(row["min_sk"])), format="%Y%m%d"),
+        pd.to_datetime(str(int(row["max_sk"])), format="%Y%m%d"),
+    )
+
+
+@cached_query("load_prices", ttl=60)
+def load_prices(symbols: tuple, start_date, end_date, max_points: int = MAX_POINTS) -> pd.DataFrame:
+    """
+    Ceny EOD tylko dla wybranych symboli i zakresu dat (predykaty po
+    symbol_id/date_sk → unikalny indeks fact_price).
+
+    Jeśli zakres ma więcej dni niż `max_points`, dni są sklejane w kubełki
+    po `bucket_days` po stronie serwera (OHLC: pierwszy open, max high,
+    min low, ostatni close, suma wolumenu), więc do pandas trafia
+    najwyżej ~max_points wierszy na symbol.
+    """
+    days = (end_date - start_date).days + 1
+    bucket_days = max(1, -(-days // max_points))
+
+    params = {
+        "symbols": list(symbols),
+        "from_sk": to_date_sk(start_date),
+        "to_sk": to_date_sk(end_date),
+        "start_date": start_date,
+        "bucket_days": bucket_days,
+    }
+
+    if bucket_days == 1:
+        query = text("""
+            SELECT
+                fp.date AS date,
+                s.symbol,
+                fp.open,
+                fp.high,
+                fp.low,
+                fp.close,
+                fp.adj_close,
+                fp.volume
+            FROM dim_symbol s
+            JOIN fact_price fp ON fp.symbol_id = s.symbol_id
+            WHERE s.symbol = ANY(:symbols)
+              AND fp.date_sk BETWEEN :from_sk AND :to_sk
+            ORDER BY fp.date
+        """)
+    else:
+        query = text("""
+            SELECT
+                max(fp.date)                                       AS date,
+                s.symbol,
+                (array_agg(fp.open      ORDER BY fp.date))[1]      AS open,
+                max(fp.high)                                       AS high,
+                min(fp.low)                                        AS low,
+                (array_agg(fp.close     ORDER BY fp.date DESC))[1] AS close,
+                (array_agg(fp.adj_close ORDER BY fp.date DESC))[1] AS adj_close,
+                sum(fp.volume)                                     AS volume
+            FROM dim_symbol s
+            JOIN fact_price fp ON fp.symbol_id = s.symbol_id
+            WHERE s.symbol = ANY(:symbols)
+              AND fp.date_sk BETWEEN :from_sk AND :to_sk
+            GROUP BY s.symbol, (fp.date - CAST(:start_date AS date)) / :bucket_days
+            ORDER BY 1
+        """)
+
+    df = read_sql("load_prices", query, params)
 
     df["date"] = pd.to_datetime(df["date"])
     return df
-@st.cache_data(ttl=60)
-def load_dividends() -> pd.DataFrame:
-    query = """
+
+
+@cached_query("load_latest_bars", ttl=60)
+def load_latest_bars(symbol: str, end_date) -> pd.DataFrame:
+    """
+    Dwa ostatnie (niezagregowane) notowania symbolu do `end_date` – do metryk.
+    """
+    query = text("""
+        SELECT fp.date AS date, fp.close, fp.volume
+        FROM dim_symbol s
+        JOIN fact_price fp ON fp.symbol_id = s.symbol_id
+        WHERE s.symbol = :symbol
+          AND fp.date_sk <= :to_sk
+        ORDER BY fp.date_sk DESC
+        LIMIT 2
+    """)
+    df = read_sql("load_latest_bars", query, {"symbol": symbol, "to_sk": to_date_sk(end_date)})
+
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+@cached_query("load_dividends", ttl=60)
+def load_dividends(symbol: str, start_date, end_date) -> pd.DataFrame:
+    query = text("""
         SELECT
             ex_date,
             symbol,
             dividend
         FROM mart.vw_dividend_daily
+        WHERE symbol = :symbol
+          AND ex_date BETWEEN :start_date AND :end_date
         ORDER BY ex_date ASC
-    """
-    with engine.connect() as conn:
-        df = pd.read_sql(query,conn)
-    
+    """)
+    df = read_sql(
+        "load_dividends",
+        query,
+        {"symbol": symbol, "start_date": start_date, "end_date": end_date},
+    )
+
     df["ex_date"] = pd.to_datetime(df["ex_date"])
     return df
-@st.cache_data(ttl=60)
+@cached_query("load_intraday", ttl=60)
 def load_intraday(symbol: str, limit: int = 200) -> pd.DataFrame:
     """
     Czyta ostatnie ticki intraday ze stagingu.
@@ -78,8 +190,7 @@ def load_intraday(symbol: str, limit: int = 200) -> pd.DataFrame:
         WHERE symbol = %(symbol)s
         ORDER BY ts_utc
     """
-    with engine.connect() as conn:
-        df = pd.read_sql(query, conn, params={"symbol": symbol, "limit": limit})
+    df = read_sql("load_intraday", query, {"symbol": symbol, "limit": limit})
 
     if df.empty:
         return df
@@ -92,18 +203,6 @@ def load_intraday(symbol: str, limit: int = 200) -> pd.DataFrame:
 # ----------------------------------------------------
 
 
-def filter_data(df: pd.DataFrame,
-                selected_symbols: list[str],
-                start_date: pd.Timestamp,
-                end_date: pd.Timestamp) -> pd.DataFrame:
-    mask = (
-        df["symbol"].isin(selected_symbols)
-        & (df["date"] >= start_date)
-        & (df["date"] <= end_date)
-    )
-    return df.loc[mask].copy()
-
-
 def compute_latest_metrics(df_symbol: pd.DataFrame) -> dict:
     """
     Zwraca kilka prostych metryk dla pojedynczego tickera:
@@ -136,9 +235,9 @@ def compute_latest_metrics(df_symbol: pd.DataFrame) -> dict:
 st.title("📈 Stock Price Dashboard")
 st.markdown("**Hurtownia danych:** PostgreSQL + Dagster + Streamlit")
 
-df = load_data()
-df_div = load_dividends()
-if df.empty:
+all_tickers = load_symbols()
+global_min_date, global_max_date = load_date_bounds()
+if not all_tickers or global_min_date is None:
     st.warning("Brak danych w hurtowni – odpal ETL w Dagsterze.")
     st.stop()
 
@@ -147,8 +246,6 @@ if df.empty:
 with st.sidebar:
     st.header("⚙️ Filtry")
 
-    all_tickers = sorted(df["symbol"].unique())
-
     selected_tickers = st.multiselect(
         "Wybierz tickery:",
         options=all_tickers,
@@ -159,9 +256,6 @@ with st.sidebar:
         st.warning("Wybierz przynajmniej jeden ticker.")
         st.stop()
 
-    global_min_date = df["date"].min()
-    global_max_date = df["date"].max()
-
     start_date, end_date = st.slider(
         "Zakres dat:",
         min_value=global_min_date.to_pydatetime(),
@@ -169,7 +263,11 @@ with st.sidebar:
         value=(global_min_date.to_pydatetime(), global_max_date.to_pydatetime()),
     )
 
-filtered_df = filter_data(df, selected_tickers, pd.to_datetime(start_date), pd.to_datetime(end_date))
+filtered_df = load_prices(
+    tuple(selected_tickers),
+    pd.to_datetime(start_date).date(),
+    pd.to_datetime(end_date).date(),
+)
 
 if filtered_df.empty:
     st.warning("Brak danych dla wybranego zakresu / tickerów.")
@@ -213,14 +311,16 @@ with tab_single:
 
     df_single = filtered_df[filtered_df["symbol"] == selected_single].copy()
 
-    df_div_single = df_div[df_div["symbol"] == selected_single].copy()
-    df_div_single = df_div_single[
-        (df_div_single["ex_date"] >= pd.to_datetime(start_date))
-        & (df_div_single["ex_date"] <= pd.to_datetime(end_date))
-    ]
+    df_div_single = load_dividends(
+        selected_single,
+        pd.to_datetime(start_date).date(),
+        pd.to_datetime(end_date).date(),
+    )
 
-    # Metryki
-    metrics = compute_latest_metrics(df_single)
+    # Metryki – z niezagregowanych notowań, niezależnie od downsamplingu wykresu
+    metrics = compute_latest_metrics(
+        load_latest_bars(selected_single, pd.to_datetime(end_date).date())
+    )
     if metrics:
         col1, col2, col3, col4 = st.columns(4)
         col1.metric(
@@ -275,7 +375,13 @@ with tab_single:
     if not df_div_single.empty:
         fig_div.add_scatter(
             x=df_div_single["ex_date"],
-            y=df_single.set_index("date").loc[df_div_single["ex_date"], "close"],
+            # cena z ostatniego punktu wykresu <= ex_date (dzień wolny / kubełek)
+            y=pd.merge_asof(
+                df_div_single.sort_values("ex_date"),
+                df_single.sort_values("date")[["date", "close"]],
+                left_on="ex_date",
+                right_on="date",
+            )["close"],
             mode="markers",
             marker=dict(size=10, color="green"),
             name="Dywidenda",
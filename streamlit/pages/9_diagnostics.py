@@ -0,0 +1,75 @@
+import os
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from data_access import SLOW_QUERY_MS, get_engine, get_query_stats
+
+# ---------- KONFIG ----------
+# Strona ukryta: treść tylko z ?diag=1 w URL albo STOCK_DW_DIAGNOSTICS=1.
+
+st.set_page_config(
+    page_title="Diagnostyka zapytań",
+    layout="wide",
+)
+
+if st.query_params.get("diag") != "1" and os.getenv("STOCK_DW_DIAGNOSTICS") != "1":
+    st.stop()
+
+st.title("🩺 Diagnostyka zapytań dashboardu")
+st.caption(
+    f"Statystyki procesu Streamlita od startu (ostatnie pomiary per zapytanie). "
+    f"Próg wolnego zapytania: {SLOW_QUERY_MS:.0f} ms (STOCK_DW_SLOW_QUERY_MS)."
+)
+
+# ---------- CZASY PER ZAPYTANIE ----------
+
+summary = get_query_stats().summary()
+
+if summary.empty:
+    st.info("Brak pomiarów – otwórz najpierw któryś z widoków dashboardu.")
+else:
+    st.subheader("Czasy zapytań (ms)")
+    st.dataframe(
+        summary.sort_values("p95_ms", ascending=False, na_position="last"),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "hit_ratio": st.column_config.NumberColumn("hit_ratio", format="%.2f"),
+            "p50_ms": st.column_config.NumberColumn("p50_ms", format="%.1f"),
+            "p95_ms": st.column_config.NumberColumn("p95_ms", format="%.1f"),
+            "max_ms": st.column_config.NumberColumn("max_ms", format="%.1f"),
+        },
+    )
+
+# ---------- WOLNE ZAPYTANIA (EXPLAIN) ----------
+
+st.subheader("Wolne zapytania – EXPLAIN (ANALYZE, BUFFERS)")
+
+query = text("""
+    select id, logged_at, query_name, duration_ms, row_count, params, query, plan
+    from diag.slow_query_log
+    order by logged_at desc
+    limit 50
+""")
+try:
+    with get_engine().connect() as conn:
+        slow = pd.read_sql(query, conn)
+except ProgrammingError:
+    # tabela powstaje przy pierwszym wolnym zapytaniu
+    slow = pd.DataFrame()
+
+if slow.empty:
+    st.info("Brak wpisów w diag.slow_query_log.")
+else:
+    st.dataframe(
+        slow[["logged_at", "query_name", "duration_ms", "row_count", "params"]],
+        use_container_width=True,
+        hide_index=True,
+    )
+    for row in slow.head(10).itertuples():
+        with st.expander(f"{row.logged_at:%Y-%m-%d %H:%M:%S} · {row.query_name} · {row.duration_ms} ms"):
+            st.code(row.query.strip(), language="sql")
+            st.json(row.plan)